@@ -0,0 +1,88 @@
+"""Size, write and read speed of the datasets per compression codec
+
+Usage:
+    python benchmarks/bench_codecs.py [--dir data] [--levels gzip=6 zstd=3 zstd=19]
+
+Every .csv file of the directory is rewritten row by row through the csv
+sink's writer, then read back as `create-db` streams it.
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1]))
+
+from data_hunter.compression import codecs, open_text
+
+
+def measure(rows: list, directory: str, codec: str, level: int) -> dict:
+    """Write then read back the rows of every file under a codec"""
+    suffix = ".csv" + codecs.get(codec, "")
+    paths = [os.path.join(directory, name + suffix) for name, _ in rows]
+    start = time.perf_counter()
+    for path, (_, file_rows) in zip(paths, rows):
+        with open_text(path, "w", level) as fh:
+            csv.writer(fh).writerows(file_rows)
+    written = time.perf_counter() - start
+    start = time.perf_counter()
+    count = 0
+    for path in paths:
+        with open_text(path) as fh:
+            count += sum(1 for _ in csv.reader(fh))
+    read = time.perf_counter() - start
+    size = sum(os.path.getsize(path) for path in paths)
+    for path in paths:
+        os.remove(path)
+    assert count == sum(len(file_rows) for _, file_rows in rows)
+    return {
+        "codec": codec,
+        "level": level,
+        "bytes": size,
+        "write_seconds": round(written, 3),
+        "read_seconds": round(read, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", default=str(Path(__file__).parents[1] / "data"))
+    parser.add_argument(
+        "--levels",
+        nargs="+",
+        default=["gzip=1", "gzip=6", "zstd=1", "zstd=3", "zstd=19"],
+        help="codec=level pairs to measure, besides the uncompressed .csv",
+    )
+    args = parser.parse_args()
+    rows = []
+    for path in sorted(glob.glob(os.path.join(args.dir, "*.csv"))):
+        with open(path, newline="") as fh:
+            rows.append((Path(path).stem, list(csv.reader(fh))))
+    assert rows, f"Zero .csv files in the directory '{args.dir}'"
+    with tempfile.TemporaryDirectory() as directory:
+        results = [measure(rows, directory, "none", None)]
+        for entry in args.levels:
+            codec, _, level = entry.partition("=")
+            assert codec in codecs, f"Unknown codec '{codec}'"
+            results.append(
+                measure(rows, directory, codec, int(level) if level else None)
+            )
+    # Throughputs are of the uncompressed data
+    plain = results[0]["bytes"] / 1024**2
+    for result in results:
+        result.update(
+            ratio=round(results[0]["bytes"] / result["bytes"], 2),
+            write_mb_per_s=round(plain / result["write_seconds"], 1),
+            read_mb_per_s=round(plain / result["read_seconds"], 1),
+        )
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Load test of the query API served by `cli.py serve`
+
+Usage:
+    python benchmarks/bench_serve.py movies.db [--clients 32] [--duration 10]
+    python benchmarks/bench_serve.py movies.db --url http://127.0.0.1:8000
+
+Unless `--url` points at a running server, one is started on a free port.
+Every client keeps its connection alive and draws requests from a mix of
+lookups by id and url, filtered listings followed page by page and title
+searches. Latency percentiles and throughput are reported per route and
+overall.
+"""
+
+import os
+import sys
+import time
+import random
+import socket
+import asyncio
+import sqlite3
+import argparse
+import subprocess
+import typing as t
+from pathlib import Path
+from urllib.parse import urlsplit, quote
+
+ROOT = Path(__file__).parents[1]
+
+search_terms = ("love", "war", "man", "night", "dead", "king", "girl", "city")
+
+
+def make_workload(db_path: str, seed: int = 0) -> t.Callable[[], t.Tuple[str, str]]:
+    """Sampler of (route, request target) pairs drawn from the database's movies"""
+    conn = sqlite3.connect(db_path)
+    try:
+        movies = conn.execute("SELECT id, url FROM movie").fetchall()
+        genres = [name for (name,) in conn.execute("SELECT name FROM genre")]
+    finally:
+        conn.close()
+    assert movies, f"No movies in '{db_path}'"
+    rng = random.Random(seed)
+
+    def sample() -> t.Tuple[str, str]:
+        draw = rng.random()
+        id, url = rng.choice(movies)
+        if draw < 0.4:
+            return "id", f"/movies/{id}"
+        if draw < 0.6:
+            return "url", f"/movies?url={quote(url or '', safe='')}"
+        if draw < 0.9:
+            return (
+                "list",
+                f"/movies?genre={rng.choice(genres)}&limit=20"
+                f"&after={rng.randrange(0, id + 1)}",
+            )
+        return "search", f"/search?q={rng.choice(search_terms)}&limit=10"
+
+    return sample
+
+
+async def client(
+    host: str,
+    port: int,
+    sample: t.Callable[[], t.Tuple[str, str]],
+    deadline: float,
+    latencies: t.Dict[str, t.List[float]],
+) -> int:
+    """Issue requests over one kept-alive connection until the deadline
+
+    Returns:
+        int: Responses that weren't 200.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    errors = 0
+    try:
+        while time.perf_counter() < deadline:
+            route, target = sample()
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.setdefault(route, []).append(time.perf_counter() - start)
+            errors += status != 200
+    finally:
+        writer.close()
+    return errors
+
+
+def percentile(values: t.List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def load(
+    host: str, port: int, db_path: str, clients: int, duration: float
+) -> t.Tuple[t.Dict[str, t.List[float]], int, float]:
+    sample = make_workload(db_path)
+    latencies: t.Dict[str, t.List[float]] = {}
+    start = time.perf_counter()
+    errors = await asyncio.gather(
+        *(
+            client(host, port, sample, start + duration, latencies)
+            for _ in range(clients)
+        )
+    )
+    return latencies, sum(errors), time.perf_counter() - start
+
+
+def start_server(db_path: str, args: t.List[str]) -> t.Tuple[subprocess.Popen, int]:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, "cli.py", "serve", db_path, "-p", str(port), *args],
+        cwd=ROOT,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, port
+        except OSError:
+            assert process.poll() is None, "Server exited on startup"
+            time.sleep(0.1)
+    process.kill()
+    raise TimeoutError("Server did not start listening")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[1:]),
+    )
+    parser.add_argument("database", help="Path to the relational database")
+    parser.add_argument("--url", help="Address of a running server to load instead")
+    parser.add_argument(
+        "-c", "--clients", type=int, default=32, help="Concurrent clients - %(default)d"
+    )
+    parser.add_argument(
+        "-d", "--duration", type=float, default=10, help="Seconds - %(default)s"
+    )
+    parser.add_argument(
+        "--pool-size", type=int, default=4, help="Server connections - %(default)d"
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=1024, help="Server cache - %(default)d"
+    )
+    args = parser.parse_args()
+    process = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        process, port = start_server(
+            os.path.abspath(args.database),
+            ["--pool-size", str(args.pool_size), "--cache-size", str(args.cache_size)],
+        )
+        host = "127.0.0.1"
+    try:
+        latencies, errors, elapsed = asyncio.run(
+            load(host, port, args.database, args.clients, args.duration)
+        )
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+    everything = [latency for values in latencies.values() for latency in values]
+    print(f"{'route':<8} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for route, values in sorted(latencies.items()) + [("all", everything)]:
+        print(
+            f"{route:<8} {len(values):>9} {percentile(values, 0.5) * 1000:>8.2f} "
+            f"{percentile(values, 0.99) * 1000:>8.2f}"
+        )
+    print(
+        f"{len(everything) / elapsed:.0f} requests/s over {elapsed:.1f}s "
+        f"with {args.clients} clients, {errors} errors"
+    )
+
+
+if __name__ == "__main__":
+    main()
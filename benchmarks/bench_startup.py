@@ -0,0 +1,104 @@
+"""Cold start of the command line interfaces against a fixed import time budget
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5]
+
+Every invocation is run with `python -X importtime`, the time spent importing
+modules (the interpreter's own startup excluded) is compared to its budget and
+the script exits with status 1, listing the slowest imports, when any is over.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parents[1]
+
+budgets = {
+    ("cli.py", "--help"): 150,
+    ("-m", "data_hunter", "--version"): 60,
+    ("-m", "data_hunter", "--help"): 60,
+}
+"""Milliseconds allowed for imports per invocation"""
+
+heavy_modules = ("pandas", "numpy", "sqlmodel", "sqlalchemy", "fzmovies_api")
+"""Modules none of the invocations above should import"""
+
+
+def import_times(args: tuple) -> tuple[float, list[tuple[float, str]], set[str]]:
+    """Run an invocation once, returning its wall time and the time per import
+
+    Args:
+        args (tuple): Arguments to the interpreter.
+
+    Returns:
+        tuple[float, list[tuple[float, str]], set[str]]: Seconds taken, (cumulative milliseconds, module)
+        of top-level imports and every module imported.
+    """
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join([str(ROOT), *sys.path[1:]])),
+    )
+    elapsed = time.perf_counter() - start
+    assert completed.returncode == 0, completed.stderr
+    imports, modules = [], set()
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        modules.add(module.strip())
+        if cumulative.strip().isdigit() and not module.startswith("  "):
+            imports.append((int(cumulative) / 1000, module.strip()))
+    return elapsed, imports, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=5,
+        help="Runs per invocation, the fastest is kept - %(default)d",
+    )
+    args = parser.parse_args()
+    # Modules imported by a bare interpreter are not ours to budget for
+    _, _, preloaded = import_times(("-c", "pass"))
+    failures = []
+    for invocation, budget in budgets.items():
+        runs = [import_times(invocation) for _ in range(args.runs)]
+        elapsed, imports, modules = min(
+            runs, key=lambda run: sum(ms for ms, _ in run[1])
+        )
+        imports = [entry for entry in imports if entry[1] not in preloaded]
+        total = sum(ms for ms, _ in imports)
+        print(
+            f"{' '.join(invocation):<28} imports {total:>7.1f}ms / {budget}ms "
+            f"- wall {elapsed * 1000:.0f}ms"
+        )
+        heavy = sorted(
+            {module.split(".")[0] for module in modules} & set(heavy_modules)
+        )
+        if total > budget or heavy:
+            failures.append(
+                f"{' '.join(invocation)} - {total:.1f}ms over {budget}ms budget"
+                + (f", imports {', '.join(heavy)}" if heavy else "")
+                + "\n    slowest: "
+                + ", ".join(
+                    f"{module} ({ms:.1f}ms)"
+                    for ms, module in sorted(imports, reverse=True)[:5]
+                )
+            )
+    if failures:
+        print("STARTUP BUDGET EXCEEDED", *failures, sep="\n  ", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Peak memory of streaming vs in-memory `to_format` as the input grows
+
+Usage:
+    python benchmarks/bench_stream_export.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parents[1]))
+
+from benchmarks.synthetic import generate
+
+
+def measure(directory: str, output: str, stream: bool) -> dict:
+    """Run a single export in a fresh interpreter and collect its peak RSS"""
+    code = (
+        "import resource, sys, time\n"
+        "from click.testing import CliRunner\n"
+        "from cli import Utils\n"
+        "start = time.perf_counter()\n"
+        "result = CliRunner().invoke(Utils.to_format, sys.argv[1:])\n"
+        "assert result.exit_code == 0, result.output\n"
+        "print(time.perf_counter() - start, "
+        "resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    )
+    args = [directory, "-o", output, "-f", "csv", "-f", "jsonl", "-f", "markdown"]
+    if stream:
+        args.append("--stream")
+    completed = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parents[1],
+    )
+    elapsed, peak = completed.stdout.split()
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {"seconds": float(elapsed), "peak_rss_mb": int(peak) * unit / 1024**2}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[10_000, 100_000, 500_000]
+    )
+    args = parser.parse_args()
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as dir:
+            generate(os.path.join(dir, "data"), size)
+            output = os.path.join(dir, "movies-data")
+            for stream in (True, False):
+                result = {"rows": size, "stream": stream}
+                result.update(measure(os.path.join(dir, "data"), output, stream))
+                results.append(result)
+                print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
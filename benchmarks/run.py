@@ -0,0 +1,238 @@
+"""Timed, memory-tracked runs of every pipeline stage over synthetic data
+
+Usage:
+    python -m benchmarks.run --rows 100000 --output results.json
+    python -m benchmarks.run --rows 100000 --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --rows 100000 --baseline benchmarks/baseline.json
+
+Each stage runs in a freshly spawned interpreter so that its peak RSS is its
+own. When a baseline is given, stages slower (or hungrier) than the baseline
+by more than the tolerance are reported and the run exits with status 1.
+"""
+
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import multiprocessing
+import typing as t
+from pathlib import Path
+
+ROOT = Path(__file__).parents[1]
+
+
+def bench_hunt(workdir: str, rows: int, latency: float, workers: int):
+    import random
+    from types import SimpleNamespace
+    from unittest import mock
+    from tests.fake_search import make_fake_search
+    from benchmarks.synthetic import make_movie
+    from data_hunter.main import MovieDataHunter
+
+    def synthetic_movie(query, page: int, number: int) -> SimpleNamespace:
+        rng = random.Random(f"{query.category}-{query.name}-{page}-{number}")
+        movie = make_movie(page * 20 + number, rng)
+        return SimpleNamespace(
+            title=movie["title"],
+            year=movie["year"],
+            distribution=movie["distribution"],
+            about=movie["description"],
+            url=movie["url"],
+            cover_photo=movie["cover_photo"],
+        )
+
+    pairs = 2 * 22
+    pages = max(1, rows // (pairs * 20))
+    with mock.patch(
+        "data_hunter.main.Search",
+        make_fake_search(pages, latency=latency, movie=synthetic_movie),
+    ):
+        hunted = MovieDataHunter().hunt(
+            dir=os.path.join(workdir, "hunt"), stream=True, workers=workers
+        )
+        return sum(entry[3] for entry in hunted)
+
+
+def bench_create_db(workdir: str, stream: bool):
+    from click.testing import CliRunner
+    from cli import Utils
+
+    output = os.path.join(workdir, f"create-db-{stream}.db")
+    args = [os.path.join(workdir, "data"), "-o", output]
+    result = CliRunner().invoke(
+        Utils.create_db, args + (["--stream"] if stream else [])
+    )
+    assert result.exit_code == 0, result.output
+    return output
+
+
+def bench_to_format(workdir: str, stream: bool):
+    from click.testing import CliRunner
+    from cli import Utils
+
+    args = [os.path.join(workdir, "data"), "-o", os.path.join(workdir, "export")]
+    args += ["-f", "csv", "-f", "jsonl"] + (["--stream"] if stream else [])
+    result = CliRunner().invoke(Utils.to_format, args)
+    assert result.exit_code == 0, result.output
+
+
+def bench_relate_tables(workdir: str):
+    from cli import DatabaseRelater
+
+    output = os.path.join(workdir, "relational.db")
+    if os.path.exists(output):
+        os.remove(output)
+    return DatabaseRelater.bulk_relate(os.path.join(workdir, "flat.db"), output)
+
+
+def _child(results, function: str, kwargs: t.Dict[str, t.Any]):
+    sys.path.insert(0, str(ROOT))
+    import logging
+
+    logging.disable(logging.INFO)
+    # Imports are not part of the stage being measured
+    import cli, data_hunter.main  # noqa: F401
+
+    start = time.perf_counter()
+    globals()[function](**kwargs)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    unit = 1 if sys.platform == "darwin" else 1024
+    results.put({"seconds": elapsed, "peak_rss_mb": peak * unit / 1024**2})
+
+
+def measure(function: str, **kwargs) -> t.Dict[str, float]:
+    """Run a stage in a fresh interpreter, collecting its duration and peak RSS"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_child, args=(results, function, kwargs))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        raise RuntimeError(f"Benchmark '{function}' failed with {process.exitcode}")
+    return results.get()
+
+
+def run(rows: int, latency: float, workers: int) -> t.Dict[str, t.Any]:
+    """Benchmark every stage over `rows` synthetic movies"""
+    from benchmarks.synthetic import generate
+
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        generate(os.path.join(workdir, "data"), rows)
+        print(f"Generated {rows} rows in {time.perf_counter() - start:.2f}s")
+        os.makedirs(os.path.join(workdir, "hunt"))
+        stages = [
+            ("hunt", "bench_hunt", dict(rows=rows, latency=latency, workers=1)),
+            (
+                f"hunt[workers={workers}]",
+                "bench_hunt",
+                dict(rows=rows, latency=latency, workers=workers),
+            ),
+            ("create_db", "bench_create_db", dict(stream=False)),
+            ("create_db[stream]", "bench_create_db", dict(stream=True)),
+            ("to_format", "bench_to_format", dict(stream=False)),
+            ("to_format[stream]", "bench_to_format", dict(stream=True)),
+            ("relate_tables", "bench_relate_tables", {}),
+        ]
+        benchmarks = {}
+        for name, function, kwargs in stages:
+            if function == "bench_relate_tables":
+                os.replace(
+                    os.path.join(workdir, "create-db-True.db"),
+                    os.path.join(workdir, "flat.db"),
+                )
+            if function == "bench_hunt":
+                for path in glob.glob(os.path.join(workdir, "hunt", "*")):
+                    os.remove(path)
+            benchmarks[name] = measure(function, workdir=workdir, **kwargs)
+            print(
+                f"{name:<24} {benchmarks[name]['seconds']:>9.3f}s "
+                f"{benchmarks[name]['peak_rss_mb']:>9.1f}MB"
+            )
+    return dict(
+        rows=rows,
+        latency=latency,
+        workers=workers,
+        python=platform.python_version(),
+        machine=platform.machine(),
+        benchmarks=benchmarks,
+    )
+
+
+def compare(
+    results: t.Dict[str, t.Any], baseline: t.Dict[str, t.Any], tolerance: float
+) -> t.List[str]:
+    """List the measurements regressing beyond the tolerance"""
+    assert (
+        results["rows"] == baseline["rows"]
+    ), f"Baseline is for {baseline['rows']} rows, not {results['rows']}"
+    regressions = []
+    for name, measurements in results["benchmarks"].items():
+        expected = baseline["benchmarks"].get(name)
+        if expected is None:
+            continue
+        for metric, value in measurements.items():
+            if value > expected[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name} {metric}: {value:.3f} vs baseline {expected[metric]:.3f} "
+                    f"(+{(value / expected[metric] - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[1:]),
+    )
+    parser.add_argument(
+        "-r", "--rows", type=int, default=10_000, help="Synthetic rows - %(default)d"
+    )
+    parser.add_argument(
+        "-l",
+        "--latency",
+        type=float,
+        default=0.01,
+        help="Seconds taken by the fake site to serve a page - %(default)s",
+    )
+    parser.add_argument(
+        "-x",
+        "--workers",
+        type=int,
+        default=8,
+        help="Workers of the concurrent hunt - %(default)d",
+    )
+    parser.add_argument("-o", "--output", help="Path to save the results to")
+    parser.add_argument("-b", "--baseline", help="Path to the baseline to compare with")
+    parser.add_argument("--save-baseline", help="Path to save the results as baseline")
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown relative to the baseline - %(default)s",
+    )
+    args = parser.parse_args()
+    results = run(args.rows, args.latency, args.workers)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as fh:
+                json.dump(results, fh, indent=2)
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(results, json.load(fh), args.tolerance)
+        if regressions:
+            print("REGRESSIONS", *regressions, sep="\n  ", file=sys.stderr)
+            sys.exit(1)
+        print("No regressions against", args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Synthetic movie datasets for benchmarking"""
+
+import csv
+import os
+import random
+import typing as t
+from pathlib import Path
+from data_hunter.constants import available_genres
+from data_hunter.sinks import field_names
+
+words = (
+    "the a an of to in and his her their world city war love family secret "
+    "final journey night dark last return life death young old man woman team "
+    "mission power truth lost story house road heart fire king queen"
+).split()
+
+distributions = ("BluRay", "DVDRip", "WebRip", "HDRip", "CAMRip")
+
+
+def make_movie(number: int, rng: random.Random) -> t.Dict[str, t.Any]:
+    """Build the genre-independent fields of a synthetic movie"""
+    title = " ".join(rng.choice(words) for _ in range(rng.randint(1, 5))).title()
+    title = f"{title} {number}"
+    quoted = title.replace(" ", "%20")
+    # Descriptions on the site range from a sentence up to a long paragraph
+    description = " ".join(rng.choice(words) for _ in range(rng.randint(8, 90)))
+    return dict(
+        category="Bollywood" if rng.random() < 0.2 else "Hollywood",
+        title=title,
+        year=rng.randint(1930, 2024),
+        distribution=rng.choice(distributions),
+        description=description.capitalize() + "...<more>",
+        url=f"https://fzmovies.net/movie-{quoted}--hmp4.htm",
+        cover_photo=f"https://fzmovies.net/imdb_images/{title.replace(' ', '.')}.jpg",
+    )
+
+
+def generate(
+    dir: t.Union[Path, str],
+    rows: int,
+    duplicate_rate: float = 0.9,
+    seed: int = 0,
+) -> t.List[Path]:
+    """Write synthetic genre .csv files shaped like the hunted datasets
+
+    Args:
+        dir (t.Union[Path, str]): Directory to save the .csv files to.
+        rows (int): Total rows across all files.
+        duplicate_rate (float, optional): Ratio of rows repeating a movie already
+            listed under another genre. Defaults to 0.9 (as in the shipped data).
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        t.List[Path]: Paths to the .csv files.
+    """
+    rng = random.Random(seed)
+    os.makedirs(dir, exist_ok=True)
+    paths = [Path(dir, genre.casefold() + ".csv") for genre in available_genres]
+    handles = [open(path, "w", newline="") for path in paths]
+    writers = [csv.DictWriter(fh, fieldnames=field_names) for fh in handles]
+    try:
+        for writer in writers:
+            writer.writeheader()
+        movies: t.List[t.Dict[str, t.Any]] = []
+        for number in range(rows):
+            position = rng.randrange(len(available_genres))
+            if movies and rng.random() < duplicate_rate / (1 + duplicate_rate):
+                movie = rng.choice(movies)
+            else:
+                movie = make_movie(number, rng)
+                if len(movies) < 100_000:
+                    movies.append(movie)
+                else:
+                    movies[rng.randrange(len(movies))] = movie
+            writers[position].writerow(dict(genre=available_genres[position], **movie))
+    finally:
+        for fh in handles:
+            fh.close()
+    return paths
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic genre .csv files shaped like the hunted datasets"
+    )
+    parser.add_argument("dir", help="Directory to save the .csv files to")
+    parser.add_argument(
+        "-r", "--rows", type=int, default=10_000, help="Total rows - %(default)d"
+    )
+    parser.add_argument(
+        "-d",
+        "--duplicate-rate",
+        type=float,
+        default=0.9,
+        help="Ratio of rows repeating a movie listed under another genre - %(default)s",
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+    for path in generate(args.dir, args.rows, args.duplicate_rate, args.seed):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
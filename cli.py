@@ -3,20 +3,15 @@
 import click
 import os
 import sys
-import pandas
-import glob
-import sqlite3
 import logging
-from sqlmodel import (
-    SQLModel,
-    create_engine,
-    Field,
-    Relationship,
-    select,
-    Session,
-    Text,
-    Column,
-)
+import time
+import csv
+from data_hunter.metrics import metrics, profile
+from data_hunter.constants import available_categories, available_genres
+from data_hunter.sinks import field_names
+
+# pandas, sqlmodel and the models are imported by the commands needing them,
+# keeping the startup of every other command (and --help) fast
 
 logging.basicConfig(
     format="%(asctime)s - %(levelname)s : %(message)s",
@@ -27,96 +22,530 @@ logging.basicConfig(
 get_exception_string = lambda e: e.args[1] if e.args and len(e.args) > 1 else str(e)
 """Get the excption message"""
 
+columnar_codecs = {
+    "parquet": ("snappy", "gzip", "brotli", "lz4", "zstd", "uncompressed"),
+    "feather": ("lz4", "zstd", "uncompressed"),
+}
+"""Compression codecs supported by each columnar format"""
+
+
+def iter_csv_chunks(csv_file: str, chunk_size: int):
+    """Read a movies .csv file in chunks of rows ready for insertion
+
+    Args:
+        csv_file (str): Path to the .csv file.
+        chunk_size (int): Rows per chunk.
+
+    Yields:
+        list[tuple]: Rows prefixed with their position in the file.
+    """
+    from data_hunter.compression import open_text
+
+    with open_text(csv_file) as fh:
+        chunk = []
+        for index, row in enumerate(csv.DictReader(fh)):
+            values = [row.get(column) or None for column in field_names]
+            if values[3] and values[3].isdigit():
+                values[3] = int(values[3])
+            chunk.append((index, *values))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def dataset_filters(function):
+    """Options pruning the partitions of a partitioned directory"""
+    for option in reversed(
+        (
+            click.option(
+                "--category",
+                "categories",
+                multiple=True,
+                type=click.Choice(["Hollywood", "Bollywood"]),
+                help="Movie category of a partitioned directory",
+            ),
+            click.option(
+                "-g",
+                "--genre",
+                "genres",
+                multiple=True,
+                help="Movie genre of a partitioned directory",
+            ),
+            click.option(
+                "-y",
+                "--years",
+                type=(int, int),
+                help="Inclusive range of release years of a partitioned directory e.g 2000 2010",
+            ),
+        )
+    ):
+        function = option(function)
+    return function
+
 
-@click.group()
-def data_hunter():
+class LazyGroup(click.Group):
+    """Group resolving its commands from import paths only once they are needed"""
+
+    def __init__(self, *args, lazy_commands: dict[str, str] = {}, **kwargs):
+        """
+
+        Args:
+            lazy_commands (dict[str, str], optional): Command names mapped to `[module:]attribute.path`,
+            attributes without a module being looked up in this one. Defaults to {}.
+        """
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx: click.Context, name: str) -> click.Command | None:
+        if name not in self.commands and name in self.lazy_commands:
+            import importlib
+
+            module, _, path = self.lazy_commands[name].rpartition(":")
+            command = (
+                importlib.import_module(module) if module else sys.modules[__name__]
+            )
+            for attribute in path.split("."):
+                command = getattr(command, attribute)
+            self.add_command(command, name)
+        return super().get_command(ctx, name)
+
+
+@click.group(
+    cls=LazyGroup,
+    lazy_commands={
+        "create-db": "Utils.create_db",
+        "partition": "Utils.partition",
+        "to-format": "Utils.to_format",
+        "relate-tables": "DatabaseRelater.relate_tables",
+        "dedup": "Deduplication.dedup",
+        "compile": "Cache.compile",
+        "stats": "Statistics.stats",
+        "similar": "Similarity.similar",
+        "index": "FullTextSearch.index",
+        "search": "FullTextSearch.search",
+        "serve": "QueryServer.serve",
+    },
+)
+@click.option(
+    "--metrics-file",
+    type=click.Path(dir_okay=False),
+    help="Save per-stage timings and counters, as a Prometheus textfile if it ends with .prom else as JSON",
+)
+@click.option(
+    "--profile",
+    "profiled",
+    is_flag=True,
+    help="Profile the command with cProfile and print the sorted stats",
+)
+@click.pass_context
+def data_hunter(ctx, metrics_file, profiled):
     """Manipulate .csv data generated accordingly"""
+    if metrics_file:
+        metrics.enable()
+        ctx.call_on_close(lambda: metrics.dump(metrics_file))
+    if profiled:
+        ctx.with_resource(profile())
+    ctx.with_resource(metrics.timer(ctx.invoked_subcommand))
 
 
-class MovieGenre(SQLModel, table=True):
-    """Joins Genre and Movies"""
+class DatabaseRelater:
 
-    __tablename__ = "movie_genre"
-    id: int | None = Field(None, primary_key=True)
-    movie_id: int | None = Field(None, foreign_key="movie.id")
-    genre_id: int | None = Field(None, foreign_key="genre.id")
+    @staticmethod
+    def bulk_relate(
+        db_path: str, save_to: str, canonical: dict[str, str] | None = None
+    ) -> dict[str, int]:
+        """Relate the flat movies table using a handful of set-based statements.
 
-    def __repr__(self):
-        return f"<MovieId={self.movie_id}, GenreId={self.genre_id}"
+        The genre and category id maps are preloaded, the source table is read
+        in one pass and movie, genre, category & movie_genre tables are filled
+        with `executemany` batches in a single transaction.
 
+        Args:
+            db_path (str): Path to database with the flat movies table.
+            save_to (str): Path to the relational database.
+            canonical (dict[str, str] | None, optional): Urls of near-duplicates mapped to
+            their canonical movie's url, see `data_hunter.dedup`. Movies are then told
+            apart by url rather than by title, remakes sharing their title. Defaults to None.
 
-class Genre(SQLModel, table=True):
-    """Movie genre"""
+        Returns:
+            dict[str, int]: Rows inserted per table.
+        """
+        import sqlite3
+        from sqlmodel import SQLModel, create_engine
+        from data_hunter.models import relational_tables
 
-    __tablename__ = "genre"
-    id: int | None = Field(None, primary_key=True)
-    name: str | None = Field(None, unique=True)
-    movies: list["Movie"] = Relationship(back_populates="genres", link_model=MovieGenre)
+        SQLModel.metadata.create_all(
+            create_engine(f"sqlite:///{save_to}"), tables=relational_tables
+        )
+        source = sqlite3.connect(db_path)
+        conn = sqlite3.connect(save_to)
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO genre (name) VALUES (?)",
+                    [(genre,) for genre in available_genres],
+                )
+                conn.executemany(
+                    "INSERT INTO category (name) VALUES (?)",
+                    [(category,) for category in sorted(available_categories)],
+                )
+                genre_ids = dict(conn.execute("SELECT name, id FROM genre"))
+                category_ids = dict(conn.execute("SELECT name, id FROM category"))
+                logging.info("Loading movies")
+                started = time.perf_counter()
+                movies: dict[str, tuple] = {}
+                movie_genres: dict[str, dict[int, None]] = {}
+                for (
+                    title,
+                    genre,
+                    year,
+                    category,
+                    distribution,
+                    description,
+                    url,
+                    cover_photo,
+                ) in source.execute(
+                    "SELECT title, genre, year, category, distribution, description, "
+                    "url, cover_photo FROM Movies WHERE title IS NOT NULL ORDER BY rowid"
+                ):
+                    key = title
+                    if canonical is not None and url:
+                        key = canonical.get(url, url)
+                    # The canonical movie's own row wins over its duplicates'
+                    if key not in movies or (url == key != movies[key][4]):
+                        if category not in category_ids:
+                            logging.error(
+                                f"While handling '{title}' - Unknown category '{category}'"
+                            )
+                            continue
+                        movies[key] = (
+                            title,
+                            year,
+                            distribution,
+                            description,
+                            url,
+                            cover_photo,
+                            category_ids[category],
+                        )
+                    if genre in genre_ids:
+                        movie_genres.setdefault(key, {})[genre_ids[genre]] = None
+                logging.info(f"Total titles loaded ({len(movies)})")
+                metrics.observe("read", time.perf_counter() - started)
+                metrics.count("rows", len(movies))
+                started = time.perf_counter()
+                conn.executemany(
+                    "INSERT OR IGNORE INTO movie (title, year, distribution, description, "
+                    "url, cover_photo, category_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    movies.values(),
+                )
+                # Titles are only unique without canonical urls, urls always are
+                movie_ids = {
+                    (title, url): id
+                    for id, title, url in conn.execute(
+                        "SELECT id, title, url FROM movie"
+                    )
+                }
+                if len(movie_ids) < len(movies):
+                    logging.error(
+                        "Skipped %d movies with a missing year or duplicate url"
+                        % (len(movies) - len(movie_ids))
+                    )
+                links = [
+                    (movie_ids[movies[key][0], movies[key][4]], genre_id)
+                    for key, linked_genres in movie_genres.items()
+                    if key in movies and (movies[key][0], movies[key][4]) in movie_ids
+                    for genre_id in linked_genres
+                ]
+                conn.executemany(
+                    "INSERT INTO movie_genre (movie_id, genre_id) VALUES (?, ?)",
+                    links,
+                )
+                # Shared with `incremental_relate`, looks up the genres of a movie
+                conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS ix_movie_genre_pair "
+                    "ON movie_genre (movie_id, genre_id)"
+                )
+                metrics.observe("write", time.perf_counter() - started)
+                logging.info("Committing the changes")
+                started = time.perf_counter()
+            metrics.observe("commit", time.perf_counter() - started)
+        finally:
+            source.close()
+            conn.close()
+        return {
+            "genre": len(genre_ids),
+            "category": len(category_ids),
+            "movie": len(movie_ids),
+            "movie_genre": len(links),
+        }
 
-    def __repr__(self):
-        return self.name
+    changelog = "movies_changelog"
+    """Rowids of the flat movies table's rows changed, logged by triggers"""
 
+    cursor_table = "relate_cursor"
+    """Tracks how far into the flat table's change log an incremental relate went"""
 
-class Category(SQLModel, table=True):
-    """Movie category"""
+    @staticmethod
+    def track_changes(source) -> tuple[str, int]:
+        """Install the triggers logging the rows of the flat movies table
+        inserted, updated or deleted, unless they already are
 
-    __tablename__ = "category"
-    id: int | None = Field(None, primary_key=True)
-    name: str | None = Field(None, unique=True)
-    movies: list["Movie"] = Relationship(
-        back_populates="category", cascade_delete=True, passive_deletes=True
-    )
+        Args:
+            source (sqlite3.Connection): Database with the flat movies table.
 
-    def __repr__(self):
-        return self.name
+        Returns:
+            tuple[str, int]: Identity of the change log, new whenever changes may
+            have gone unlogged, and the last sequence number trimmed from it.
+        """
+        import secrets
 
+        changelog = DatabaseRelater.changelog
+        with source:
+            source.execute(
+                f"CREATE TABLE IF NOT EXISTS {changelog} (seq INTEGER PRIMARY KEY "
+                "AUTOINCREMENT, movie_rowid INTEGER NOT NULL)"
+            )
+            source.execute(
+                f"CREATE TABLE IF NOT EXISTS {changelog}_source (id INTEGER PRIMARY KEY "
+                "CHECK (id = 0), token TEXT NOT NULL, trimmed_seq INTEGER NOT NULL)"
+            )
+            events = {"insert": "NEW", "update": "NEW", "delete": "OLD"}
+            triggers = {
+                name
+                for (name,) in source.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                    "AND tbl_name = 'Movies' COLLATE NOCASE"
+                )
+            }
+            if not triggers >= {f"{changelog}_{event}" for event in events}:
+                # A new or rebuilt table, changed while nothing logged it
+                for event, row in events.items():
+                    source.execute(
+                        f"CREATE TRIGGER IF NOT EXISTS {changelog}_{event} AFTER "
+                        f"{event.upper()} ON Movies BEGIN INSERT INTO {changelog} "
+                        f"(movie_rowid) VALUES ({row}.rowid); END"
+                    )
+                source.execute(
+                    f"INSERT OR REPLACE INTO {changelog}_source VALUES "
+                    f"(0, ?, (SELECT coalesce(max(seq), 0) FROM {changelog}))",
+                    (secrets.token_hex(8),),
+                )
+            return source.execute(
+                f"SELECT token, trimmed_seq FROM {changelog}_source"
+            ).fetchone()
 
-class Movie(SQLModel, table=True):
-    """Movie model"""
+    @staticmethod
+    def incremental_relate(
+        db_path: str, save_to: str, batch_size: int = 5000
+    ) -> dict[str, int]:
+        """Apply only the rows of the flat movies table changed since the last run.
 
-    __tablename__ = "movie"
-    id: int | None = Field(
-        None,
-        primary_key=True,
-    )
-    title: str | None = Field(None, unique=True)
-    year: int
-    distribution: str | None
-    description: str | None = Field(None, sa_column=Column(Text, default=None))
-    url: str | None = Field(None, unique=True)
-    cover_photo: str | None = Field(None)
-    category: Category | None = Relationship(back_populates="movies")
-    genres: list["Genre"] = Relationship(back_populates="movies", link_model=MovieGenre)
-    category_id: int | None = Field(None, foreign_key="category.id")
+        The first run installs triggers logging the rowid of every row of the
+        flat table inserted, updated or deleted from then on. The rows logged
+        past the cursor of the last run are upserted into the movie table,
+        updating existing titles only when their content differs, and their
+        genres linked, so that a run reads only the rows changed. A first run,
+        a flat table rebuilt without the triggers or a log trimmed past the
+        cursor (by the run of another relational database) scans the table in
+        full, though still only changed movies are written. Everything, cursor
+        included, is applied in a single transaction so that reruns after a
+        crash are safe, the log being trimmed once committed.
 
-    def __repr__(self):
-        return f"{self.title} ({self.year})"
+        Args:
+            db_path (str): Path to database with the flat movies table.
+            save_to (str): Path to the relational database, created if missing.
+            batch_size (int, optional): Rows per `executemany` batch. Defaults to 5000.
 
+        Returns:
+            dict[str, int]: Rows scanned in the flat table, movies inserted or updated & genres linked.
+        """
+        import sqlite3
+        from sqlmodel import SQLModel, create_engine
+        from data_hunter.models import relational_tables
 
-class DatabaseRelater:
+        engine = create_engine(f"sqlite:///{save_to}")
+        SQLModel.metadata.create_all(engine, tables=relational_tables)
+        engine.dispose()
+        source = sqlite3.connect(db_path)
+        conn = sqlite3.connect(save_to)
+        changelog = DatabaseRelater.changelog
+        cursor_table = DatabaseRelater.cursor_table
+        try:
+            token, trimmed_seq = DatabaseRelater.track_changes(source)
+            (head,) = source.execute(
+                f"SELECT coalesce(max(seq), 0) FROM {changelog}"
+            ).fetchone()
+            with conn:
+                conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {cursor_table} (id INTEGER PRIMARY KEY "
+                    "CHECK (id = 0), source TEXT NOT NULL, last_seq INTEGER NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS ix_movie_genre_pair "
+                    "ON movie_genre (movie_id, genre_id)"
+                )
+                assert not conn.execute(
+                    "SELECT 1 FROM movie GROUP BY title HAVING count(*) > 1 LIMIT 1"
+                ).fetchone(), f"Movies of '{save_to}' are told apart by url (related with --clusters), not by title"
+                # Movies are upserted by title
+                conn.execute(
+                    "CREATE UNIQUE INDEX IF NOT EXISTS ix_movie_title_unique "
+                    "ON movie (title)"
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO genre (name) VALUES (?)",
+                    [(genre,) for genre in available_genres],
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO category (name) VALUES (?)",
+                    [(category,) for category in sorted(available_categories)],
+                )
+                genre_ids = dict(conn.execute("SELECT name, id FROM genre"))
+                category_ids = dict(conn.execute("SELECT name, id FROM category"))
+                columns = (
+                    "title, genre, year, category, distribution, description, url, "
+                    "cover_photo"
+                )
+                entry = conn.execute(
+                    f"SELECT source, last_seq FROM {cursor_table}"
+                ).fetchone()
+                if entry and entry[0] == token and entry[1] >= trimmed_seq:
+                    logging.info(
+                        "Relating the movies changed since change %d" % entry[1]
+                    )
+                    rows = source.execute(
+                        f"SELECT {columns} FROM Movies WHERE rowid IN (SELECT "
+                        f"movie_rowid FROM {changelog} WHERE seq > ? AND seq <= ?) "
+                        "ORDER BY rowid",
+                        (entry[1], head),
+                    )
+                else:
+                    logging.info(
+                        "Relating every movie%s"
+                        % (" (source changed)" if entry else "")
+                    )
+                    rows = source.execute(
+                        f"SELECT {columns} FROM Movies ORDER BY rowid"
+                    )
+                movies: dict[str, tuple] = {}
+                movie_genres: dict[str, dict[int, None]] = {}
+                scanned = 0
+                for (
+                    title,
+                    genre,
+                    year,
+                    category,
+                    distribution,
+                    description,
+                    url,
+                    cover_photo,
+                ) in rows:
+                    scanned += 1
+                    if title is None:
+                        continue
+                    if title not in movies:
+                        if category not in category_ids:
+                            logging.error(
+                                f"While handling '{title}' - Unknown category '{category}'"
+                            )
+                            continue
+                        movies[title] = (
+                            title,
+                            year,
+                            distribution,
+                            description,
+                            url,
+                            cover_photo,
+                            category_ids[category],
+                        )
+                    if genre in genre_ids:
+                        movie_genres.setdefault(title, {})[genre_ids[genre]] = None
+                logging.info(f"Scanned {scanned} rows, {len(movies)} titles")
+                changes = conn.total_changes
+                rows = list(movies.values())
+                for start in range(0, len(rows), batch_size):
+                    # Existing titles are only rewritten when their content differs,
+                    # and never onto the url of another title
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO movie (title, year, distribution, "
+                        "description, url, cover_photo, category_id) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (title) DO UPDATE SET "
+                        "year = excluded.year, distribution = excluded.distribution, "
+                        "description = excluded.description, url = excluded.url, "
+                        "cover_photo = excluded.cover_photo, "
+                        "category_id = excluded.category_id "
+                        "WHERE (year, distribution, description, url, cover_photo, "
+                        "category_id) IS NOT (excluded.year, excluded.distribution, "
+                        "excluded.description, excluded.url, excluded.cover_photo, "
+                        "excluded.category_id) AND NOT EXISTS (SELECT 1 FROM movie other "
+                        "WHERE other.url = excluded.url AND other.title != excluded.title)",
+                        rows[start : start + batch_size],
+                    )
+                upserted = conn.total_changes - changes
+                changes = conn.total_changes
+                links = [
+                    (genre_id, title)
+                    for title, linked_genres in movie_genres.items()
+                    for genre_id in linked_genres
+                ]
+                for start in range(0, len(links), batch_size):
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO movie_genre (movie_id, genre_id) "
+                        "SELECT id, ? FROM movie WHERE title = ?",
+                        links[start : start + batch_size],
+                    )
+                linked = conn.total_changes - changes
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {cursor_table} (id, source, last_seq) "
+                    "VALUES (0, ?, ?)",
+                    (token, head),
+                )
+                logging.info("Committing the changes")
+            with source:
+                source.execute(f"DELETE FROM {changelog} WHERE seq <= ?", (head,))
+                source.execute(
+                    f"UPDATE {changelog}_source SET trimmed_seq = max(trimmed_seq, ?)",
+                    (head,),
+                )
+        finally:
+            source.close()
+            conn.close()
+        return {"scanned": scanned, "movie": upserted, "movie_genre": linked}
 
     @staticmethod
-    @click.command()
-    @click.argument(
-        "db_path", type=click.Path(exists=True, dir_okay=False), metavar="INPUT"
-    )
-    @click.argument(
-        "save_to",
-        type=click.Path(dir_okay=False),
-        metavar="OUTPUT",
-    )
-    def relate_tables(db_path, save_to):
-        """Recreate a relational-based database, relating movie, genre and category tables"""
+    def orm_relate(db_path: str, save_to: str) -> dict[str, int]:
+        """Relate the flat movies table one title at a time through the ORM.
+
+        Args:
+            db_path (str): Path to database with the flat movies table.
+            save_to (str): Path to the relational database.
+
+        Returns:
+            dict[str, int]: Rows inserted per table.
+        """
+        import sqlite3
+        from sqlmodel import SQLModel, create_engine, select, Session, func
+        from data_hunter.models import (
+            Movie,
+            Genre,
+            Category,
+            MovieGenre,
+            relational_tables,
+        )
+
         new_engine = create_engine(f"sqlite:///{save_to}")
-        logging.info("Creating tables")
-        SQLModel.metadata.create_all(new_engine)
-        from fzmovies_api.filters import MovieGenreFilter
+        SQLModel.metadata.create_all(new_engine, tables=relational_tables)
 
         with Session(new_engine) as session:
             # Let's insert all the genres & categories available to db
-            for genre in MovieGenreFilter.available_genres:
+            for genre in available_genres:
                 session.add(Genre(name=genre))
-            for category in ["Bollywood", "Hollywood"]:
+            for category in sorted(available_categories):
                 session.add(Category(name=category))
             session.commit()
             conn = sqlite3.connect(db_path)
@@ -142,7 +571,7 @@ class DatabaseRelater:
             ) as progress:
                 for title in progress:
                     cursor.execute(
-                        f'SELECT DISTINCT genre FROM Movies WHERE title="{title}"'
+                        "SELECT DISTINCT genre FROM Movies WHERE title=?", (title,)
                     )
                     genres: list[Genre] = [
                         session.exec(
@@ -153,7 +582,8 @@ class DatabaseRelater:
                     cursor.execute(
                         "SELECT year, category,  distribution, description, url, "
                         " cover_photo FROM Movies "
-                        f'WHERE Title="{title}" LIMIT 1',
+                        "WHERE Title=? ORDER BY rowid LIMIT 1",
+                        (title,),
                     )
                     try:
                         year, category, distribution, description, url, cover_photo = (
@@ -177,6 +607,137 @@ class DatabaseRelater:
             logging.info("Committing the changes")
             cursor.close()
             session.commit()
+            return {
+                table: session.exec(select(func.count()).select_from(model)).one()
+                for table, model in (
+                    ("genre", Genre),
+                    ("category", Category),
+                    ("movie", Movie),
+                    ("movie_genre", MovieGenre),
+                )
+            }
+
+    @staticmethod
+    @click.command()
+    @click.argument(
+        "db_path", type=click.Path(exists=True, dir_okay=False), metavar="INPUT"
+    )
+    @click.argument(
+        "save_to",
+        type=click.Path(dir_okay=False),
+        metavar="OUTPUT",
+    )
+    @click.option(
+        "-e",
+        "--engine",
+        help="Relating engine, set-based bulk statements or per-title ORM - bulk",
+        default="bulk",
+        type=click.Choice(["bulk", "orm"]),
+    )
+    @click.option(
+        "-i",
+        "--incremental",
+        is_flag=True,
+        help="Apply only the rows changed since the last run to an existing OUTPUT",
+    )
+    @click.option(
+        "-d",
+        "--clusters",
+        type=click.Path(exists=True, dir_okay=False),
+        help="Report of `dedup` whose near-duplicates are merged into their canonical movie",
+    )
+    def relate_tables(db_path, save_to, engine, incremental, clusters):
+        """Recreate a relational-based database, relating movie, genre and category tables"""
+        assert not clusters or (
+            engine == "bulk" and not incremental
+        ), "Near-duplicate clusters are only merged by the bulk engine, without --incremental"
+        logging.info("Creating tables")
+        start = time.perf_counter()
+        if incremental:
+            relate = DatabaseRelater.incremental_relate
+        elif clusters:
+            import json
+            from functools import partial
+            from data_hunter.dedup import canonical_urls
+
+            with open(clusters) as fh:
+                canonical = canonical_urls(json.load(fh))
+            logging.info("Merging %d near-duplicate movies" % len(canonical))
+            relate = partial(DatabaseRelater.bulk_relate, canonical=canonical)
+        else:
+            relate = (
+                DatabaseRelater.bulk_relate
+                if engine == "bulk"
+                else DatabaseRelater.orm_relate
+            )
+        counts = relate(db_path, save_to)
+        elapsed = time.perf_counter() - start
+        logging.info(
+            "Related %d rows (%s) in %.2fs - %.0f rows/s"
+            % (
+                sum(counts.values()),
+                ", ".join(f"{table}={count}" for table, count in counts.items()),
+                elapsed,
+                sum(counts.values()) / elapsed if elapsed else 0,
+            )
+        )
+
+
+class Deduplication:
+    """Near-duplicate movies of a flat database"""
+
+    @staticmethod
+    @click.command()
+    @click.argument(
+        "db_path", type=click.Path(exists=True, dir_okay=False), metavar="DATABASE"
+    )
+    @click.option(
+        "-o",
+        "--output",
+        type=click.Path(dir_okay=False),
+        help="Path to save the clusters report to",
+        default="duplicates.json",
+    )
+    @click.option(
+        "-t",
+        "--threshold",
+        type=click.FloatRange(0, 1, min_open=True),
+        help="Estimated Jaccard similarity from which movies are duplicates - 0.6",
+        default=0.6,
+    )
+    @click.option(
+        "--num-perm",
+        type=click.IntRange(1),
+        help="Hash functions per MinHash signature - 128",
+        default=128,
+    )
+    @click.option(
+        "--bands",
+        type=click.IntRange(1),
+        help="LSH bands the signatures are split into - 32",
+        default=32,
+    )
+    def dedup(db_path, output, threshold, num_perm, bands):
+        """Cluster the near-duplicate movies of the flat DATABASE made by create-db"""
+        import json
+        from data_hunter.dedup import find_duplicates
+
+        start = time.perf_counter()
+        with metrics.timer("transform"):
+            clusters = find_duplicates(
+                db_path, num_perm=num_perm, bands=bands, threshold=threshold
+            )
+        with open(output, "w") as fh:
+            json.dump(clusters, fh, indent=2)
+        logging.info(
+            "Found %d clusters of %d near-duplicate movies in %.2fs, saved to %s"
+            % (
+                len(clusters),
+                sum(len(cluster["members"]) for cluster in clusters),
+                time.perf_counter() - start,
+                output,
+            )
+        )
 
 
 class Utils:
@@ -198,23 +759,248 @@ class Utils:
         help="Pattern for the .csv filename",
         default="*",
     )
-    def create_db(directory, output, pattern):
+    @click.option(
+        "-s",
+        "--stream",
+        is_flag=True,
+        help="Stream the .csv files into the database in chunks, in one transaction",
+    )
+    @click.option(
+        "-c",
+        "--chunk-size",
+        type=click.IntRange(1),
+        help="Rows per chunk when streaming - 5000",
+        default=5000,
+    )
+    @click.option(
+        "-j",
+        "--jobs",
+        type=click.IntRange(1),
+        help="Number of .csv files to parse in parallel - 1",
+        default=1,
+    )
+    @click.option(
+        "--journal-mode",
+        type=click.Choice(["delete", "truncate", "persist", "memory", "wal", "off"]),
+        help="SQLite journal mode when streaming - memory",
+        default="memory",
+    )
+    @click.option(
+        "--synchronous",
+        type=click.Choice(["off", "normal", "full", "extra"]),
+        help="SQLite synchronous mode when streaming - off",
+        default="off",
+    )
+    @click.option(
+        "--delta",
+        type=click.Path(exists=True, dir_okay=False),
+        help="Apply only the rows added, removed and modified by a refreshing hunt, "
+        "as saved to its delta.json, to an existing OUTPUT",
+    )
+    @dataset_filters
+    def create_db(
+        directory,
+        output,
+        pattern,
+        stream,
+        chunk_size,
+        jobs,
+        journal_mode,
+        synchronous,
+        delta,
+        categories,
+        genres,
+        years,
+    ):
         """Save all the movie data to a sqlite3 database under movies table"""
         import sqlite3
 
-        csv_filenames = glob.glob(os.path.join(directory, pattern + ".csv"))
-        assert (
-            csv_filenames
-        ), f"Zero files matched the pattern '{pattern}' in the directory '{directory}'"
+        if delta:
+            import json
+
+            with open(delta) as fh:
+                changes = Utils.apply_delta(json.load(fh), output)
+            logging.info(
+                "Applied %(added)d added, %(removed)d removed & %(modified)d modified "
+                "movie data to %(output)s" % dict(changes, output=output)
+            )
+            return
+        csv_filenames = Utils.find_csv_files(
+            directory, pattern, categories, genres, years
+        )
+        if stream:
+            Utils.stream_to_db(
+                csv_filenames, output, chunk_size, jobs, journal_mode, synchronous
+            )
+            return
         conn = sqlite3.connect(output)
-        for csv_file in csv_filenames:
-            df = pandas.read_csv(csv_file)
+        for csv_file, df in Utils.read_csv_files(csv_filenames, jobs):
             logging.info("Handling %d movie data from %s" % (len(df), csv_file))
-            df.to_sql(name="Movies", con=conn, if_exists="append")
+            with metrics.timer("write"):
+                df.to_sql(name="Movies", con=conn, if_exists="append")
+            metrics.count("rows", len(df))
         cursor = conn.cursor()
         cursor.execute("select count(title) from movies")
         logging.info(f"Total entries in the table movies - {cursor.fetchone()[0]}")
 
+    @staticmethod
+    def apply_delta(delta: dict, output: str) -> dict[str, int]:
+        """Apply a refreshing hunt's delta to the movies table, in one transaction.
+
+        Removed and modified rows are deleted by genre and url, added and
+        modified ones appended with rowids above the last one before deleting, for
+        `relate-tables --incremental` to pick them up.
+
+        Args:
+            delta (dict): Rows `added`, `removed` & `modified`, see `data_hunter.delta`.
+            output (str): Path to the sqlite3 database made by `create-db`.
+
+        Returns:
+            dict[str, int]: Rows applied per change.
+        """
+        import sqlite3
+
+        assert os.path.exists(
+            output
+        ), f"No database to apply the delta to at '{output}'"
+        conn = sqlite3.connect(output)
+        try:
+            with conn:
+                # Without AUTOINCREMENT sqlite3 reuses the rowids of rows deleted
+                # at the end of the table, appended rows are kept after them
+                (rowid,) = conn.execute('SELECT max(rowid) FROM "Movies"').fetchone()
+                rowid = rowid or 0
+                conn.executemany(
+                    'DELETE FROM "Movies" WHERE genre = ? AND url = ?',
+                    [
+                        (row["genre"], row["url"])
+                        for row in delta["removed"] + delta["modified"]
+                    ],
+                )
+                indexes = dict(
+                    conn.execute(
+                        'SELECT genre, max("index") + 1 FROM "Movies" GROUP BY genre'
+                    )
+                )
+                rows = []
+                for row in delta["added"] + delta["modified"]:
+                    values = [row.get(column) or None for column in field_names]
+                    if values[3] and values[3].isdigit():
+                        values[3] = int(values[3])
+                    index = indexes.get(row["genre"]) or 0
+                    indexes[row["genre"]] = index + 1
+                    rowid += 1
+                    rows.append((rowid, index, *values))
+                conn.executemany(
+                    'INSERT INTO "Movies" (rowid, "index", {}) '
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)".format(
+                        ", ".join(field_names)
+                    ),
+                    rows,
+                )
+        finally:
+            conn.close()
+        metrics.count("rows", len(rows))
+        return {
+            change: len(delta[change]) for change in ("added", "removed", "modified")
+        }
+
+    @staticmethod
+    def stream_to_db(
+        csv_filenames: list[str],
+        output: str,
+        chunk_size: int = 5000,
+        jobs: int = 1,
+        journal_mode: str = "memory",
+        synchronous: str = "off",
+    ) -> int:
+        """Stream .csv files into the movies table in chunks within a single transaction
+
+        Args:
+            csv_filenames (list[str]): Paths to the .csv files.
+            output (str): Path to the sqlite3 database.
+            chunk_size (int, optional): Rows per `executemany` batch. Defaults to 5000.
+            jobs (int, optional): Number of .csv files to parse in parallel. Defaults to 1.
+            journal_mode (str, optional): SQLite journal mode. Defaults to "memory".
+            synchronous (str, optional): SQLite synchronous mode. Defaults to "off".
+
+        Returns:
+            int: Total rows inserted.
+        """
+        import sqlite3
+        import resource
+
+        start = time.perf_counter()
+        conn = sqlite3.connect(output, isolation_level=None)
+        conn.execute(f"PRAGMA journal_mode={journal_mode}")
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+        if jobs > 1:
+            from data_hunter.loader import load_rows
+
+            chunks = (
+                (csv_file, rows[start : start + chunk_size])
+                for csv_file, rows in load_rows(csv_filenames, jobs)
+                for start in range(0, len(rows), chunk_size)
+            )
+        else:
+            chunks = (
+                (csv_file, chunk)
+                for csv_file in csv_filenames
+                for chunk in iter_csv_chunks(csv_file, chunk_size)
+            )
+        total = 0
+        try:
+            conn.execute("BEGIN")
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS "Movies" ("index" INTEGER, genre TEXT, '
+                "category TEXT, title TEXT, year INTEGER, distribution TEXT, "
+                "description TEXT, url TEXT, cover_photo TEXT)"
+            )
+            while True:
+                with metrics.timer("read"):
+                    csv_file, chunk = next(chunks, (None, None))
+                if chunk is None:
+                    break
+                with metrics.timer("write"):
+                    conn.executemany(
+                        'INSERT INTO "Movies" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        chunk,
+                    )
+                total += len(chunk)
+                metrics.count("rows", len(chunk))
+                logging.debug("Handling %d movie data from %s" % (len(chunk), csv_file))
+            logging.info("Building indexes")
+            with metrics.timer("commit"):
+                for column in ("index", "title", "url", "genre", "category"):
+                    conn.execute(
+                        f'CREATE INDEX IF NOT EXISTS "ix_Movies_{column}" '
+                        f'ON "Movies" ("{column}")'
+                    )
+                conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        elapsed = time.perf_counter() - start
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        children_usage = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        unit = 1 if sys.platform == "darwin" else 1024
+        logging.info(
+            "Ingested %d movie data from %d files in %.2fs (%.0f rows/s) - "
+            "peak RSS %.1f MB (workers %.1f MB)"
+            % (
+                total,
+                len(csv_filenames),
+                elapsed,
+                total / elapsed if elapsed else 0,
+                usage * unit / 1024**2,
+                children_usage * unit / 1024**2,
+            )
+        )
+        return total
+
     @staticmethod
     @click.command()
     @click.argument("Directory", type=click.Path(exists=True, file_okay=False))
@@ -224,7 +1010,19 @@ class Utils:
         multiple=True,
         help="Targeted export format - csv",
         default=["csv"],
-        type=click.Choice(["json", "excel", "html", "pickle", "markdown", "csv"]),
+        type=click.Choice(
+            [
+                "json",
+                "jsonl",
+                "excel",
+                "html",
+                "pickle",
+                "markdown",
+                "csv",
+                "parquet",
+                "feather",
+            ]
+        ),
     )
     @click.option(
         "-o",
@@ -239,15 +1037,72 @@ class Utils:
         help="Pattern for the .csv filename",
         default="*",
     )
-    def to_format(directory, formats, output, pattern):
+    @click.option(
+        "-c",
+        "--compression",
+        help="Compression codec for parquet and feather (lz4, zstd & uncompressed only) formats - writer's default",
+        type=click.Choice(columnar_codecs["parquet"]),
+    )
+    @click.option(
+        "-s",
+        "--stream",
+        is_flag=True,
+        help="Stream row-oriented formats (csv, jsonl, markdown, html) with flat memory usage, markdown columns are not padded",
+    )
+    @click.option(
+        "-j",
+        "--jobs",
+        type=click.IntRange(1),
+        help="Number of .csv files to load in parallel - 1",
+        default=1,
+    )
+    @dataset_filters
+    def to_format(
+        directory,
+        formats,
+        output,
+        pattern,
+        compression,
+        stream,
+        jobs,
+        categories,
+        genres,
+        years,
+    ):
         """Export contents of .csv file to various formats"""
-        csv_filenames = glob.glob(os.path.join(directory, pattern + ".csv"))
-        assert (
-            csv_filenames
-        ), f"Zero files matched the pattern '{pattern}' in the directory '{directory}'"
+        for format in formats:
+            if compression and compression not in columnar_codecs.get(
+                format, (compression,)
+            ):
+                raise click.BadParameter(
+                    f"'{compression}' is not supported by the {format} format, "
+                    f"choose from {', '.join(columnar_codecs[format])}",
+                    param_hint="'-c' / '--compression'",
+                )
+        csv_filenames = Utils.find_csv_files(
+            directory, pattern, categories, genres, years
+        )
+        formats = list(dict.fromkeys(formats))
+        if stream:
+            from data_hunter.exporters import row_writers, stream_export
+
+            streamed = [format for format in formats if format in row_writers]
+            for format, saved_to in stream_export(
+                csv_filenames, streamed, output
+            ).items():
+                logging.info(f"Movies data (%s) saved to %s" % (format, saved_to))
+            formats = [format for format in formats if format not in streamed]
+            if not formats:
+                return
         format_info = {
             "csv": {"write_mode": "w", "function": "to_csv", "extension": "csv"},
             "json": {"write_mode": "w", "function": "to_json", "extension": "json"},
+            "jsonl": {
+                "write_mode": "w",
+                "function": "to_json",
+                "extension": "jsonl",
+                "kwargs": {"orient": "records", "lines": True},
+            },
             "excel": {"write_mode": "wb", "function": "to_excel", "extension": "xlsx"},
             "html": {"write_mode": "w", "function": "to_html", "extension": "html"},
             "pickle": {"write_mode": "wb", "function": "to_pickle", "extension": "pkl"},
@@ -256,28 +1111,518 @@ class Utils:
                 "function": "to_markdown",
                 "extension": "md",
             },
+            "parquet": {
+                "write_mode": "wb",
+                "function": "to_parquet",
+                "extension": "parquet",
+                "columnar": True,
+            },
+            "feather": {
+                "write_mode": "wb",
+                "function": "to_feather",
+                "extension": "feather",
+                "columnar": True,
+            },
         }
+        new_df = Utils.load_dataset(csv_filenames, jobs)
+        metrics.count("rows", len(new_df))
         for format in formats:
             format_details = format_info[format]
             saved_to = output + "." + format_details["extension"]
-            df_list = []
-            for csv_file in csv_filenames:
-                df = pandas.read_csv(csv_file)
-                df_list.append(df)
-                logging.info("Handling %d movie data from %s" % (len(df), csv_file))
-            new_df = pandas.concat(df_list)
-            with open(saved_to, format_details["write_mode"]) as fh:
+            kwargs = dict(format_details.get("kwargs", {}))
+            if format_details.get("columnar"):
+                if compression:
+                    kwargs["compression"] = (
+                        None
+                        if compression == "uncompressed" and format == "parquet"
+                        else compression
+                    )
+            with metrics.timer("write"), open(
+                saved_to, format_details["write_mode"]
+            ) as fh:
                 handler_func = getattr(new_df, format_details["function"])
-                handler_func(fh)
+                handler_func(fh, **kwargs)
 
             logging.info(f"Movies data (%s) saved to %s" % (format, saved_to))
 
+    @staticmethod
+    def load_dataset(csv_filenames: list[str], jobs: int = 1) -> "pandas.DataFrame":
+        """Load the .csv files once into a single frame with compact dtypes
+
+        Args:
+            csv_filenames (list[str]): Paths to the .csv files.
+            jobs (int, optional): Number of .csv files to load in parallel. Defaults to 1.
 
-def entry_point():
-    data_hunter.add_command(Utils.create_db)
-    data_hunter.add_command(Utils.to_format)
-    data_hunter.add_command(DatabaseRelater.relate_tables)
+        Returns:
+            pandas.DataFrame: Categorical genre, category & distribution and integer year.
+        """
+        import pandas
+
+        df_list = []
+        for csv_file, df in Utils.read_csv_files(csv_filenames, jobs):
+            df_list.append(df)
+            logging.info("Handling %d movie data from %s" % (len(df), csv_file))
+        return pandas.concat(df_list, ignore_index=True).astype(
+            {
+                "genre": "category",
+                "category": "category",
+                "distribution": "category",
+                "year": "Int64",
+            }
+        )
+
+    @staticmethod
+    def find_csv_files(
+        directory: str,
+        pattern: str = "*",
+        categories: tuple[str] = (),
+        genres: tuple[str] = (),
+        years: tuple[int, int] | None = None,
+    ) -> list[str]:
+        """Paths to the .csv files of a directory, per genre or partitioned, gzip
+        or zstd compressed shards included.
+
+        The partitions of a partitioned directory are pruned through its
+        manifests (one per datasets filename prefix), largest first.
+
+        Args:
+            directory (str): Directory of the .csv files.
+            pattern (str, optional): Pattern for the .csv filename. Defaults to "*".
+            categories (tuple[str], optional): Movie categories of the partitions. Defaults to ().
+            genres (tuple[str], optional): Movie genres of the partitions. Defaults to ().
+            years (tuple[int, int] | None, optional): Inclusive range of years of the partitions. Defaults to None.
+
+        Returns:
+            list[str]: Paths to the .csv files.
+        """
+        from data_hunter.compression import find_csv_files
+        from data_hunter.partitions import PartitionManifest
+
+        manifests = PartitionManifest.find(directory)
+        if manifests:
+            partitions = sorted(
+                (
+                    (partition["bytes"], str(manifest.dir / partition["path"]))
+                    for manifest in manifests
+                    for partition in manifest.select(categories, genres, years, pattern)
+                ),
+                key=lambda entry: -entry[0],
+            )
+            csv_filenames = [path for _, path in partitions]
+            logging.info(
+                "Selected %d partitions from %s" % (len(csv_filenames), directory)
+            )
+            return csv_filenames
+        assert not (
+            categories or genres or years
+        ), f"Filtering by category, genre or years requires a partitioned directory, not '{directory}'"
+        csv_filenames = find_csv_files(directory, pattern)
+        assert (
+            csv_filenames
+        ), f"Zero files matched the pattern '{pattern}' in the directory '{directory}'"
+        return csv_filenames
+
+    @staticmethod
+    def read_csv_files(csv_filenames: list[str], jobs: int = 1):
+        """Read .csv files into frames, on a process pool when `jobs` > 1
+
+        Args:
+            csv_filenames (list[str]): Paths to the .csv files.
+            jobs (int, optional): Number of .csv files to read in parallel. Defaults to 1.
+
+        Yields:
+            tuple[str, pandas.DataFrame]: Path & contents of every file, in order.
+        """
+        import pandas
+
+        if jobs == 1 or len(csv_filenames) < 2:
+            for csv_file in csv_filenames:
+                with metrics.timer("read"):
+                    df = pandas.read_csv(csv_file)
+                yield csv_file, df
+            return
+        from data_hunter.loader import load_frames
+
+        frames = load_frames(csv_filenames, jobs)
+        while True:
+            with metrics.timer("read"):
+                csv_file, df = next(frames, (None, None))
+            if df is None:
+                return
+            yield csv_file, df
+
+    @staticmethod
+    @click.command()
+    @click.argument("Directory", type=click.Path(exists=True, file_okay=False))
+    @click.option(
+        "-o",
+        "--output",
+        type=click.Path(file_okay=False),
+        help="Directory to save the partitions to",
+        default="movies-partitioned",
+    )
+    @click.option(
+        "-p",
+        "--pattern",
+        help="Pattern for the .csv filename",
+        default="*",
+    )
+    @click.option(
+        "-w",
+        "--overwrite",
+        is_flag=True,
+        help="Replace the partitions already in the output directory",
+    )
+    def partition(directory, output, pattern, overwrite):
+        """Partition the .csv files by category and year, with a manifest"""
+        from data_hunter.partitions import partition
+
+        csv_filenames = Utils.find_csv_files(directory, pattern)
+        os.makedirs(output, exist_ok=True)
+        start = time.perf_counter()
+        manifest = partition(csv_filenames, output, overwrite=overwrite)
+        logging.info(
+            "Partitioned %d movies into %d partitions at %s in %.2fs"
+            % (
+                sum(entry["rows"] for entry in manifest.partitions.values()),
+                len(manifest.partitions),
+                output,
+                time.perf_counter() - start,
+            )
+        )
+
+
+class Cache:
+    """Binary cache of the .csv files"""
+
+    @staticmethod
+    @click.command()
+    @click.argument("Directory", type=click.Path(exists=True, file_okay=False))
+    @click.option(
+        "-p",
+        "--pattern",
+        help="Pattern for the .csv filename",
+        default="*",
+    )
+    @click.option(
+        "-c",
+        "--cache-dir",
+        type=click.Path(file_okay=False),
+        help="Where to keep the cache - $directory/.movies-cache",
+    )
+    @click.option(
+        "-f",
+        "--force",
+        is_flag=True,
+        help="Recompile even when the cache is in sync with the .csv files",
+    )
+    def compile(directory, pattern, cache_dir, force):
+        """Compile the .csv files into a memory-mapped binary cache"""
+        from data_hunter.binary_cache import DatasetCache
+
+        cache = DatasetCache(directory, pattern, cache_dir)
+        if not force and cache.is_fresh():
+            logging.info(f"Cache at {cache.cache_dir} is up to date")
+            return
+        start = time.perf_counter()
+        manifest = cache.compile()
+        logging.info(
+            "Compiled %d movies from %d files to %s in %.2fs"
+            % (
+                manifest["rows"],
+                len(manifest["sources"]),
+                cache.cache_dir,
+                time.perf_counter() - start,
+            )
+        )
+
+
+class Statistics:
+    """Aggregates of the .csv files"""
+
+    @staticmethod
+    @click.command()
+    @click.argument("Directory", type=click.Path(exists=True, file_okay=False))
+    @click.option(
+        "-p",
+        "--pattern",
+        help="Pattern for the .csv filename",
+        default="*",
+    )
+    @dataset_filters
+    @click.option(
+        "-o",
+        "--output",
+        type=click.Path(dir_okay=False),
+        help="Path to save the statistics to as JSON - stdout",
+    )
+    @click.option(
+        "-f",
+        "--force",
+        is_flag=True,
+        help="Read every file again instead of the cached aggregates of unchanged ones",
+    )
+    def stats(directory, pattern, categories, genres, years, output, force):
+        """Counts per genre, category, year & distribution, genre overlap,
+        description lengths and duplicate urls of the .csv files"""
+        import json
+        from data_hunter.stats import DatasetStats
+
+        start = time.perf_counter()
+        dataset_stats = DatasetStats(
+            Utils.find_csv_files(directory, pattern, categories, genres, years),
+            os.path.join(directory, ".movies-cache", "stats.json"),
+        )
+        with metrics.timer("read"):
+            computed = dataset_stats.compute(force=force)
+        metrics.count("rows", computed["rows"])
+        if output:
+            with open(output, "w") as fh:
+                json.dump(computed, fh, indent=2)
+        else:
+            click.echo(json.dumps(computed, indent=2))
+        logging.info(
+            "Computed statistics of %d movies in %.2fs, %d of %d files read"
+            % (
+                computed["rows"],
+                time.perf_counter() - start,
+                len(dataset_stats.recomputed),
+                computed["files"],
+            )
+        )
+
+
+class Similarity:
+    """Similar movies by TF-IDF over titles and descriptions"""
+
+    @staticmethod
+    @click.command()
+    @click.argument("Directory", type=click.Path(exists=True, file_okay=False))
+    @click.argument("urls", nargs=-1)
+    @click.option(
+        "-p",
+        "--pattern",
+        help="Pattern for the .csv filename",
+        default="*",
+    )
+    @click.option(
+        "-k",
+        "--top",
+        type=click.IntRange(1),
+        help="Neighbours per movie - 10",
+        default=10,
+    )
+    @click.option(
+        "-g", "--genre", "genres", multiple=True, help="Genre of the neighbours"
+    )
+    @click.option(
+        "-c",
+        "--category",
+        "categories",
+        multiple=True,
+        type=click.Choice(["Hollywood", "Bollywood"]),
+        help="Category of the neighbours",
+    )
+    @click.option(
+        "-o",
+        "--output",
+        type=click.Path(dir_okay=False),
+        help="Path to save the neighbours to as .csv - stdout",
+    )
+    @click.option(
+        "-r",
+        "--rebuild",
+        is_flag=True,
+        help="Build the index afresh instead of adding new movies only",
+    )
+    def similar(directory, urls, pattern, top, genres, categories, output, rebuild):
+        """Find the movies most similar to those at URLS, or to every movie"""
+        import shutil
+        from contextlib import nullcontext
+        from data_hunter.dataset import MovieDataset
+        from data_hunter.similarity import SimilarityIndex
 
+        start = time.perf_counter()
+        if rebuild:
+            shutil.rmtree(
+                SimilarityIndex.in_dir(directory, pattern).index_dir, ignore_errors=True
+            )
+        index = SimilarityIndex.in_dir(directory, pattern)
+        with metrics.timer("read"):
+            dataset = MovieDataset.from_cache(directory, pattern)
+        added = index.add(dataset)
+        if added:
+            with metrics.timer("write"):
+                index.save()
+            logging.info("Indexed %d movies to %s" % (added, index.index_dir))
+        missing = [url for url in urls if url not in index.positions]
+        assert not missing, f"Movies not found in '{directory}' - {missing}"
+        positions = [index.positions[url] for url in urls] if urls else None
+        with metrics.timer("transform"):
+            neighbours, scores = index.neighbours(
+                positions, top, genres=genres, categories=categories
+            )
+        with open(output, "w", newline="") if output else nullcontext(sys.stdout) as fh:
+            writer = csv.writer(fh)
+            writer.writerow(
+                ["url", "title", "rank", "similar_url", "similar_title", "score"]
+            )
+            for position, row, row_scores in zip(
+                positions or range(len(index)), neighbours, scores
+            ):
+                for rank, (neighbour, score) in enumerate(zip(row, row_scores), 1):
+                    if neighbour < 0:
+                        break
+                    writer.writerow(
+                        [
+                            index.urls[position],
+                            index.titles[position],
+                            rank,
+                            index.urls[neighbour],
+                            index.titles[neighbour],
+                            round(float(score), 4),
+                        ]
+                    )
+        logging.info(
+            "Found the neighbours of %d movies in %.2fs"
+            % (len(neighbours), time.perf_counter() - start)
+        )
+
+
+class FullTextSearch:
+    """Full-text search over movie titles and descriptions"""
+
+    @staticmethod
+    @click.command()
+    @click.argument(
+        "db_path", type=click.Path(exists=True, dir_okay=False), metavar="DATABASE"
+    )
+    @click.option(
+        "-r",
+        "--rebuild",
+        is_flag=True,
+        help="Drop the index and build it afresh instead of indexing new and changed rows only",
+    )
+    def index(db_path, rebuild):
+        """Build or update the FTS5 index of a flat or relational database"""
+        from data_hunter.search_index import SearchIndex
+
+        start = time.perf_counter()
+        with SearchIndex(db_path) as search_index:
+            indexed = search_index.update(rebuild=rebuild)
+        logging.info(
+            "Indexed %d movies in %.2fs" % (indexed, time.perf_counter() - start)
+        )
+
+    @staticmethod
+    @click.command()
+    @click.argument(
+        "db_path", type=click.Path(exists=True, dir_okay=False), metavar="DATABASE"
+    )
+    @click.argument("query", nargs=-1, required=True)
+    @click.option("-g", "--genre", "genres", multiple=True, help="Movie genre")
+    @click.option(
+        "-c",
+        "--category",
+        "categories",
+        multiple=True,
+        type=click.Choice(["Hollywood", "Bollywood"]),
+        help="Movie category",
+    )
+    @click.option(
+        "-y",
+        "--years",
+        type=(int, int),
+        help="Inclusive range of release years e.g 2000 2010",
+    )
+    @click.option(
+        "-l",
+        "--limit",
+        type=click.IntRange(1),
+        help="Maximum results - 10",
+        default=10,
+    )
+    @click.option(
+        "--raw",
+        is_flag=True,
+        help="Pass the query as an FTS5 expression e.g 'title:avengers OR thanos'",
+    )
+    def search(db_path, query, genres, categories, years, limit, raw):
+        """Search movies ranked by relevance to QUERY"""
+        from data_hunter.search_index import SearchIndex
+
+        with SearchIndex(db_path) as search_index:
+            results, latency = search_index.search(
+                " ".join(query),
+                genres=genres,
+                categories=categories,
+                years=years,
+                limit=limit,
+                raw=raw,
+            )
+        for position, result in enumerate(results, start=1):
+            click.echo(
+                "%d. %s (%s) [%s] - %s\n   %s"
+                % (
+                    position,
+                    result["title"],
+                    result["year"],
+                    result["category"],
+                    result["genres"],
+                    result["url"],
+                )
+            )
+        logging.info("Found %d movies in %.2fms" % (len(results), latency * 1000))
+
+
+class QueryServer:
+    """HTTP JSON API over the relational database"""
+
+    @staticmethod
+    @click.command()
+    @click.argument(
+        "db_path", type=click.Path(exists=True, dir_okay=False), metavar="DATABASE"
+    )
+    @click.option(
+        "-h", "--host", help="Interface to bind to - 127.0.0.1", default="127.0.0.1"
+    )
+    @click.option(
+        "-p", "--port", type=click.IntRange(0, 65535), help="Port - 8000", default=8000
+    )
+    @click.option(
+        "--pool-size",
+        type=click.IntRange(1),
+        help="Read-only database connections - 4",
+        default=4,
+    )
+    @click.option(
+        "--cache-size",
+        type=click.IntRange(0),
+        help="Responses kept in the LRU cache - 1024",
+        default=1024,
+    )
+    def serve(db_path, host, port, pool_size, cache_size):
+        """Serve movie lookups, listings & title search of a relational DATABASE"""
+        import asyncio
+        from data_hunter.server import MovieServer
+
+        server = MovieServer(db_path, pool_size=pool_size, cache_size=cache_size)
+
+        async def run():
+            await server.start(host, port)
+            logging.info(f"Serving '{db_path}' on http://{host}:{server.port}")
+            try:
+                await server.server.serve_forever()
+            finally:
+                await server.close()
+
+        try:
+            asyncio.run(run())
+        except KeyboardInterrupt:
+            logging.info("Server stopped")
+
+
+def entry_point():
     # fire up
     try:
         data_hunter()
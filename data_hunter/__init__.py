@@ -3,6 +3,38 @@ __author__ = "Smartwa"
 __repo__ = "https://github.com/Simatwa/movies-dataset"
 __info__ = "A collection of movies dataset for your ML project or any other task."
 
-from data_hunter.main import MovieDataHunter
+import importlib
 
-__all__ = ["MovieDataHunter"]
+_exports = {
+    "MovieDataHunter": "data_hunter.main",
+    "Checkpoint": "data_hunter.checkpoint",
+    "MovieDataset": "data_hunter.dataset",
+    "PageCache": "data_hunter.cache",
+    "FetchScheduler": "data_hunter.scheduler",
+    "DatasetStats": "data_hunter.stats",
+    "SimilarityIndex": "data_hunter.similarity",
+}
+"""Public names and the modules they are imported from once first accessed"""
+
+
+def __getattr__(name: str):
+    if name in _exports:
+        value = getattr(importlib.import_module(_exports[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_exports))
+
+
+__all__ = [
+    "MovieDataHunter",
+    "Checkpoint",
+    "MovieDataset",
+    "PageCache",
+    "FetchScheduler",
+    "DatasetStats",
+    "SimilarityIndex",
+]
@@ -1,7 +1,8 @@
 import argparse
+import contextlib
 import os
 import data_hunter
-from fzmovies_api.filters import MovieGenreFilter
+from data_hunter.constants import available_genres
 
 parser = argparse.ArgumentParser(
     prog="data-hunter",
@@ -12,8 +13,8 @@ parser.add_argument(
     "-g",
     "--genres",
     nargs="*",
-    choices=list(MovieGenreFilter.available_genres) + ["_"],
-    metavar=f"[{'|'.join(MovieGenreFilter.available_genres)}]",
+    choices=list(available_genres) + ["_"],
+    metavar=f"[{'|'.join(available_genres)}]",
     help="Movie genres - %(default)s",
     default=["_"],
 )
@@ -55,7 +56,97 @@ parser.add_argument(
     "-w",
     "--overwrite",
     action="store_true",
-    help="Clear all $prefix*.csv file in the $dir - %(default)s",
+    help="Clear all $prefix datasets and the checkpoint manifest in the $dir - %(default)s",
+)
+parser.add_argument(
+    "-s",
+    "--sink",
+    choices=["csv", "sqlite", "relational", "parquet", "partitioned"],
+    help="Where to write the movies to - %(default)s",
+    default="csv",
+)
+parser.add_argument(
+    "-r",
+    "--resume",
+    action="store_true",
+    help="Resume from the checkpoint manifest in $dir, skipping movies already saved, not with the parquet sink - %(default)s",
+)
+parser.add_argument(
+    "-x",
+    "--workers",
+    type=int,
+    help="Number of category-genre pairs to hunt concurrently - %(default)d",
+    default=1,
+)
+parser.add_argument(
+    "--prefetch",
+    type=int,
+    help="Pages of each category-genre pair requested ahead while the previous ones are written - %(default)d",
+    default=0,
+)
+parser.add_argument(
+    "-z",
+    "--compression",
+    choices=["gzip", "zstd"],
+    help="Write the csv datasets as compressed .csv.gz or .csv.zst shards - %(default)s",
+)
+parser.add_argument(
+    "--compression-level",
+    type=int,
+    help="Level of the compression codec, none for its default - %(default)s",
+)
+parser.add_argument(
+    "--refresh",
+    action="store_true",
+    help="Stop at the first page of a category-genre pair unchanged since the last refresh, rewriting only the datasets changed and saving the rows added, removed and modified to a delta.json in the $dir - %(default)s",
+)
+parser.add_argument(
+    "--rate",
+    type=float,
+    help="Maximum requests per second, none for unlimited - %(default)s",
+)
+parser.add_argument(
+    "--retries",
+    type=int,
+    help="Retries allowed per category-genre pair on failed requests, earned back by pages fetched - %(default)d",
+    default=3,
+)
+parser.add_argument(
+    "--backoff",
+    type=float,
+    help="Base seconds of the exponential backoff between retries - %(default)s",
+    default=1.0,
+)
+parser.add_argument(
+    "--cache",
+    help="Path to the cache of listing pages fetched, none for no caching - %(default)s",
+)
+parser.add_argument(
+    "--cache-ttl",
+    type=float,
+    help="Hours before a cached page expires - %(default)s",
+    default=7 * 24,
+)
+parser.add_argument(
+    "--cache-size",
+    type=int,
+    help="Megabytes beyond which least recently used pages are evicted - %(default)d",
+    default=512,
+)
+parser.add_argument(
+    "--cache-only",
+    action="store_true",
+    help="Work offline, hunting from the cached pages only - %(default)s",
+)
+parser.add_argument(
+    "--metrics-file",
+    help="Path to save per-stage timings, counters and latency histograms to, "
+    "as a Prometheus textfile if it ends with .prom else as JSON - %(default)s",
+)
+parser.add_argument(
+    "--profile",
+    action="store_true",
+    help="Profile the hunt with cProfile and print the sorted stats - %(default)s",
 )
 parser.add_argument(
     "-t",
@@ -66,23 +157,77 @@ parser.add_argument(
 parser.add_argument(
     "-v", "--version", action="version", version=f"%(prog)s v{data_hunter.__version__}"
 )
-args = parser.parse_args()
 
 
 def main():
-    hunter = data_hunter.MovieDataHunter(genres=args.genres, categories=args.categories)
+    args = parser.parse_args()
+    if args.cache_only and not args.cache:
+        parser.error("--cache-only requires --cache")
+    from data_hunter.metrics import metrics, profile
+
+    resources = contextlib.ExitStack()
+    if args.metrics_file:
+        metrics.enable()
+        resources.callback(metrics.dump, args.metrics_file)
+    if args.profile:
+        resources.enter_context(profile())
+    cache = (
+        data_hunter.PageCache(
+            args.cache,
+            ttl=args.cache_ttl * 60 * 60,
+            max_bytes=args.cache_size * 1024 * 1024,
+            cache_only=args.cache_only,
+        )
+        if args.cache
+        else None
+    )
+    scheduler = data_hunter.FetchScheduler(
+        rate=args.rate,
+        max_concurrency=args.workers,
+        retries=args.retries,
+        backoff=args.backoff,
+    )
+    hunter = data_hunter.MovieDataHunter(
+        genres=args.genres,
+        categories=args.categories,
+        cache=cache,
+        scheduler=scheduler,
+    )
     try:
         if args.overwrite:
             import glob
 
-            for file in glob.glob(os.path.join(args.dir, args.prefix + "*.csv")):
-                os.remove(file)
+            from data_hunter.sinks import SQLiteSink, RelationalSink, RefreshSink
+            from data_hunter.delta import PageManifest
+            from data_hunter import partitions
+
+            for pattern in (
+                "*.csv",
+                "*.csv.gz",
+                "*.csv.zst",
+                "*.parquet",
+                SQLiteSink.filename,
+                RelationalSink.filename,
+                data_hunter.Checkpoint.filename,
+                PageManifest.filename,
+                RefreshSink.delta_filename,
+            ):
+                for file in glob.glob(os.path.join(args.dir, args.prefix + pattern)):
+                    os.remove(file)
+            partitions.clear(args.dir, args.prefix)
         total_movies = 0
         for category, genre, movies_count, newly_saved_amount, saved_to in hunter.hunt(
             dir=args.dir,
             prefix=args.prefix,
             limit=args.limit,
             stream=True,
+            workers=args.workers,
+            resume=args.resume,
+            prefetch=args.prefetch,
+            compression=args.compression,
+            compression_level=args.compression_level,
+            refresh=args.refresh,
+            sink=args.sink,
         ):
             total_movies += newly_saved_amount
             if not args.quiet:
@@ -91,6 +236,14 @@ def main():
                     % (category, genre, movies_count, total_movies),
                     end="\n" if args.trace else "\r",
                 )
+        if args.trace and not args.quiet:
+            print(
+                "> [Scheduler] - "
+                + " - ".join(
+                    "[%s : %s]" % (key.replace("_", " ").title(), value)
+                    for key, value in scheduler.stats.items()
+                )
+            )
     except Exception as e:
         print(
             "Error : " + e.args[1] if e.args and len(e.args) > 1 else str(e),
@@ -100,6 +253,8 @@ def main():
         from sys import exit
 
         exit(1)
+    finally:
+        resources.close()
 
 
 if __name__ == "__main__":
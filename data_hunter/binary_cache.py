@@ -0,0 +1,226 @@
+"""Memory-mapped binary cache of the hunted datasets"""
+
+import os
+import json
+import hashlib
+import secrets
+import typing as t
+from pathlib import Path
+import numpy
+from data_hunter.dataset import MovieDataset
+from data_hunter.compression import find_csv_files, hash_file
+
+
+class StringColumn(t.Sequence[t.Optional[str]]):
+    """Strings stored back to back in a blob and located through offsets.
+
+    Both arrays are memory-mapped, values are only decoded when accessed.
+    """
+
+    def __init__(self, offsets: numpy.ndarray, blob: numpy.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def load(cls, path: str) -> "StringColumn":
+        return cls(
+            numpy.load(path + ".offsets.npy", mmap_mode="r"),
+            numpy.load(path + ".blob.npy", mmap_mode="r"),
+        )
+
+    @staticmethod
+    def dump(path: str, values: t.Iterable[t.Optional[str]]) -> None:
+        encoded = [(value or "").encode() for value in values]
+        offsets = numpy.zeros(len(encoded) + 1, dtype=numpy.uint64)
+        numpy.cumsum([len(value) for value in encoded], out=offsets[1:])
+        numpy.save(path + ".offsets.npy", offsets)
+        numpy.save(
+            path + ".blob.npy", numpy.frombuffer(b"".join(encoded), dtype=numpy.uint8)
+        )
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[index] for index in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.blob[start:end].tobytes().decode() or None
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.blob.nbytes
+
+
+class DatasetCache:
+    """Compiles the .csv files into fixed-width numeric columns and string blobs.
+
+    The manifest records each source file's size, mtime and sha256 so that
+    the cache is only rebuilt once a source actually changes.
+    """
+
+    version = 1
+    numeric_columns = ("years", "genre_masks", "category_codes", "distribution_codes")
+    string_columns = ("urls", "titles", "descriptions", "cover_photos")
+
+    def __init__(
+        self,
+        directory: t.Union[Path, str],
+        pattern: str = "*",
+        cache_dir: t.Optional[t.Union[Path, str]] = None,
+    ):
+        """
+
+        Args:
+            directory (t.Union[Path, str]): Directory containing the .csv files.
+            pattern (str, optional): Pattern for the .csv filename. Defaults to "*".
+            cache_dir (t.Union[Path, str], optional): Where to keep the cache.
+                Defaults to `.movies-cache` in `directory`.
+        """
+        self.directory = directory
+        self.pattern = pattern
+        self.cache_dir = Path(
+            cache_dir
+            or os.path.join(
+                directory,
+                ".movies-cache",
+                hashlib.sha1(pattern.encode()).hexdigest()[:12],
+            )
+        )
+        self.manifest_path = self.cache_dir / "manifest.json"
+
+    @property
+    def csv_filenames(self) -> t.List[str]:
+        return find_csv_files(self.directory, self.pattern)
+
+    def read_manifest(self) -> t.Optional[t.Dict[str, t.Any]]:
+        try:
+            with open(self.manifest_path) as fh:
+                manifest = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return None
+        return manifest if manifest.get("version") == self.version else None
+
+    def write_manifest(self, manifest: t.Dict[str, t.Any]) -> None:
+        temporary = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary, "w") as fh:
+            json.dump(manifest, fh, indent=2)
+        os.replace(temporary, self.manifest_path)
+
+    def stale_sources(self, manifest: t.Optional[t.Dict[str, t.Any]]) -> t.List[str]:
+        """Get the source files added, removed or changed since the cache was built.
+
+        Files whose size and mtime are unchanged are trusted, the rest are
+        hashed so that merely touched files don't trigger a rebuild.
+        """
+        recorded = manifest["sources"] if manifest else {}
+        current = self.csv_filenames
+        stale = [path for path in recorded if path not in current]
+        touched = {}
+        for path in current:
+            stat = os.stat(path)
+            entry = recorded.get(path)
+            if entry and (entry["size"], entry["mtime_ns"]) == (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                continue
+            if entry and entry["size"] == stat.st_size:
+                if hash_file(path) == entry["sha256"]:
+                    touched[path] = dict(entry, mtime_ns=stat.st_mtime_ns)
+                    continue
+            stale.append(path)
+        if touched and not stale:
+            manifest["sources"].update(touched)
+            self.write_manifest(manifest)
+        return stale
+
+    def is_fresh(self) -> bool:
+        """Check whether the cache is in sync with the source files"""
+        manifest = self.read_manifest()
+        return manifest is not None and not self.stale_sources(manifest)
+
+    def compile(self) -> t.Dict[str, t.Any]:
+        """Parse the .csv files and write the cache
+
+        Returns:
+            t.Dict[str, t.Any]: The new manifest.
+        """
+        sources = {}
+        for path in self.csv_filenames:
+            stat = os.stat(path)
+            sources[path] = dict(
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                sha256=hash_file(path),
+            )
+        dataset = MovieDataset.from_csv(self.directory, self.pattern)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        previous = self.read_manifest()
+        # Files of a generation are never modified, readers still mapping an
+        # older generation are unaffected by a rebuild
+        generation = secrets.token_hex(4)
+        for column in self.numeric_columns:
+            numpy.save(
+                self.cache_dir / f"{generation}.{column}.npy", getattr(dataset, column)
+            )
+        for column in self.string_columns:
+            StringColumn.dump(
+                str(self.cache_dir / f"{generation}.{column}"), getattr(dataset, column)
+            )
+        manifest = dict(
+            version=self.version,
+            generation=generation,
+            rows=len(dataset),
+            genres=list(dataset.genres),
+            categories=dataset.categories,
+            distributions=dataset.distributions,
+            sources=sources,
+        )
+        self.write_manifest(manifest)
+        if previous:
+            for path in self.cache_dir.glob(f"{previous['generation']}.*"):
+                path.unlink()
+        return manifest
+
+    def load(self, rebuild: bool = True) -> MovieDataset:
+        """Map the cache, compiling it first when missing or stale
+
+        Args:
+            rebuild (bool, optional): Recompile a stale cache. Defaults to True.
+
+        Returns:
+            MovieDataset: Dataset whose columns are memory-mapped.
+        """
+        for attempt in range(2):
+            manifest = self.read_manifest()
+            if manifest is None or self.stale_sources(manifest):
+                assert rebuild, f"Cache at '{self.cache_dir}' is stale"
+                manifest = self.compile()
+            assert manifest["genres"] == list(
+                MovieDataset.genres
+            ), "Cache was compiled against different genres"
+            generation = manifest["generation"]
+            try:
+                columns = {
+                    column: numpy.load(
+                        self.cache_dir / f"{generation}.{column}.npy", mmap_mode="r"
+                    )
+                    for column in self.numeric_columns
+                }
+                for column in self.string_columns:
+                    columns[column] = StringColumn.load(
+                        str(self.cache_dir / f"{generation}.{column}")
+                    )
+            except FileNotFoundError:
+                # Generation replaced by a concurrent compile
+                if attempt:
+                    raise
+                continue
+            return MovieDataset(
+                categories=manifest["categories"],
+                distributions=manifest["distributions"],
+                **columns,
+            )
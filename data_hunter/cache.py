@@ -0,0 +1,165 @@
+"""On-disk cache of the listing pages fetched while hunting"""
+
+import json
+import time
+import zlib
+import sqlite3
+import threading
+import typing as t
+from pathlib import Path
+
+
+class PageCache:
+    """Listing pages keyed by (category, genre, page) in a sqlite3 store.
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once the store outgrows `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        path: t.Union[Path, str],
+        ttl: t.Optional[float] = 7 * 24 * 60 * 60,
+        max_bytes: t.Optional[int] = 512 * 1024 * 1024,
+        cache_only: bool = False,
+    ):
+        """
+
+        Args:
+            path (t.Union[Path, str]): Path to the cache file.
+            ttl (t.Optional[float], optional): Seconds before an entry expires, None for never. Defaults to 7 days.
+            max_bytes (t.Optional[int], optional): Size beyond which entries are evicted, None for unbounded. Defaults to 512MB.
+            cache_only (bool, optional): Never go online, serving cached pages only. Defaults to False.
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cache_only = cache_only
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS page (
+                    category TEXT NOT NULL,
+                    genre TEXT NOT NULL,
+                    number INTEGER NOT NULL,
+                    data BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL,
+                    PRIMARY KEY (category, genre, number)
+                );
+                CREATE INDEX IF NOT EXISTS ix_page_accessed ON page (accessed);
+                CREATE TABLE IF NOT EXISTS listing (
+                    category TEXT NOT NULL,
+                    genre TEXT NOT NULL,
+                    pages INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    PRIMARY KEY (category, genre)
+                );
+                """)
+
+    def is_expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(
+        self, category: str, genre: str, number: int
+    ) -> t.Optional[t.List[t.Dict[str, t.Any]]]:
+        """Get a cached page
+
+        Args:
+            category (str): Movie category.
+            genre (str): Movie genre.
+            number (int): Page number, starting from 0.
+
+        Returns:
+            t.Optional[t.List[t.Dict[str, t.Any]]]: Movies in the page or None when not cached.
+        """
+        with self._lock:
+            entry = self.conn.execute(
+                "SELECT data, created FROM page "
+                "WHERE category = ? AND genre = ? AND number = ?",
+                (category, genre, number),
+            ).fetchone()
+            if entry is None or self.is_expired(entry[1]):
+                self.misses += 1
+                return None
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE page SET accessed = ? "
+                    "WHERE category = ? AND genre = ? AND number = ?",
+                    (time.time(), category, genre, number),
+                )
+            self.hits += 1
+        return json.loads(zlib.decompress(entry[0]))
+
+    def put(
+        self, category: str, genre: str, number: int, rows: t.List[t.Dict[str, t.Any]]
+    ) -> None:
+        """Cache a page, evicting the least recently used pages if need be"""
+        data = zlib.compress(json.dumps(rows, default=str).encode())
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO page VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (category, genre, number, data, len(data), now, now),
+            )
+            if self.max_bytes is not None:
+                self._evict()
+
+    def _evict(self) -> None:
+        total = self.conn.execute("SELECT coalesce(sum(size), 0) FROM page").fetchone()[
+            0
+        ]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for category, genre, number, size in self.conn.execute(
+            "SELECT category, genre, number, size FROM page ORDER BY accessed"
+        ):
+            if total <= self.max_bytes:
+                break
+            evicted.append((category, genre, number))
+            total -= size
+        self.conn.executemany(
+            "DELETE FROM page WHERE category = ? AND genre = ? AND number = ?",
+            evicted,
+        )
+
+    def get_pages(self, category: str, genre: str) -> t.Optional[int]:
+        """Get the number of pages a listing was found to have when last exhausted"""
+        with self._lock:
+            entry = self.conn.execute(
+                "SELECT pages, created FROM listing WHERE category = ? AND genre = ?",
+                (category, genre),
+            ).fetchone()
+        if entry is None or self.is_expired(entry[1]):
+            return None
+        return entry[0]
+
+    def put_pages(self, category: str, genre: str, pages: int) -> None:
+        """Record the number of pages of an exhausted listing"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO listing VALUES (?, ?, ?, ?)",
+                (category, genre, pages, time.time()),
+            )
+
+    @property
+    def size(self) -> int:
+        """Bytes taken by the cached pages"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT coalesce(sum(size), 0) FROM page"
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,226 @@
+"""Checkpoint manifest for resumable hunts"""
+
+import os
+import csv
+import sqlite3
+import typing as t
+from pathlib import Path
+from data_hunter.compression import open_text
+
+
+class Checkpoint:
+    """Records hunting progress per (category, genre) alongside the datasets.
+
+    The manifest is a sqlite3 file holding the last completed page and an
+    index of the urls already saved, so that a restarted hunt neither
+    rewrites rows on disk nor has to re-read the datasets. The urls of a page
+    are recorded as pending before it is written, a hunt interrupted before
+    the page is saved telling from them which of its rows reached the sink.
+    """
+
+    filename = "hunt-checkpoint.db"
+
+    def __init__(self, path: t.Union[Path, str]):
+        """
+
+        Args:
+            path (t.Union[Path, str]): Path to the manifest file.
+        """
+        self.path = Path(path)
+        self.is_new = not self.path.exists()
+        self.conn = sqlite3.connect(self.path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS progress (
+                category TEXT NOT NULL,
+                genre TEXT NOT NULL,
+                pages INTEGER NOT NULL DEFAULT 0,
+                movies INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (category, genre)
+            );
+            CREATE TABLE IF NOT EXISTS saved_url (
+                category TEXT NOT NULL,
+                genre TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (category, genre, url)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS pending_url (
+                category TEXT NOT NULL,
+                genre TEXT NOT NULL,
+                url TEXT NOT NULL,
+                PRIMARY KEY (category, genre, url)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS abandoned (
+                category TEXT NOT NULL,
+                genre TEXT NOT NULL,
+                reason TEXT NOT NULL,
+                PRIMARY KEY (category, genre)
+            );
+            """)
+
+    @classmethod
+    def in_dir(cls, dir: t.Union[Path, str], prefix: str = "") -> "Checkpoint":
+        """Open the manifest kept in the datasets directory"""
+        return cls(os.path.join(dir, prefix + cls.filename))
+
+    def seed(self, dataset: t.Union[Path, str]) -> int:
+        """Index the urls of an existing dataset, used once when the manifest is new.
+
+        Args:
+            dataset (t.Union[Path, str]): Path to a genre dataset.
+
+        Returns:
+            int: Rows indexed.
+        """
+        with open_text(dataset) as fh:
+            rows = [
+                (row["category"], row["genre"], row["url"])
+                for row in csv.DictReader(fh)
+            ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO saved_url VALUES (?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def progress(self, category: str, genre: str) -> t.Tuple[int, int, bool]:
+        """Get the progress recorded for a category and genre
+
+        Returns:
+            t.Tuple[int, int, bool]: Pages completed, movies fetched and whether the hunt is over.
+        """
+        entry = self.conn.execute(
+            "SELECT pages, movies, completed FROM progress "
+            "WHERE category = ? AND genre = ?",
+            (category, genre),
+        ).fetchone()
+        if entry is None:
+            return 0, 0, False
+        return entry[0], entry[1], bool(entry[2])
+
+    def unsaved(
+        self, category: str, genre: str, rows: t.List[t.Dict[str, t.Any]]
+    ) -> t.List[t.Dict[str, t.Any]]:
+        """Drop the rows whose url is already saved (or repeated within `rows`)"""
+        urls = [row["url"] for row in rows]
+        saved = {
+            entry[0]
+            for entry in self.conn.execute(
+                "SELECT url FROM saved_url WHERE category = ? AND genre = ? "
+                f"AND url IN ({','.join('?' * len(urls))})",
+                (category, genre, *urls),
+            )
+        }
+        new_rows = []
+        for row in rows:
+            if row["url"] not in saved:
+                saved.add(row["url"])
+                new_rows.append(row)
+        return new_rows
+
+    def begin_page(
+        self, category: str, genre: str, rows: t.List[t.Dict[str, t.Any]]
+    ) -> None:
+        """Record the urls of rows about to be written, until their page is saved"""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO pending_url VALUES (?, ?, ?)",
+                [(category, genre, row["url"]) for row in rows],
+            )
+
+    def pending(self, category: str, genre: str) -> t.List[str]:
+        """Urls of the rows of a page written, or not, when the hunt stopped"""
+        return [
+            entry[0]
+            for entry in self.conn.execute(
+                "SELECT url FROM pending_url WHERE category = ? AND genre = ?",
+                (category, genre),
+            )
+        ]
+
+    def reconcile(self, category: str, genre: str, saved: t.Iterable[str]) -> None:
+        """Index the pending urls found in the sink, forgetting the others
+
+        Args:
+            saved (t.Iterable[str]): Pending urls the sink holds rows of.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO saved_url VALUES (?, ?, ?)",
+                [(category, genre, url) for url in saved],
+            )
+            self.conn.execute(
+                "DELETE FROM pending_url WHERE category = ? AND genre = ?",
+                (category, genre),
+            )
+
+    def save_page(
+        self,
+        category: str,
+        genre: str,
+        page: int,
+        movies: int,
+        rows: t.List[t.Dict[str, t.Any]],
+    ) -> None:
+        """Record a page as completed together with the urls of rows saved from it.
+
+        Args:
+            page (int): Number of pages completed so far.
+            movies (int): Movies fetched so far.
+            rows (t.List[t.Dict[str, t.Any]]): Rows written to disk.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO saved_url VALUES (?, ?, ?)",
+                [(category, genre, row["url"]) for row in rows],
+            )
+            self.conn.execute(
+                "INSERT INTO progress (category, genre, pages, movies) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (category, genre) "
+                "DO UPDATE SET pages = excluded.pages, movies = excluded.movies",
+                (category, genre, page, movies),
+            )
+            self.conn.execute(
+                "DELETE FROM pending_url WHERE category = ? AND genre = ?",
+                (category, genre),
+            )
+
+    def complete(self, category: str, genre: str) -> None:
+        """Mark the hunt for a category and genre as over"""
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM abandoned WHERE category = ? AND genre = ?",
+                (category, genre),
+            )
+            self.conn.execute(
+                "INSERT INTO progress (category, genre, completed) VALUES (?, ?, 1) "
+                "ON CONFLICT (category, genre) DO UPDATE SET completed = 1",
+                (category, genre),
+            )
+
+    def abandon(self, category: str, genre: str, reason: str) -> None:
+        """Record that the hunt for a category and genre was given up on, it
+        being resumed next time"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO abandoned VALUES (?, ?, ?)",
+                (category, genre, reason),
+            )
+
+    def abandoned(self) -> t.Dict[t.Tuple[str, str], str]:
+        """Reason per (category, genre) last given up on"""
+        return {
+            (category, genre): reason
+            for category, genre, reason in self.conn.execute(
+                "SELECT category, genre, reason FROM abandoned"
+            )
+        }
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
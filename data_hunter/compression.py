@@ -0,0 +1,89 @@
+"""Gzip & zstd compressed .csv datasets, read and written as text streams
+
+Zstd requires zstandard.
+"""
+
+import io
+import os
+import glob
+import hashlib
+import typing as t
+from pathlib import Path
+
+codecs = {"gzip": ".gz", "zstd": ".zst"}
+"""Suffix of the files compressed by each codec"""
+
+default_levels = {"gzip": 6, "zstd": 3}
+"""Levels trading ratio for speed as the codecs' command line tools do"""
+
+csv_suffixes = (".csv",) + tuple(".csv" + suffix for suffix in codecs.values())
+"""Suffixes of the datasets, compressed or not"""
+
+
+def codec_of(path: t.Union[Path, str]) -> t.Optional[str]:
+    """Codec a file is compressed with, judging by its suffix"""
+    suffix = os.path.splitext(str(path))[1]
+    for codec, codec_suffix in codecs.items():
+        if suffix == codec_suffix:
+            return codec
+    return None
+
+
+def open_text(
+    path: t.Union[Path, str],
+    mode: t.Literal["r", "w", "a"] = "r",
+    level: t.Optional[int] = None,
+    buffering: int = -1,
+) -> t.IO[str]:
+    """Open a .csv file as text, (de)compressing it on the fly by its suffix
+
+    Appending to a compressed file adds a gzip member or a zstd frame to it,
+    the members or frames being read back one after the other.
+
+    Args:
+        path (t.Union[Path, str]): Path to the file.
+        mode (t.Literal["r", "w", "a"], optional): Read, write or append. Defaults to "r".
+        level (t.Optional[int], optional): Compression level. Defaults to None (codec's default).
+        buffering (int, optional): Buffer size of the file read or written, as for `open`.
+            Defaults to -1.
+
+    Returns:
+        t.IO[str]: Text stream, newlines left untranslated as `csv` expects.
+    """
+    assert mode in ("r", "w", "a"), f"Unsupported mode '{mode}'"
+    codec = codec_of(path)
+    if codec is None:
+        return open(path, mode, buffering, newline="")
+    level = default_levels[codec] if level is None else level
+    if codec == "gzip":
+        import gzip
+
+        return gzip.open(path, mode + "t", compresslevel=level, newline="")
+    import zstandard
+
+    fh = open(path, mode + "b", buffering)
+    if mode == "r":
+        stream = zstandard.ZstdDecompressor().stream_reader(
+            fh, read_across_frames=True, closefd=True
+        )
+    else:
+        stream = zstandard.ZstdCompressor(level=level).stream_writer(fh, closefd=True)
+    return io.TextIOWrapper(stream, newline="")
+
+
+def find_csv_files(directory: t.Union[Path, str], pattern: str = "*") -> t.List[str]:
+    """Paths to the .csv, .csv.gz & .csv.zst files of a directory matching a pattern"""
+    return sorted(
+        path
+        for suffix in csv_suffixes
+        for path in glob.glob(os.path.join(directory, pattern + suffix))
+    )
+
+
+def hash_file(path: t.Union[Path, str]) -> str:
+    """Sha256 of a file's bytes, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
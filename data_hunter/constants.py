@@ -0,0 +1,29 @@
+"""Genres and categories listed on fzmovies, importable without fzmovies_api"""
+
+available_genres = (
+    "Action",
+    "Adventure",
+    "Animation",
+    "Biography",
+    "Comedy",
+    "Crime",
+    "Documentary",
+    "Drama",
+    "Family",
+    "Fantasy",
+    "Film-Noir",
+    "History",
+    "Horror",
+    "Music",
+    "Musical",
+    "Mystery",
+    "Romance",
+    "Sci-Fi",
+    "Sport",
+    "Thriller",
+    "War",
+    "Western",
+)
+"""Mirrors `fzmovies_api.filters.MovieGenreFilter.available_genres`"""
+
+available_categories = ("Hollywood", "Bollywood")
@@ -0,0 +1,262 @@
+"""Compact in-memory representation of the hunted datasets"""
+
+import csv
+import sys
+import typing as t
+from pathlib import Path
+import numpy
+from data_hunter.compression import find_csv_files, open_text
+from data_hunter.constants import available_genres
+
+
+class MovieRecord:
+    """A single movie in a `MovieDataset`"""
+
+    __slots__ = (
+        "url",
+        "title",
+        "year",
+        "genres",
+        "category",
+        "distribution",
+        "description",
+        "cover_photo",
+    )
+
+    def __init__(self, **kwargs):
+        for name in self.__slots__:
+            setattr(self, name, kwargs.get(name))
+
+    def __repr__(self):
+        return f"{self.title} ({self.year})"
+
+
+class MovieDataset:
+    """Column-oriented dataset holding one record per unique movie url.
+
+    Genres are stored as a bitmask over `available_genres`,
+    while category & distribution are interned and stored as small codes, so
+    filtering runs vectorized over numpy arrays.
+    """
+
+    genres: t.Tuple[str] = available_genres
+
+    def __init__(
+        self,
+        urls: t.List[str],
+        titles: t.List[str],
+        years: numpy.ndarray,
+        genre_masks: numpy.ndarray,
+        category_codes: numpy.ndarray,
+        categories: t.List[str],
+        distribution_codes: numpy.ndarray,
+        distributions: t.List[str],
+        descriptions: t.List[t.Optional[str]],
+        cover_photos: t.List[t.Optional[str]],
+    ):
+        """
+
+        Args:
+            urls (t.List[str]): Movie urls.
+            titles (t.List[str]): Movie titles.
+            years (numpy.ndarray): Release years, 0 when unknown.
+            genre_masks (numpy.ndarray): Bitmask of each movie's genres.
+            category_codes (numpy.ndarray): Positions in `categories`.
+            categories (t.List[str]): Interned categories.
+            distribution_codes (numpy.ndarray): Positions in `distributions`.
+            distributions (t.List[str]): Interned distributions.
+            descriptions (t.List[t.Optional[str]]): Movie descriptions.
+            cover_photos (t.List[t.Optional[str]]): Cover photo urls.
+        """
+        self.urls = urls
+        self.titles = titles
+        self.years = years
+        self.genre_masks = genre_masks
+        self.category_codes = category_codes
+        self.categories = categories
+        self.distribution_codes = distribution_codes
+        self.distributions = distributions
+        self.descriptions = descriptions
+        self.cover_photos = cover_photos
+        self._positions: t.Optional[t.Dict[str, int]] = None
+
+    @classmethod
+    def from_csv(
+        cls, directory: t.Union[Path, str], pattern: str = "*"
+    ) -> "MovieDataset":
+        """Load the genre .csv files, merging movies listed under several genres
+
+        Args:
+            directory (t.Union[Path, str]): Directory containing the .csv files.
+            pattern (str, optional): Pattern for the .csv filename. Defaults to "*".
+
+        Returns:
+            MovieDataset: Dataset keyed by movie url.
+        """
+        csv_filenames = find_csv_files(directory, pattern)
+        assert (
+            csv_filenames
+        ), f"Zero files matched the pattern '{pattern}' in the directory '{directory}'"
+        genre_bits = {genre: 1 << bit for bit, genre in enumerate(cls.genres)}
+        positions: t.Dict[str, int] = {}
+        urls, titles, years, genre_masks = [], [], [], []
+        category_codes, distribution_codes = [], []
+        descriptions, cover_photos = [], []
+        categories: t.Dict[str, int] = {}
+        distributions: t.Dict[str, int] = {}
+        for csv_file in csv_filenames:
+            with open_text(csv_file) as fh:
+                for row in csv.DictReader(fh):
+                    url = row["url"]
+                    position = positions.get(url)
+                    if position is None:
+                        position = positions[url] = len(urls)
+                        urls.append(url)
+                        titles.append(row["title"])
+                        year = row["year"]
+                        years.append(int(year) if year.isdigit() else 0)
+                        genre_masks.append(0)
+                        category_codes.append(
+                            categories.setdefault(
+                                sys.intern(row["category"]), len(categories)
+                            )
+                        )
+                        distribution_codes.append(
+                            distributions.setdefault(
+                                sys.intern(row["distribution"]), len(distributions)
+                            )
+                        )
+                        descriptions.append(row["description"] or None)
+                        cover_photos.append(row["cover_photo"] or None)
+                    genre_masks[position] |= genre_bits.get(row["genre"], 0)
+        return cls(
+            urls=urls,
+            titles=titles,
+            years=numpy.array(years, dtype=numpy.uint16),
+            genre_masks=numpy.array(genre_masks, dtype=numpy.uint32),
+            category_codes=numpy.array(category_codes, dtype=numpy.uint8),
+            categories=list(categories),
+            distribution_codes=numpy.array(distribution_codes, dtype=numpy.uint8),
+            distributions=list(distributions),
+            descriptions=descriptions,
+            cover_photos=cover_photos,
+        )
+
+    @classmethod
+    def from_cache(
+        cls,
+        directory: t.Union[Path, str],
+        pattern: str = "*",
+        cache_dir: t.Optional[t.Union[Path, str]] = None,
+    ) -> "MovieDataset":
+        """Map the binary cache of the .csv files, compiling it when stale
+
+        Args:
+            directory (t.Union[Path, str]): Directory containing the .csv files.
+            pattern (str, optional): Pattern for the .csv filename. Defaults to "*".
+            cache_dir (t.Union[Path, str], optional): Where the cache is kept. Defaults to None.
+
+        Returns:
+            MovieDataset: Dataset whose columns are memory-mapped.
+        """
+        from data_hunter.binary_cache import DatasetCache
+
+        return DatasetCache(directory, pattern, cache_dir).load()
+
+    @property
+    def positions(self) -> t.Dict[str, int]:
+        """Movie url mapped to its position"""
+        if self._positions is None:
+            self._positions = {url: position for position, url in enumerate(self.urls)}
+        return self._positions
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.positions
+
+    def __getitem__(self, position: int) -> MovieRecord:
+        return MovieRecord(
+            url=self.urls[position],
+            title=self.titles[position],
+            year=int(self.years[position]) or None,
+            genres=self.decode_genres(int(self.genre_masks[position])),
+            category=self.categories[self.category_codes[position]],
+            distribution=self.distributions[self.distribution_codes[position]],
+            description=self.descriptions[position],
+            cover_photo=self.cover_photos[position],
+        )
+
+    def get(self, url: str) -> t.Optional[MovieRecord]:
+        """Get a movie by its url"""
+        position = self.positions.get(url)
+        return None if position is None else self[position]
+
+    def encode_genres(self, genres: t.Iterable[str]) -> int:
+        """Convert genre names to a bitmask"""
+        mask = 0
+        for genre in genres:
+            mask |= 1 << self.genres.index(genre)
+        return mask
+
+    def decode_genres(self, mask: int) -> t.List[str]:
+        """Convert a bitmask to genre names"""
+        return [genre for bit, genre in enumerate(self.genres) if mask & (1 << bit)]
+
+    def filter(
+        self,
+        years: t.Optional[t.Tuple[int, int]] = None,
+        genres: t.Optional[t.Iterable[str]] = None,
+        categories: t.Optional[t.Iterable[str]] = None,
+        match_all: bool = False,
+    ) -> numpy.ndarray:
+        """Find the movies matching all the criteria given
+
+        Args:
+            years (t.Tuple[int, int], optional): Inclusive range of release years. Defaults to None.
+            genres (t.Iterable[str], optional): Genres the movie belongs to. Defaults to None.
+            categories (t.Iterable[str], optional): Movie categories. Defaults to None.
+            match_all (bool, optional): Require every genre instead of any. Defaults to False.
+
+        Returns:
+            numpy.ndarray: Positions of the matching movies.
+        """
+        mask = numpy.ones(len(self), dtype=bool)
+        if years is not None:
+            start, end = years
+            mask &= (self.years >= start) & (self.years <= end)
+        if genres is not None:
+            bits = numpy.uint32(self.encode_genres(genres))
+            matched = self.genre_masks & bits
+            mask &= matched == bits if match_all else matched != 0
+        if categories is not None:
+            codes = [
+                self.categories.index(category)
+                for category in categories
+                if category in self.categories
+            ]
+            mask &= numpy.isin(self.category_codes, codes)
+        return numpy.flatnonzero(mask)
+
+    def select(self, positions: t.Iterable[int]) -> t.List[MovieRecord]:
+        """Get the movies at the positions given, e.g. those returned by `filter`"""
+        return [self[position] for position in positions]
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the dataset, strings included"""
+        total = sum(
+            array.nbytes
+            for array in (
+                self.years,
+                self.genre_masks,
+                self.category_codes,
+                self.distribution_codes,
+            )
+        )
+        for column in (self.urls, self.titles, self.descriptions, self.cover_photos):
+            if hasattr(column, "nbytes"):
+                total += column.nbytes
+            else:
+                total += sys.getsizeof(column) + sum(map(sys.getsizeof, column))
+        return total
@@ -0,0 +1,268 @@
+"""Near-duplicate movies found through MinHash signatures and LSH banding"""
+
+import re
+import zlib
+import sqlite3
+import typing as t
+from pathlib import Path
+import numpy
+
+
+def normalize(text: t.Optional[str]) -> t.List[str]:
+    """Lowercase words of a text, punctuation & the `<more>` of truncated descriptions dropped"""
+    return re.findall(r"[a-z0-9]+", (text or "").lower().replace("<more>", " "))
+
+
+def shingles(title: str, year: t.Any, description: t.Optional[str]) -> t.Set[str]:
+    """Features of a movie compared by Jaccard similarity
+
+    Args:
+        title (str): Movie title.
+        year (t.Any): Release year.
+        description (t.Optional[str]): Movie description.
+
+    Returns:
+        t.Set[str]: Title words & bigrams, word trigrams of the description and the year.
+    """
+    year = str(year or "")
+    title_words = [word for word in normalize(title) if word != year]
+    features = {"t:" + word for word in title_words}
+    features.update("t:" + " ".join(pair) for pair in zip(title_words, title_words[1:]))
+    words = normalize(description)
+    features.update("d:" + " ".join(words[i : i + 3]) for i in range(len(words) - 2))
+    if year:
+        features.add("y:" + year)
+    return features
+
+
+class MinHashLSH:
+    """Clusters near-duplicate movies in time close to linear in their number.
+
+    Each movie's shingles are reduced to a MinHash signature, whose bands
+    are bucketed so that only movies sharing a whole band are compared. The
+    Jaccard similarity of candidates is estimated from their signatures.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 32,
+        threshold: float = 0.6,
+        seed: int = 1,
+    ):
+        """
+
+        Args:
+            num_perm (int, optional): Hash functions per signature. Defaults to 128.
+            bands (int, optional): Bands the signatures are split into. Defaults to 32.
+            threshold (float, optional): Estimated Jaccard similarity from which
+                candidates are duplicates. Defaults to 0.6.
+            seed (int, optional): Seed of the hash functions. Defaults to 1.
+        """
+        assert (
+            num_perm % bands == 0
+        ), f"Hash functions ({num_perm}) must split evenly into {bands} bands"
+        assert 0 < threshold <= 1, f"Threshold must be within (0, 1] not {threshold}"
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+        rng = numpy.random.default_rng(seed)
+        # Multiply-shift hash functions, (a * x + b) >> 32 over wrapping 64-bit
+        # integers with an odd a, cheaper than reducing modulo a prime
+        self.a = rng.integers(0, 1 << 63, num_perm, dtype=numpy.uint64) * numpy.uint64(
+            2
+        ) + numpy.uint64(1)
+        self.b = rng.integers(0, 1 << 63, num_perm, dtype=numpy.uint64)
+
+    def signatures(
+        self, features: t.List[t.Set[str]], chunk_size: int = 1 << 12
+    ) -> numpy.ndarray:
+        """MinHash signatures of feature sets
+
+        Args:
+            features (t.List[t.Set[str]]): Shingles of every movie.
+            chunk_size (int, optional): Shingles hashed per vectorized step. Defaults to 4096.
+
+        Returns:
+            numpy.ndarray: uint32 signatures shaped (movies, num_perm).
+        """
+        counts = numpy.array([len(shingle_set) or 1 for shingle_set in features])
+        hashes = numpy.fromiter(
+            (
+                zlib.crc32(shingle.encode())
+                for shingle_set in features
+                for shingle in (shingle_set or {""})
+            ),
+            dtype=numpy.uint64,
+            count=int(counts.sum()),
+        )
+        offsets = numpy.concatenate([[0], numpy.cumsum(counts)])
+        signatures = numpy.empty((len(features), self.num_perm), numpy.uint32)
+        first = 0
+        while first < len(features):
+            # Whole movies per step, for their minimums to be reduced at once
+            last = max(
+                first + 1,
+                int(numpy.searchsorted(offsets, offsets[first] + chunk_size, "right"))
+                - 1,
+            )
+            last = min(last, len(features))
+            start, end = offsets[first], offsets[last]
+            permuted = hashes[start:end, None] * self.a
+            permuted += self.b
+            permuted >>= numpy.uint64(32)
+            signatures[first:last] = numpy.minimum.reduceat(
+                permuted,
+                offsets[first:last] - start,
+                axis=0,
+            )
+            first = last
+        return signatures
+
+    def candidate_pairs(self, signatures: numpy.ndarray) -> numpy.ndarray:
+        """Pairs of movies sharing at least one band of their signatures
+
+        Returns:
+            numpy.ndarray: Unique (i, j) rows with i < j.
+        """
+        rows = self.num_perm // self.bands
+        pairs = []
+        for band in range(self.bands):
+            keys = numpy.ascontiguousarray(
+                signatures[:, band * rows : (band + 1) * rows]
+            ).view(numpy.dtype((numpy.void, rows * 4)))[:, 0]
+            order = numpy.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            starts = numpy.concatenate(
+                [[0], numpy.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1]
+            )
+            sizes = numpy.diff(numpy.append(starts, len(keys)))
+            # Most buckets hold a single movie, only the others are walked
+            for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+                bucket = numpy.sort(order[start : start + size])
+                i, j = numpy.triu_indices(size, 1)
+                pairs.append(numpy.stack([bucket[i], bucket[j]], axis=1))
+        if not pairs:
+            return numpy.zeros((0, 2), dtype=numpy.int64)
+        return numpy.unique(numpy.concatenate(pairs), axis=0)
+
+    def similarity(
+        self, signatures: numpy.ndarray, pairs: numpy.ndarray
+    ) -> numpy.ndarray:
+        """Estimated Jaccard similarity of pairs, the share of equal hashes"""
+        return (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+
+    def clusters(
+        self,
+        features: t.List[t.Set[str]],
+        years: t.Optional[t.List[t.Optional[int]]] = None,
+        max_year_gap: int = 1,
+    ) -> t.List[t.Tuple[t.List[int], float]]:
+        """Groups of near-duplicates
+
+        Args:
+            features (t.List[t.Set[str]]): Shingles of every movie.
+            years (t.List[t.Optional[int]], optional): Release years, so that remakes
+                sharing a plot aren't taken for duplicates. Defaults to None.
+            max_year_gap (int, optional): Years allowed between duplicates. Defaults to 1.
+
+        Returns:
+            t.List[t.Tuple[t.List[int], float]]: Positions of the members of each
+            cluster of two or more, with the lowest similarity linking them.
+        """
+        signatures = self.signatures(features)
+        pairs = self.candidate_pairs(signatures)
+        scores = self.similarity(signatures, pairs)
+        duplicates = scores >= self.threshold
+        if years is not None and len(pairs):
+            known = numpy.array(
+                [year if isinstance(year, int) else -1 for year in years]
+            )
+            first, second = known[pairs[:, 0]], known[pairs[:, 1]]
+            duplicates &= (
+                (first < 0) | (second < 0) | (abs(first - second) <= max_year_gap)
+            )
+        parents = list(range(len(features)))
+
+        def find(position: int) -> int:
+            while parents[position] != position:
+                parents[position] = parents[parents[position]]
+                position = parents[position]
+            return position
+
+        links: t.Dict[int, float] = {}
+        for (i, j), score in zip(pairs[duplicates].tolist(), scores[duplicates]):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parents[root_j] = root_i
+                links[root_i] = min(
+                    links.get(root_i, 1.0), links.pop(root_j, 1.0), float(score)
+                )
+        members: t.Dict[int, t.List[int]] = {}
+        for position in range(len(features)):
+            root = find(position)
+            if root != position or root in links:
+                members.setdefault(root, []).append(position)
+        return sorted(
+            (
+                (sorted(positions), round(links[root], 4))
+                for root, positions in members.items()
+                if len(positions) > 1
+            ),
+            key=lambda cluster: cluster[0][0],
+        )
+
+
+def find_duplicates(
+    db_path: t.Union[Path, str], **kwargs
+) -> t.List[t.Dict[str, t.Any]]:
+    """Near-duplicate movies of the flat `Movies` table made by `create_db`
+
+    Args:
+        db_path (t.Union[Path, str]): Path to the database.
+        **kwargs: Passed to `MinHashLSH`.
+
+    Returns:
+        t.List[t.Dict[str, t.Any]]: Clusters, each with its similarity score, the
+        url of its canonical movie (listed under the most genres, then the one
+        saved first) and its members.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        movies = conn.execute(
+            "SELECT url, title, year, description, count(*), min(rowid) FROM Movies "
+            "WHERE url IS NOT NULL AND title IS NOT NULL GROUP BY url ORDER BY min(rowid)"
+        ).fetchall()
+    finally:
+        conn.close()
+    lsh = MinHashLSH(**kwargs)
+    clusters = []
+    for positions, score in lsh.clusters(
+        [
+            shingles(title, year, description)
+            for _, title, year, description, *_ in movies
+        ],
+        [movie[2] for movie in movies],
+    ):
+        members = [movies[position] for position in positions]
+        canonical = min(members, key=lambda movie: (-movie[4], movie[5]))
+        clusters.append(
+            dict(
+                score=score,
+                canonical=canonical[0],
+                members=[
+                    dict(url=url, title=title, year=year, genres=genres)
+                    for url, title, year, _, genres, _ in members
+                ],
+            )
+        )
+    return clusters
+
+
+def canonical_urls(clusters: t.List[t.Dict[str, t.Any]]) -> t.Dict[str, str]:
+    """Url of every clustered movie mapped to its cluster's canonical url"""
+    return {
+        member["url"]: cluster["canonical"]
+        for cluster in clusters
+        for member in cluster["members"]
+    }
@@ -0,0 +1,152 @@
+"""Per-page content hashes of the hunted listings and deltas between hunts"""
+
+import os
+import csv
+import json
+import hashlib
+import typing as t
+from pathlib import Path
+from data_hunter.compression import open_text
+from data_hunter.sinks import field_names
+
+
+def normalize(row: t.Dict[str, t.Any]) -> t.Dict[str, str]:
+    """Row as written to and read back from a .csv file"""
+    return {
+        name: "" if row.get(name) is None else str(row[name]) for name in field_names
+    }
+
+
+def page_hash(rows: t.List[t.Dict[str, str]]) -> str:
+    """Digest of the content of a listing page"""
+    digest = hashlib.sha1()
+    for row in rows:
+        digest.update("\x1f".join(row[name] for name in field_names).encode())
+        digest.update(b"\x1e")
+    return digest.hexdigest()
+
+
+def diff(
+    before: t.List[t.Dict[str, str]], after: t.List[t.Dict[str, str]]
+) -> t.Dict[str, t.List[t.Dict[str, str]]]:
+    """Rows added, removed and modified between two versions of a dataset, by url
+
+    Returns:
+        t.Dict[str, t.List[t.Dict[str, str]]]: `added` & `modified` rows as they
+        are now, `removed` rows as they were.
+    """
+    old = {row["url"]: row for row in before}
+    new = {row["url"]: row for row in after}
+    return dict(
+        added=[row for url, row in new.items() if url not in old],
+        removed=[row for url, row in old.items() if url not in new],
+        modified=[row for url, row in new.items() if url in old and old[url] != row],
+    )
+
+
+class PageManifest:
+    """Hash and row count of every page hunted per (category, genre), kept in
+    `<prefix>pages.json` alongside the datasets.
+
+    A listing whose page hashes to what the same page did last time is taken
+    to be unchanged from there on, its remaining pages being those already
+    saved. Listings are paginated from the most downloaded movies, so changes
+    are expected to show on the first pages.
+    """
+
+    filename = "pages.json"
+    version = 1
+
+    def __init__(self, dir: t.Union[Path, str], prefix: str = ""):
+        """
+
+        Args:
+            dir (t.Union[Path, str]): Directory of the datasets.
+            prefix (str, optional): Datasets filename prefix. Defaults to ''.
+        """
+        self.path = Path(dir, prefix + self.filename)
+        self.pages: t.Dict[str, t.List[t.Tuple[str, int]]] = {}
+        if self.path.exists():
+            with open(self.path) as fh:
+                manifest = json.load(fh)
+            if manifest.get("version") == self.version:
+                self.pages = {
+                    key: [tuple(page) for page in pages]
+                    for key, pages in manifest["pages"].items()
+                }
+        self.stopped_at: t.Dict[t.Tuple[str, str], int] = {}
+
+    @staticmethod
+    def key(category: str, genre: str) -> str:
+        return f"{category}/{genre}"
+
+    def get(self, category: str, genre: str) -> t.List[t.Tuple[str, int]]:
+        return self.pages.get(self.key(category, genre), [])
+
+    def discard(self, category: str, genre: str) -> None:
+        """Forget the pages of a listing whose dataset no longer matches them"""
+        self.pages.pop(self.key(category, genre), None)
+
+    def until_seen(
+        self,
+        category: str,
+        genre: str,
+        pages: t.Iterator[t.List[t.Dict[str, t.Any]]],
+    ) -> t.Generator[t.List[t.Dict[str, t.Any]], None, None]:
+        """Pages of a listing up to the first one unchanged since the last hunt,
+        the listing being closed there so that no more pages are requested
+
+        Args:
+            category (str): Movie category.
+            genre (str): Movie genre.
+            pages (t.Iterator[t.List[t.Dict[str, t.Any]]]): Pages of the listing.
+
+        Yields:
+            t.List[t.Dict[str, t.Any]]: Pages changed or new.
+        """
+        known = self.get(category, genre)
+        try:
+            for number, rows in enumerate(pages):
+                if (
+                    number < len(known)
+                    and page_hash([normalize(row) for row in rows]) == known[number][0]
+                ):
+                    self.stopped_at[(category, genre)] = number
+                    return
+                yield rows
+        finally:
+            close = getattr(pages, "close", None)
+            if close is not None:
+                close()
+
+    def save(self) -> None:
+        """Write the manifest atomically"""
+        temporary = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary, "w") as fh:
+            json.dump(
+                dict(version=self.version, pages=dict(sorted(self.pages.items()))), fh
+            )
+        os.replace(temporary, self.path)
+
+
+def read_dataset(path: t.Union[Path, str]) -> t.List[t.Dict[str, str]]:
+    """Rows of a genre dataset, none if it doesn't exist"""
+    if not os.path.exists(path):
+        return []
+    with open_text(path) as fh:
+        return [normalize(row) for row in csv.DictReader(fh)]
+
+
+def write_dataset(
+    path: t.Union[Path, str],
+    rows: t.List[t.Dict[str, str]],
+    compression_level: t.Optional[int] = None,
+) -> None:
+    """Replace a genre dataset atomically, readers never seeing it half-written"""
+    path = Path(path)
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp{path.suffix}")
+    with open_text(temporary, "w", compression_level) as fh:
+        writer = csv.DictWriter(fh, fieldnames=field_names)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(temporary, path)
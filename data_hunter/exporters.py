@@ -0,0 +1,185 @@
+"""Constant-memory exporters for the row-oriented formats"""
+
+import csv
+import html
+import json
+import typing as t
+from data_hunter.compression import open_text
+from data_hunter.sinks import field_names
+
+buffer_size = 1 << 20
+"""Bytes buffered by every output before hitting the disk"""
+
+
+class RowWriter:
+    """Writes rows to an export as they are read"""
+
+    extension: str
+
+    def __init__(self, fh: t.TextIO):
+        self.fh = fh
+
+    def header(self) -> None:
+        pass
+
+    def row(self, index: int, values: t.List[t.Optional[str]]) -> None:
+        raise NotImplementedError
+
+    def footer(self) -> None:
+        pass
+
+
+class CsvRowWriter(RowWriter):
+    extension = "csv"
+
+    def __init__(self, fh: t.TextIO):
+        super().__init__(fh)
+        self.writer = csv.writer(fh, lineterminator="\n")
+
+    def header(self):
+        self.writer.writerow(("", *field_names))
+
+    def row(self, index, values):
+        self.writer.writerow((index, *values))
+
+
+class JsonLinesRowWriter(RowWriter):
+    extension = "jsonl"
+
+    def row(self, index, values):
+        record = {column: value or None for column, value in zip(field_names, values)}
+        if record["year"] and record["year"].isdigit():
+            record["year"] = int(record["year"])
+        self.fh.write(json.dumps(record, ensure_ascii=False))
+        self.fh.write("\n")
+
+
+class MarkdownRowWriter(RowWriter):
+    """Writes an unpadded pipe table, rendered the same as `pandas.DataFrame.to_markdown`
+
+    Pandas pads every column to its widest value, which is only known once the
+    whole dataset is read.
+    """
+
+    extension = "md"
+
+    @staticmethod
+    def escape(value: t.Optional[str]) -> str:
+        return " ".join((value or "").replace("|", "\\|").splitlines())
+
+    def header(self):
+        self.fh.write("|    | " + " | ".join(field_names) + " |\n")
+        self.fh.write("|---:|" + "|".join(":---" for _ in field_names) + "|\n")
+
+    def row(self, index, values):
+        self.fh.write(
+            f"| {index} | "
+            + " | ".join(self.escape(value) for value in values)
+            + " |\n"
+        )
+
+
+class HtmlRowWriter(RowWriter):
+    """Writes the same table as `pandas.DataFrame.to_html`"""
+
+    extension = "html"
+    control_characters = str.maketrans({"\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+    @classmethod
+    def cell(cls, column: str, value: t.Optional[str]) -> str:
+        if not value:
+            return "&lt;NA&gt;" if column == "year" else "NaN"
+        return html.escape(value.translate(cls.control_characters), quote=False)
+
+    def header(self):
+        self.fh.write(
+            '<table border="1" class="dataframe">\n  <thead>\n'
+            '    <tr style="text-align: right;">\n      <th></th>\n'
+            + "".join(f"      <th>{column}</th>\n" for column in field_names)
+            + "    </tr>\n  </thead>\n  <tbody>\n"
+        )
+
+    def row(self, index, values):
+        self.fh.write(
+            f"    <tr>\n      <th>{index}</th>\n"
+            + "".join(
+                f"      <td>{self.cell(column, value)}</td>\n"
+                for column, value in zip(field_names, values)
+            )
+            + "    </tr>\n"
+        )
+
+    def footer(self):
+        self.fh.write("  </tbody>\n</table>")
+
+
+row_writers: t.Dict[str, t.Type[RowWriter]] = {
+    "csv": CsvRowWriter,
+    "jsonl": JsonLinesRowWriter,
+    "markdown": MarkdownRowWriter,
+    "html": HtmlRowWriter,
+}
+"""Formats that can be exported as a stream"""
+
+
+def iter_rows(
+    csv_filenames: t.Iterable[str],
+) -> t.Generator[t.List[t.Optional[str]], None, None]:
+    """Read the movie .csv files row by row
+
+    Args:
+        csv_filenames (t.Iterable[str]): Paths to the .csv files.
+
+    Yields:
+        t.List[t.Optional[str]]: Row values ordered as `field_names`.
+    """
+    for csv_file in csv_filenames:
+        with open_text(csv_file, buffering=buffer_size) as fh:
+            reader = csv.reader(fh)
+            header = next(reader, None)
+            if header is None:
+                continue
+            positions = [header.index(column) for column in field_names]
+            for row in reader:
+                yield [row[position] for position in positions]
+
+
+def stream_export(
+    csv_filenames: t.Iterable[str],
+    formats: t.Iterable[str],
+    output: str,
+) -> t.Dict[str, str]:
+    """Export the .csv files to every format in a single pass with flat memory usage
+
+    Args:
+        csv_filenames (t.Iterable[str]): Paths to the .csv files.
+        formats (t.Iterable[str]): Keys of `row_writers`.
+        output (str): Filename, without extension, under which to save the data.
+
+    Returns:
+        t.Dict[str, str]: Format mapped to the path it was saved to.
+    """
+    handles, writers, saved_to = [], [], {}
+    try:
+        for format in formats:
+            writer_class = row_writers[format]
+            saved_to[format] = output + "." + writer_class.extension
+            fh = open(
+                saved_to[format],
+                "w",
+                newline="" if format == "csv" else None,
+                buffering=buffer_size,
+            )
+            handles.append(fh)
+            writers.append(writer_class(fh))
+        for writer in writers:
+            writer.header()
+        for index, values in enumerate(iter_rows(csv_filenames)):
+            for writer in writers:
+                writer.row(index, values)
+        for writer in writers:
+            writer.footer()
+    finally:
+        for fh in handles:
+            fh.close()
+    return saved_to
@@ -0,0 +1,229 @@
+"""Parsing of the .csv files on a process pool, frames being handed back
+through shared memory as Arrow buffers and rows built by the workers"""
+
+import csv
+import functools
+import typing as t
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from data_hunter.sinks import field_names
+from data_hunter.compression import open_text
+
+
+def arrow_available() -> bool:
+    """Whether pyarrow, needed to share the parsed columns, is installed"""
+    import importlib.util
+
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def read_table(csv_file: str) -> "pyarrow.Table":
+    """Parse a .csv file into an Arrow table of string columns, empty values as nulls"""
+    import pyarrow
+    import pyarrow.csv
+
+    with open_text(csv_file) as fh:
+        header = next(csv.reader(fh), [])
+    return pyarrow.csv.read_csv(
+        csv_file,
+        parse_options=pyarrow.csv.ParseOptions(newlines_in_values=True),
+        convert_options=pyarrow.csv.ConvertOptions(
+            column_types={name: pyarrow.string() for name in header},
+            strings_can_be_null=True,
+        ),
+    )
+
+
+def _parse_to_shared_memory(csv_file: str) -> str:
+    """Parse a .csv file in a worker, writing it to a shared memory block as an
+    Arrow IPC stream. The block is left for the parent to unlink.
+
+    Returns:
+        str: Name of the shared memory block.
+    """
+    import pyarrow
+    import pyarrow.ipc
+    from multiprocessing import shared_memory
+
+    table = read_table(csv_file)
+    size = pyarrow.MockOutputStream()
+    with pyarrow.ipc.new_stream(size, table.schema) as writer:
+        writer.write_table(table)
+    block = shared_memory.SharedMemory(create=True, size=max(size.size(), 1))
+    sink = pyarrow.FixedSizeBufferWriter(pyarrow.py_buffer(block.buf))
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    sink.close()
+    # The block can't be closed while Arrow still holds a view of it
+    del sink, writer
+    block.close()
+    return block.name
+
+
+def _read_shared_memory(name: str) -> "pandas.DataFrame":
+    """Read the frame a worker wrote to a shared memory block, unlinking the block"""
+    import pyarrow
+    import pyarrow.ipc
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        table = pyarrow.ipc.open_stream(pyarrow.py_buffer(block.buf)).read_all()
+        df = to_frame(table)
+        del table
+    finally:
+        block.close()
+        block.unlink()
+    return df
+
+
+def _unlink_shared_memory(name: str) -> None:
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(name=name)
+    block.close()
+    block.unlink()
+
+
+def _parse_rows(csv_file: str) -> t.List[tuple]:
+    """Parse a .csv file into rows of the Movies table in a worker, the parent
+    only unpickling them"""
+    return to_rows(read_table(csv_file))
+
+
+def _parse_pickled(csv_file: str, frame: bool):
+    """Without pyarrow, workers fall back to pickling what they parsed"""
+    if frame:
+        import pandas
+
+        return pandas.read_csv(csv_file)
+    with open_text(csv_file) as fh:
+        return [
+            _to_row(index, [row.get(column) for column in field_names])
+            for index, row in enumerate(csv.DictReader(fh))
+        ]
+
+
+def _to_row(index: int, values: t.List[t.Optional[str]]) -> tuple:
+    """Movies table row, as made by `cli.iter_csv_chunks`"""
+    values = [value or None for value in values]
+    if values[3] and values[3].isdigit():
+        values[3] = int(values[3])
+    return (index, *values)
+
+
+def to_frame(table: "pyarrow.Table") -> "pandas.DataFrame":
+    """Convert a table read by `read_table` into a frame typed as by `pandas.read_csv`"""
+    import numpy
+    import pyarrow
+
+    if "year" in table.column_names:
+        try:
+            table = table.set_column(
+                table.column_names.index("year"),
+                "year",
+                table["year"].cast(pyarrow.int64()),
+            )
+        except pyarrow.ArrowInvalid:
+            pass
+    df = table.to_pandas()
+    strings = [column for column in df.columns if df[column].dtype == object]
+    df[strings] = df[strings].where(df[strings].notna(), numpy.nan)
+    return df
+
+
+def to_rows(table: "pyarrow.Table") -> t.List[tuple]:
+    """Convert a table read by `read_table` into rows of the Movies table"""
+    columns = [
+        table[name].to_pylist() if name in table.column_names else [None] * len(table)
+        for name in field_names
+    ]
+    # Empty values are already nulls, only the year needs converting row by row
+    year = field_names.index("year")
+    columns[year] = [
+        int(value) if value and value.isdigit() else value for value in columns[year]
+    ]
+    return list(zip(range(len(table)), *columns))
+
+
+def _load(
+    csv_filenames: t.List[str],
+    jobs: int,
+    parse: t.Callable[[str], t.Any],
+    receive: t.Callable[[t.Any], t.Any] = lambda parsed: parsed,
+    discard: t.Optional[t.Callable[[t.Any], None]] = None,
+) -> t.Generator[t.Tuple[str, t.Any], None, None]:
+    # Only a window of files is parsed ahead, bounding the memory used while
+    # keeping the output in the order of `csv_filenames`
+    pending = deque()
+    remaining = iter(csv_filenames)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        try:
+            for csv_file in remaining:
+                pending.append((csv_file, executor.submit(parse, csv_file)))
+                if len(pending) == jobs * 2:
+                    break
+            while pending:
+                csv_file, future = pending.popleft()
+                next_file = next(remaining, None)
+                if next_file is not None:
+                    pending.append((next_file, executor.submit(parse, next_file)))
+                yield csv_file, receive(future.result())
+        finally:
+            for _, future in pending:
+                future.cancel()
+            if discard is not None:
+                for _, future in pending:
+                    if not future.cancelled() and future.exception() is None:
+                        discard(future.result())
+
+
+def load_frames(
+    csv_filenames: t.List[str], jobs: int
+) -> t.Generator[t.Tuple[str, "pandas.DataFrame"], None, None]:
+    """Parse .csv files into frames across `jobs` processes
+
+    Args:
+        csv_filenames (t.List[str]): Paths to the .csv files.
+        jobs (int): Number of worker processes.
+
+    Yields:
+        t.Tuple[str, pandas.DataFrame]: Path & contents of every file, in order.
+    """
+    if not arrow_available():
+        yield from _load(
+            csv_filenames, jobs, functools.partial(_parse_pickled, frame=True)
+        )
+        return
+    from multiprocessing import resource_tracker
+
+    # Workers share the tracker of the blocks they create with the parent
+    # unlinking them, rather than each starting one of their own
+    resource_tracker.ensure_running()
+    yield from _load(
+        csv_filenames,
+        jobs,
+        _parse_to_shared_memory,
+        _read_shared_memory,
+        _unlink_shared_memory,
+    )
+
+
+def load_rows(
+    csv_filenames: t.List[str], jobs: int
+) -> t.Generator[t.Tuple[str, t.List[tuple]], None, None]:
+    """Parse .csv files into rows of the Movies table across `jobs` processes
+
+    Args:
+        csv_filenames (t.List[str]): Paths to the .csv files.
+        jobs (int): Number of worker processes.
+
+    Yields:
+        t.Tuple[str, t.List[tuple]]: Path & rows, prefixed with their position, of every file, in order.
+    """
+    if arrow_available():
+        yield from _load(csv_filenames, jobs, _parse_rows)
+    else:
+        yield from _load(
+            csv_filenames, jobs, functools.partial(_parse_pickled, frame=False)
+        )
@@ -1,23 +1,86 @@
 import os
-import csv
+import queue
+import logging
+import threading
 import typing as t
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from fzmovies_api import Search
 from fzmovies_api.filters import MovieGenreFilter
+from data_hunter.constants import available_genres
+from data_hunter.checkpoint import Checkpoint
+from data_hunter.cache import PageCache
+from data_hunter.scheduler import FetchScheduler, RetryBudgetExceeded
+from data_hunter.metrics import metrics
+from data_hunter.delta import PageManifest
+from data_hunter import sinks
 
 
-class MovieDataHunter:
+def prefetched(
+    iterator: t.Iterator[t.Any], depth: int
+) -> t.Generator[t.Any, None, None]:
+    """Pull the items of an iterator on a separate thread, up to `depth` ahead.
+
+    The items are handed over through a bounded queue so that the producer
+    never runs further ahead of a slow consumer. Exceptions raised by the
+    iterator are re-raised to the consumer, and closing the generator stops
+    the producer after the item it is pulling.
+
+    Args:
+        iterator (t.Iterator[t.Any]): Items, e.g. listing pages.
+        depth (int): Items pulled ahead of the consumer.
+
+    Yields:
+        t.Any: Items of the iterator, in order.
+    """
+    assert depth > 0, f"Prefetch depth must be greater than 0 not {depth}"
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
 
-    field_names = (
-        "genre",
-        "category",
-        "title",
-        "year",
-        "distribution",
-        "description",
-        "url",
-        "cover_photo",
+    def produce():
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except Exception as e:
+            put((done, e))
+        finally:
+            # Closed on the thread that runs it
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(
+        target=produce, name="data-hunter-prefetch", daemon=True
     )
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+class MovieDataHunter:
+
+    field_names = sinks.field_names
 
     def __init__(
         self,
@@ -48,6 +111,8 @@ class MovieDataHunter:
             ]
         ] = ["_"],
         categories: t.List[t.Literal["Bollywood", "Hollywood"]] = ["_"],
+        cache: t.Optional[PageCache] = None,
+        scheduler: t.Optional[FetchScheduler] = None,
     ):
         """
 
@@ -57,11 +122,205 @@ class MovieDataHunter:
             'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War', 'Western'], optional):
             Movie genre name. Defaults to "_" (all).
             category (t.Literal["Bollywood", "Hollywood"], optional): Movie category. Defaults to "_" (all).
+            cache (t.Optional[PageCache], optional): Cache of the listing pages fetched. Defaults to None.
+            scheduler (t.Optional[FetchScheduler], optional): Paces, retries and tunes the page requests. Defaults to None.
         """
-        self.genres = MovieGenreFilter.available_genres if genres == ["_"] else genres
+        self.genres = available_genres if genres == ["_"] else genres
         self.categories = (
             ["Hollywood", "Bollywood"] if categories == ["_"] else categories
         )
+        self.cache = cache
+        self.scheduler = scheduler
+
+    def fetch(
+        self, category: str, genre: str, limit: int, prefetch: int = 0
+    ) -> t.Generator[t.List[t.Dict[str, t.Any]], None, None]:
+        """Fetch movies of a particular category and genre page by page.
+
+        Pages are served from the cache, if any, going online only for the
+        pages missing or expired.
+
+        Args:
+            category (str): Movie category.
+            genre (str): Movie genre.
+            limit (int): Total movies (multiple of 20).
+            prefetch (int, optional): Pages requested ahead on a separate thread while
+                the current one is transformed and written. Defaults to 0 (none).
+
+        Yields:
+            t.List[t.Dict[str, t.Any]]: Movies in a page, formatted as dataset rows.
+        """
+        if self.cache is None:
+            yield from self._fetch_online(category, genre, limit, prefetch)
+            return
+        served, number = 0, 0
+        while served < limit:
+            movie_items = self.cache.get(category, genre, number)
+            if movie_items is None:
+                break
+            yield movie_items
+            served += len(movie_items)
+            number += 1
+        if (
+            served >= limit
+            or self.cache.get_pages(category, genre) == number
+            or self.cache.cache_only
+        ):
+            return
+        # Listings can only be paginated from the start, pages already
+        # served from the cache are refreshed rather than yielded again
+        served, pages = 0, 0
+        for movie_items in self._fetch_online(category, genre, limit, prefetch):
+            self.cache.put(category, genre, pages, movie_items)
+            if pages >= number:
+                yield movie_items
+            served += len(movie_items)
+            pages += 1
+        if served < limit:
+            self.cache.put_pages(category, genre, pages)
+
+    def _fetch_online(
+        self, category: str, genre: str, limit: int, prefetch: int = 0
+    ) -> t.Generator[t.List[t.Dict[str, t.Any]], None, None]:
+        if self.scheduler is None:
+            results = self._listing(category, genre, limit)
+        else:
+            results = self.scheduler.run(
+                category, genre, lambda: self._listing(category, genre, limit)
+            )
+        if prefetch:
+            results = prefetched(results, prefetch)
+        try:
+            for result in results:
+                with metrics.timer("transform"):
+                    movie_items = [
+                        dict(
+                            genre=genre,
+                            category=category,
+                            title=movie.title,
+                            year=movie.year,
+                            distribution=movie.distribution,
+                            description=movie.about,
+                            url=movie.url,
+                            cover_photo=movie.cover_photo,
+                        )
+                        for movie in result.movies
+                    ]
+                yield movie_items
+        finally:
+            results.close()
+
+    def _listing(
+        self, category: str, genre: str, limit: int
+    ) -> t.Generator[t.Any, None, None]:
+        """Listing pages as returned by `fzmovies_api`, transformed by the caller"""
+        search = Search(query=MovieGenreFilter(name=genre, category=category))
+        results = iter(search.get_all_results(stream=True, limit=limit))
+        while True:
+            with metrics.timer("fetch", (category, genre)):
+                result = next(results, None)
+            if result is None:
+                return
+            yield result
+
+    def _fetch_pair(
+        self,
+        category: str,
+        genre: str,
+        limit: int,
+        prefetch: int = 0,
+        manifest: t.Optional[PageManifest] = None,
+    ) -> t.Iterator[t.List[t.Dict[str, t.Any]]]:
+        """Pages of a pair, up to the first one unchanged when given the page
+        hashes of the last hunt"""
+        pages = self.fetch(category, genre, limit, prefetch)
+        return (
+            pages if manifest is None else manifest.until_seen(category, genre, pages)
+        )
+
+    def _fetch_sequentially(
+        self,
+        pairs: t.List[t.Tuple[str, str]],
+        limit: int,
+        prefetch: int = 0,
+        manifest: t.Optional[PageManifest] = None,
+    ) -> t.Generator[t.Tuple[str, str, t.Optional[t.List[t.Dict]]], None, None]:
+        """Fetch the (category, genre) pairs one after the other.
+
+        A `None` page marks the end of a pair, a `RetryBudgetExceeded` one a
+        pair given up on.
+        """
+        for category, genre in pairs:
+            try:
+                for rows in self._fetch_pair(
+                    category, genre, limit, prefetch, manifest
+                ):
+                    yield category, genre, rows
+            except RetryBudgetExceeded as e:
+                yield category, genre, e
+                continue
+            yield category, genre, None
+
+    def _fetch_concurrently(
+        self,
+        pairs: t.List[t.Tuple[str, str]],
+        limit: int,
+        workers: int,
+        prefetch: int = 0,
+        manifest: t.Optional[PageManifest] = None,
+    ) -> t.Generator[t.Tuple[str, str, t.Optional[t.List[t.Dict]]], None, None]:
+        """Fetch the (category, genre) pairs on a bounded thread pool.
+
+        Pages are handed over to the consumer through a bounded queue so that
+        slow writers apply backpressure on the fetchers. Pages are marked as in
+        `_fetch_sequentially`.
+        """
+        pages = queue.Queue(maxsize=workers * 2)
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def worker(category: str, genre: str):
+            try:
+                for rows in self._fetch_pair(
+                    category, genre, limit, prefetch, manifest
+                ):
+                    if not put((category, genre, rows)):
+                        return
+                put((category, genre, None))
+            except Exception as e:
+                put((category, genre, e))
+            finally:
+                put((category, genre, done))
+
+        executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="data-hunter"
+        )
+        try:
+            for category, genre in pairs:
+                executor.submit(worker, category, genre)
+            remaining = len(pairs)
+            while remaining:
+                category, genre, rows = pages.get()
+                if rows is done:
+                    remaining -= 1
+                elif isinstance(rows, Exception) and not isinstance(
+                    rows, RetryBudgetExceeded
+                ):
+                    raise rows
+                else:
+                    yield category, genre, rows
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
 
     def hunt(
         self,
@@ -69,6 +328,16 @@ class MovieDataHunter:
         prefix: str = "",
         limit: int = 1_000_000,
         stream: bool = False,
+        workers: int = 1,
+        resume: bool = False,
+        prefetch: int = 0,
+        compression: t.Optional[t.Literal["gzip", "zstd"]] = None,
+        compression_level: t.Optional[int] = None,
+        refresh: bool = False,
+        sink: t.Union[
+            t.Literal["csv", "sqlite", "relational", "parquet", "partitioned"],
+            sinks.Sink,
+        ] = "csv",
     ) -> t.Union[t.Dict, t.Generator[t.Tuple, None, None]]:
         """Hunt down matches and save them to the specified path.
 
@@ -77,63 +346,158 @@ class MovieDataHunter:
             prefix (str, optional): Datasets filename prefix. Defaults to ''.
             limit (int, optional): Total movies (multiple of 20). Defaults to 1_000_000.
             stream (bool, optional): Yield the paths. Defaults to False. Defaults to False.
+            workers (int, optional): Number of (category, genre) pairs to hunt concurrently. Defaults to 1.
+            resume (bool, optional): Keep a checkpoint manifest in `dir` and resume from it, skipping rows already saved. Defaults to False.
+            prefetch (int, optional): Pages of each (category, genre) requested ahead while the previous ones are transformed and written. Defaults to 0 (none).
+            compression (t.Optional[t.Literal["gzip", "zstd"]], optional): Write `.csv.gz` or `.csv.zst` shards with the csv sink. Defaults to None.
+            compression_level (t.Optional[int], optional): Level of the compression codec. Defaults to None (codec's default).
+            refresh (bool, optional): Stop hunting a (category, genre) at the first page unchanged since the last refresh, rewrite only the datasets whose content changed and save the rows added, removed & modified to `<prefix>delta.json`. Defaults to False.
+            sink (t.Union[t.Literal["csv", "sqlite", "relational", "parquet", "partitioned"], sinks.Sink], optional): Where to write the movies to. Defaults to "csv".
 
         Returns:
             t.Union[t.Dict, t.Generator[t.Tuple, None, None]] : Path to datasets harvested.
         """
+        assert workers > 0, f"Workers must be greater than 0 not {workers}"
+        assert prefetch >= 0, f"Prefetch must not be negative not {prefetch}"
+        assert (
+            compression is None or sink == "csv"
+        ), f"Compression is only supported by the csv sink not '{sink}'"
+        assert not refresh or (
+            sink == "csv" and not resume
+        ), "Refreshing is only supported by the csv sink, without resuming"
+        assert (
+            not resume
+            or (sinks.sinks[sink] if isinstance(sink, str) else sink).appendable
+        ), f"Resuming is not supported by the '{sink}' sink, it replaces saved datasets"
 
         def hunt_movies():
+            checkpoint = Checkpoint.in_dir(dir, prefix) if resume else None
+            pairs = []
+            progress: t.Dict[t.Tuple[str, str], t.List[int]] = {}
             for category in self.categories:
                 for genre in self.genres:
-                    movies_count = 0
-                    search = Search(
-                        query=MovieGenreFilter(name=genre, category=category)
+                    pages, movies, completed = (
+                        checkpoint.progress(category, genre)
+                        if checkpoint
+                        else (0, 0, False)
                     )
-                    saved_to = Path(
-                        os.path.join(dir, prefix + genre.casefold() + ".csv")
-                    )
-                    write_mode = "a" if saved_to.exists() else "w"
-                    with open(saved_to, write_mode) as fh:
-                        writer = csv.DictWriter(fh, fieldnames=self.field_names)
-                        if write_mode == "w":
-                            writer.writeheader()
-                        for result in search.get_all_results(stream=True, limit=limit):
-                            movies_count += len(result.movies)
-                            movie_items: t.List[t.Dict[str, str]] = []
-                            for movie in result.movies:
-                                movie_items.append(
-                                    dict(
-                                        genre=genre,
-                                        category=category,
-                                        title=movie.title,
-                                        year=movie.year,
-                                        distribution=movie.distribution,
-                                        description=movie.about,
-                                        url=movie.url,
-                                        cover_photo=movie.cover_photo,
-                                    )
+                    if completed or (checkpoint and movies >= limit):
+                        continue
+                    pairs.append((category, genre))
+                    # [pages to skip, pages seen, movies fetched]
+                    progress[(category, genre)] = [pages, 0, movies]
+            if refresh:
+                writer = sinks.RefreshSink(dir, prefix, compression, compression_level)
+                writer.prepare(pairs)
+            elif compression:
+                writer = sinks.CSVSink(dir, prefix, compression, compression_level)
+            else:
+                writer = (
+                    sinks.sinks[sink](dir, prefix) if isinstance(sink, str) else sink
+                )
+            if checkpoint and checkpoint.is_new and isinstance(writer, sinks.CSVSink):
+                for genre in self.genres:
+                    dataset = writer.path(genre)
+                    if dataset.exists():
+                        checkpoint.seed(dataset)
+            if checkpoint:
+                for category, genre in pairs:
+                    pending = checkpoint.pending(category, genre)
+                    if pending:
+                        # Stopped while writing a page, its rows saved are not
+                        # written again when the page is
+                        checkpoint.reconcile(
+                            category, genre, writer.saved(category, genre, pending)
+                        )
+            manifest = writer.manifest if refresh else None
+            pages = (
+                self._fetch_concurrently(pairs, limit, workers, prefetch, manifest)
+                if workers > 1
+                else self._fetch_sequentially(pairs, limit, prefetch, manifest)
+            )
+            try:
+                with writer:
+                    for category, genre, movie_items in pages:
+                        state = progress[(category, genre)]
+                        if movie_items is None:
+                            if checkpoint and state[2] < limit:
+                                checkpoint.complete(category, genre)
+                            continue
+                        if isinstance(movie_items, RetryBudgetExceeded):
+                            # The other pairs are hunted on, this one is left
+                            # incomplete in the checkpoint to be resumed
+                            logging.warning(
+                                f"Giving up on {category} {genre} movies "
+                                f"after {state[1]} pages - {movie_items}"
+                            )
+                            writer.abandon(category, genre)
+                            if checkpoint:
+                                checkpoint.abandon(category, genre, str(movie_items))
+                            continue
+                        state[1] += 1
+                        if state[1] <= state[0]:
+                            # Page saved by a previous run
+                            continue
+                        state[2] += len(movie_items)
+                        if checkpoint:
+                            movie_items = checkpoint.unsaved(
+                                category, genre, movie_items
+                            )
+                            checkpoint.begin_page(category, genre, movie_items)
+                        with metrics.timer("write"):
+                            saved_to = writer.write(category, genre, movie_items)
+                        if checkpoint:
+                            with metrics.timer("commit"):
+                                writer.flush()
+                                checkpoint.save_page(
+                                    category, genre, state[1], state[2], movie_items
                                 )
-                            writer.writerows(movie_items)
-                            yield category, genre, movies_count, len(
-                                result.movies
-                            ), saved_to
+                        if metrics.enabled:
+                            metrics.count("pages")
+                            metrics.count("rows", len(movie_items))
+                            metrics.count(
+                                "bytes",
+                                sum(
+                                    len(str(value).encode())
+                                    for row in movie_items
+                                    for value in row.values()
+                                    if value is not None
+                                ),
+                            )
+                        yield category, genre, state[2], len(movie_items), saved_to
+                    with metrics.timer("commit"):
+                        writer.flush()
+            finally:
+                if checkpoint:
+                    checkpoint.close()
 
         def default():
             cache = {
                 "total_movies": 0,
+                "movies_count": 0,
                 "category": [],
                 "genres": [],
                 "saved_to": [],
                 "genre_count": {},
             }
+            # movies_count is cumulative per category-genre pair, only the
+            # last one yielded for each pair is summed
+            fetched: t.Dict[t.Tuple[str, str], int] = {}
             for category, genre, movies_count, newly_saved, saved_to in hunt_movies():
                 cache["total_movies"] += newly_saved
-                cache["genre_count"][genre] = movies_count
+                fetched[(category, genre)] = movies_count
+                for key, value in (
+                    ("category", category),
+                    ("genres", genre),
+                    ("saved_to", saved_to),
+                ):
+                    if not value in cache[key]:
+                        cache[key].append(value)
+            for (category, genre), movies_count in fetched.items():
+                cache["genre_count"][genre] = (
+                    cache["genre_count"].get(genre, 0) + movies_count
+                )
                 cache["movies_count"] += movies_count
-                cache["genres"].append(genre)
-                cache["saved_to"].append(saved_to)
-                if not category in cache["category"]:
-                    cache["category"].append(category)
 
             return cache
 
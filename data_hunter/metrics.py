@@ -0,0 +1,196 @@
+"""Per-stage timers, counters and latency histograms of a run"""
+
+import sys
+import json
+import time
+import threading
+import contextlib
+import typing as t
+from pathlib import Path
+
+
+class _Timer:
+    __slots__ = ("metrics", "stage", "labels", "start")
+
+    def __init__(self, metrics: "Metrics", stage: str, labels: t.Optional[t.Tuple]):
+        self.metrics = metrics
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start, self.labels)
+
+
+class Metrics:
+    """Collects the metrics of a run.
+
+    Everything is a no-op until `enable()` is called, so that instrumented
+    code costs no more than an attribute lookup when nobody is looking.
+    """
+
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+    """Upper bounds, in seconds, of the latency histograms buckets"""
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self.stages: t.Dict[str, t.List[float]] = {}
+            self.counters: t.Dict[str, int] = {}
+            self.histograms: t.Dict[t.Tuple[str, t.Tuple], t.List[float]] = {}
+
+    def timer(
+        self, stage: str, labels: t.Optional[t.Tuple[str, ...]] = None
+    ) -> t.ContextManager:
+        """Time the block as part of a stage
+
+        Args:
+            stage (str): Stage name e.g fetch, write.
+            labels (t.Optional[t.Tuple[str, ...]], optional): (category, genre) whose latency histogram to update. Defaults to None.
+
+        Returns:
+            t.ContextManager: Timer of the block.
+        """
+        if not self.enabled:
+            return _disabled
+        return _Timer(self, stage, labels)
+
+    def observe(
+        self, stage: str, seconds: float, labels: t.Optional[t.Tuple] = None
+    ) -> None:
+        """Record a duration of a stage"""
+        if not self.enabled:
+            return
+        with self._lock:
+            totals = self.stages.setdefault(stage, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+            if labels is not None:
+                # [count per bucket..., +Inf count, sum]
+                histogram = self.histograms.setdefault(
+                    (stage, labels), [0] * (len(self.buckets) + 2)
+                )
+                for position, bound in enumerate(self.buckets):
+                    if seconds <= bound:
+                        histogram[position] += 1
+                        break
+                else:
+                    histogram[-2] += 1
+                histogram[-1] += seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """Increment a counter e.g pages, rows, bytes, retries"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        with self._lock:
+            histograms = {}
+            for (stage, labels), histogram in self.histograms.items():
+                cumulative, buckets = 0, {}
+                for bound, count in zip(self.buckets + ("+Inf",), histogram):
+                    cumulative += count
+                    buckets[str(bound)] = cumulative
+                histograms.setdefault(stage, []).append(
+                    dict(
+                        labels=list(labels),
+                        count=cumulative,
+                        sum=histogram[-1],
+                        buckets=buckets,
+                    )
+                )
+            return dict(
+                stages={
+                    stage: dict(count=count, seconds=seconds)
+                    for stage, (count, seconds) in self.stages.items()
+                },
+                counters=dict(self.counters),
+                histograms=histograms,
+            )
+
+    def to_prometheus(self, namespace: str = "data_hunter") -> str:
+        """Render the metrics in Prometheus text exposition format"""
+
+        def escape(value: str) -> str:
+            return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+        metrics = self.to_dict()
+        lines = [
+            f"# TYPE {namespace}_stage_seconds_total counter",
+            *(
+                f'{namespace}_stage_seconds_total{{stage="{escape(stage)}"}} {totals["seconds"]}'
+                for stage, totals in metrics["stages"].items()
+            ),
+            f"# TYPE {namespace}_stage_calls_total counter",
+            *(
+                f'{namespace}_stage_calls_total{{stage="{escape(stage)}"}} {totals["count"]}'
+                for stage, totals in metrics["stages"].items()
+            ),
+        ]
+        for name, value in metrics["counters"].items():
+            lines.append(f"# TYPE {namespace}_{name}_total counter")
+            lines.append(f"{namespace}_{name}_total {value}")
+        for stage, histograms in metrics["histograms"].items():
+            name = f"{namespace}_{stage}_latency_seconds"
+            lines.append(f"# TYPE {name} histogram")
+            for histogram in histograms:
+                labels = 'category="%s",genre="%s"' % tuple(
+                    map(escape, histogram["labels"][:2])
+                )
+                for bound, count in histogram["buckets"].items():
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram['sum']}")
+                lines.append(f"{name}_count{{{labels}}} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: t.Union[Path, str]) -> None:
+        """Save the metrics to a Prometheus textfile (.prom) or else JSON file"""
+        with open(path, "w") as fh:
+            if str(path).endswith(".prom"):
+                fh.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), fh, indent=2)
+
+
+_disabled = contextlib.nullcontext()
+
+metrics = Metrics()
+"""Metrics of the current process"""
+
+
+@contextlib.contextmanager
+def profile(
+    sort: str = "cumulative", limit: int = 30, stream: t.TextIO = sys.stderr
+) -> t.Generator[None, None, None]:
+    """Profile the block with cProfile, printing the sorted stats afterwards
+
+    Args:
+        sort (str, optional): Key to sort the stats by. Defaults to "cumulative".
+        limit (int, optional): Entries to print. Defaults to 30.
+        stream (t.TextIO, optional): Where to print the stats to. Defaults to sys.stderr.
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
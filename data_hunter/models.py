@@ -1,5 +1,4 @@
-"""SQLModels for relational and non-relational tables
-"""
+"""SQLModels for relational and non-relational tables"""
 
 from sqlmodel import SQLModel, Field, Relationship, Column, Text
 
@@ -70,7 +69,8 @@ class Movie(SQLModel, table=True):
         None,
         primary_key=True,
     )
-    title: str | None = Field(None, unique=True)
+    # Unique but for near-duplicates merged by url, remakes sharing a title
+    title: str | None = Field(None, index=True)
     year: int
     distribution: str | None
     description: str | None = Field(None, sa_column=Column(Text, default=None))
@@ -82,3 +82,12 @@ class Movie(SQLModel, table=True):
 
     def __repr__(self):
         return f"{self.title} ({self.year})"
+
+
+relational_tables = [
+    Category.__table__,
+    Genre.__table__,
+    Movie.__table__,
+    MovieGenre.__table__,
+]
+"""Tables making up the relational database"""
@@ -0,0 +1,268 @@
+"""Datasets partitioned as `category=<category>/year=<year>/<genre>.csv` with a manifest"""
+
+import os
+import csv
+import glob
+import json
+import fnmatch
+import typing as t
+from pathlib import Path
+from data_hunter.sinks import field_names, _to_year
+from data_hunter.compression import open_text
+
+unknown_year = "unknown"
+"""Year partition of the movies whose year is missing"""
+
+
+def partition_path(category: str, year: t.Any, genre: str, prefix: str = "") -> str:
+    """Path of a partition relative to the dataset's directory
+
+    Args:
+        category (str): Movie category.
+        year (t.Any): Release year.
+        genre (str): Movie genre.
+        prefix (str, optional): Datasets filename prefix. Defaults to ''.
+
+    Returns:
+        str: e.g `category=Bollywood/year=2014/action.csv`.
+    """
+    year = _to_year(year)
+    return "/".join(
+        (
+            f"category={category}",
+            f"year={unknown_year if year is None else year}",
+            prefix + genre.casefold() + ".csv",
+        )
+    )
+
+
+class PartitionManifest:
+    """Lists every partition of a directory with its row count, byte size and
+    min/max year, for readers to prune and share out partitions without
+    listing or opening any file.
+    """
+
+    filename = "manifest.json"
+
+    def __init__(self, dir: t.Union[Path, str], prefix: str = ""):
+        """
+
+        Args:
+            dir (t.Union[Path, str]): Directory of the partitioned datasets.
+            prefix (str, optional): Datasets filename prefix. Defaults to ''.
+        """
+        self.dir = Path(dir)
+        self.prefix = prefix
+        self.partitions: t.Dict[str, t.Dict[str, t.Any]] = {}
+        if self.path.exists():
+            with open(self.path) as fh:
+                self.partitions = {
+                    partition["path"]: partition
+                    for partition in json.load(fh)["partitions"]
+                }
+
+    @property
+    def path(self) -> Path:
+        return self.dir / (self.prefix + self.filename)
+
+    @classmethod
+    def exists(cls, dir: t.Union[Path, str], prefix: str = "") -> bool:
+        return Path(dir, prefix + cls.filename).exists()
+
+    @classmethod
+    def find(cls, dir: t.Union[Path, str]) -> t.List["PartitionManifest"]:
+        """Manifests of a directory, one per datasets filename prefix"""
+        return [
+            cls(dir, path.name[: -len(cls.filename)])
+            for path in sorted(Path(dir).glob("*" + cls.filename))
+        ]
+
+    def update(
+        self, path: str, category: str, genre: str, years: t.List[t.Optional[int]]
+    ) -> None:
+        """Account for rows appended to a partition
+
+        Args:
+            path (str): Partition path relative to the directory.
+            category (str): Movie category.
+            genre (str): Movie genre.
+            years (t.List[t.Optional[int]]): Years of the rows appended.
+        """
+        partition = self.partitions.setdefault(
+            path,
+            dict(
+                path=path,
+                category=category,
+                genre=genre,
+                rows=0,
+                bytes=0,
+                min_year=None,
+                max_year=None,
+            ),
+        )
+        partition["rows"] += len(years)
+        partition["bytes"] = os.path.getsize(self.dir / path)
+        known = [
+            year
+            for year in (*years, partition["min_year"], partition["max_year"])
+            if year is not None
+        ]
+        if known:
+            partition["min_year"], partition["max_year"] = min(known), max(known)
+
+    def save(self) -> None:
+        """Write the manifest atomically"""
+        temporary = self.path.with_suffix(".tmp")
+        with open(temporary, "w") as fh:
+            json.dump(
+                dict(
+                    layout=["category", "year", "genre"],
+                    format="csv",
+                    partitions=sorted(
+                        self.partitions.values(), key=lambda entry: entry["path"]
+                    ),
+                ),
+                fh,
+                indent=2,
+            )
+        os.replace(temporary, self.path)
+
+    def select(
+        self,
+        categories: t.Iterable[str] = (),
+        genres: t.Iterable[str] = (),
+        years: t.Optional[t.Tuple[int, int]] = None,
+        pattern: str = "*",
+    ) -> t.List[t.Dict[str, t.Any]]:
+        """Partitions that may hold the movies matching all the filters
+
+        Args:
+            categories (t.Iterable[str], optional): Any of these categories. Defaults to () (all).
+            genres (t.Iterable[str], optional): Any of these genres. Defaults to () (all).
+            years (t.Optional[t.Tuple[int, int]], optional): Inclusive range of years. Defaults to None (all).
+            pattern (str, optional): Pattern for the partition's .csv filename. Defaults to "*".
+
+        Returns:
+            t.List[t.Dict[str, t.Any]]: Manifest entries of the partitions, largest first.
+        """
+        categories = {category.casefold() for category in categories}
+        genres = {genre.casefold() for genre in genres}
+        selected = []
+        for partition in self.partitions.values():
+            if categories and partition["category"].casefold() not in categories:
+                continue
+            if genres and partition["genre"].casefold() not in genres:
+                continue
+            if years and (
+                partition["min_year"] is None
+                or partition["max_year"] < years[0]
+                or partition["min_year"] > years[1]
+            ):
+                continue
+            if not fnmatch.fnmatch(Path(partition["path"]).stem, pattern):
+                continue
+            selected.append(partition)
+        # Largest first, for parallel readers to finish around the same time
+        return sorted(selected, key=lambda partition: -partition["bytes"])
+
+    def paths(self, *args, **kwargs) -> t.List[str]:
+        """Absolute paths of the partitions `select`ed"""
+        return [
+            str(self.dir / partition["path"])
+            for partition in self.select(*args, **kwargs)
+        ]
+
+
+def find_partitions(dir: t.Union[Path, str], prefix: str = "") -> t.List[str]:
+    """Paths of the partitions in a directory, listed in its manifest or not"""
+    return sorted(
+        glob.glob(os.path.join(dir, "category=*", "year=*", prefix + "*.csv"))
+    )
+
+
+def clear(dir: t.Union[Path, str], prefix: str = "") -> None:
+    """Remove the partitions of a directory, its manifest and the partition
+    directories left empty"""
+    for path in find_partitions(dir, prefix) + [
+        os.path.join(dir, prefix + PartitionManifest.filename)
+    ]:
+        if os.path.exists(path):
+            os.remove(path)
+    for partition in glob.glob(os.path.join(dir, "category=*", "year=*")) + glob.glob(
+        os.path.join(dir, "category=*")
+    ):
+        if not os.listdir(partition):
+            os.rmdir(partition)
+
+
+def partition(
+    csv_filenames: t.List[str],
+    dir: t.Union[Path, str],
+    prefix: str = "",
+    overwrite: bool = False,
+) -> PartitionManifest:
+    """Rewrite per-genre .csv files into the partitioned layout
+
+    Args:
+        csv_filenames (t.List[str]): Paths to the per-genre .csv files.
+        dir (t.Union[Path, str]): Directory to save the partitions to.
+        prefix (str, optional): Datasets filename prefix. Defaults to ''.
+        overwrite (bool, optional): Replace the partitions already in `dir`, which are refused otherwise. Defaults to False.
+
+    Returns:
+        PartitionManifest: Manifest of the partitions written.
+    """
+    if overwrite:
+        clear(dir, prefix)
+    assert not (
+        PartitionManifest.exists(dir, prefix) or find_partitions(dir, prefix)
+    ), f"Partitions already in '{dir}', overwrite them instead of doubling their rows"
+    manifest = PartitionManifest(dir, prefix)
+    for csv_file in csv_filenames:
+        with open_text(csv_file) as fh:
+            append_rows(
+                manifest,
+                [
+                    {name: row.get(name) or None for name in field_names}
+                    for row in csv.DictReader(fh)
+                ],
+            )
+    manifest.save()
+    return manifest
+
+
+def append_rows(
+    manifest: PartitionManifest, rows: t.List[t.Dict[str, t.Any]]
+) -> t.List[str]:
+    """Append rows to their partitions, updating the manifest but not saving it
+
+    Args:
+        manifest (PartitionManifest): Manifest of the directory to append to.
+        rows (t.List[t.Dict[str, t.Any]]): Movies.
+
+    Returns:
+        t.List[str]: Paths of the partitions appended to, relative to the directory.
+    """
+    grouped: t.Dict[str, t.List[t.Dict[str, t.Any]]] = {}
+    for row in rows:
+        grouped.setdefault(
+            partition_path(row["category"], row["year"], row["genre"], manifest.prefix),
+            [],
+        ).append(row)
+    for path, partition_rows in grouped.items():
+        absolute = manifest.dir / path
+        exists = absolute.exists()
+        if not exists:
+            absolute.parent.mkdir(parents=True, exist_ok=True)
+        with open(absolute, "a" if exists else "w", newline="") as fh:
+            writer = csv.DictWriter(fh, fieldnames=field_names)
+            if not exists:
+                writer.writeheader()
+            writer.writerows(partition_rows)
+        manifest.update(
+            path,
+            partition_rows[0]["category"],
+            partition_rows[0]["genre"],
+            [_to_year(row["year"]) for row in partition_rows],
+        )
+    return list(grouped)
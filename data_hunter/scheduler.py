@@ -0,0 +1,210 @@
+"""Rate-limited, retrying and self-tuning scheduling of listing page fetches"""
+
+import time
+import random
+import threading
+import contextlib
+import typing as t
+from data_hunter.metrics import metrics
+
+
+class RetryBudgetExceeded(Exception):
+    """Raised once a category-genre pair has used up all of its retries"""
+
+
+def transient_errors() -> t.Tuple[t.Type[Exception], ...]:
+    """Network and HTTP errors worth retrying, those of requests included when
+    it is installed"""
+    errors: t.Tuple[t.Type[Exception], ...] = (ConnectionError, TimeoutError)
+    try:
+        import requests
+    except ImportError:
+        return errors
+    return errors + (requests.RequestException,)
+
+
+class FetchScheduler:
+    """Paces the requests made while hunting.
+
+    - A token bucket caps the request rate.
+    - Transient failures are retried after an exponential backoff with full
+      jitter, within a retry budget per category-genre pair that every page
+      fetched earns a retry back to.
+    - The number of requests in flight adapts AIMD-style: it grows additively
+      while responses are healthy and is halved on every failure.
+    """
+
+    def __init__(
+        self,
+        rate: t.Optional[float] = None,
+        burst: int = 1,
+        max_concurrency: int = 8,
+        retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        retry_on: t.Optional[t.Tuple[t.Type[Exception], ...]] = None,
+        sleep: t.Callable[[float], None] = time.sleep,
+        clock: t.Callable[[], float] = time.monotonic,
+    ):
+        """
+
+        Args:
+            rate (t.Optional[float], optional): Requests per second, None for unlimited. Defaults to None.
+            burst (int, optional): Requests that can be made at once after idling. Defaults to 1.
+            max_concurrency (int, optional): Upper bound of requests in flight. Defaults to 8.
+            retries (int, optional): Retries a category-genre pair can have spent at once. Defaults to 3.
+            backoff (float, optional): Base seconds of the exponential backoff. Defaults to 1.0.
+            max_backoff (float, optional): Longest backoff in seconds. Defaults to 60.0.
+            retry_on (t.Optional[t.Tuple[t.Type[Exception], ...]], optional): Exceptions considered transient. Defaults to None (`transient_errors()`).
+            sleep (t.Callable[[float], None], optional): Sleeping function. Defaults to time.sleep.
+            clock (t.Callable[[], float], optional): Monotonic clock. Defaults to time.monotonic.
+        """
+        assert rate is None or rate > 0, f"Rate must be greater than 0 not {rate}"
+        assert max_concurrency > 0, "Maximum concurrency must be greater than 0"
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = transient_errors() if retry_on is None else retry_on
+        self.sleep = sleep
+        self.clock = clock
+        self.concurrency = float(max_concurrency)
+        self._tokens = float(burst)
+        self._refilled_at = clock()
+        self._in_flight = 0
+        self._budgets: t.Dict[t.Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+        self._stats = dict(
+            requests=0,
+            failures=0,
+            retries=0,
+            abandoned=0,
+            throttled_seconds=0.0,
+            backoff_seconds=0.0,
+            max_in_flight=0,
+        )
+
+    @property
+    def stats(self) -> t.Dict[str, t.Any]:
+        """Counters for tuning the throughput"""
+        with self._lock:
+            return dict(
+                self._stats,
+                concurrency=round(self.concurrency, 2),
+                in_flight=self._in_flight,
+                retry_budgets=dict(self._budgets),
+            )
+
+    def _take_token(self) -> None:
+        if self.rate is None:
+            return
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._refilled_at) * self.rate
+                )
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+                self._stats["throttled_seconds"] += wait
+            self.sleep(wait)
+
+    @contextlib.contextmanager
+    def request(self):
+        """Hold a request slot and a rate token for the duration of a request"""
+        with self._slots:
+            while self._in_flight >= max(1, int(self.concurrency)):
+                self._slots.wait()
+            self._in_flight += 1
+            self._stats["requests"] += 1
+            self._stats["max_in_flight"] = max(
+                self._stats["max_in_flight"], self._in_flight
+            )
+        healthy = False
+        try:
+            self._take_token()
+            yield
+            healthy = True
+        finally:
+            with self._slots:
+                self._in_flight -= 1
+                if healthy:
+                    self.concurrency = min(
+                        self.max_concurrency, self.concurrency + 1 / self.concurrency
+                    )
+                else:
+                    self._stats["failures"] += 1
+                    metrics.count("failures")
+                    self.concurrency = max(1.0, self.concurrency / 2)
+                self._slots.notify_all()
+
+    def _spend_retry(
+        self, pair: t.Tuple[str, str], error: Exception, attempt: int
+    ) -> None:
+        with self._lock:
+            budget = self._budgets.setdefault(pair, self.retries)
+            if budget <= 0:
+                self._stats["abandoned"] += 1
+                raise RetryBudgetExceeded(
+                    "Retries for %s - %s exhausted - %s" % (*pair, error)
+                ) from error
+            self._budgets[pair] = budget - 1
+            self._stats["retries"] += 1
+            metrics.count("retries")
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+            self._stats["backoff_seconds"] += delay
+        self.sleep(delay)
+
+    def _earn_retry(self, pair: t.Tuple[str, str]) -> None:
+        with self._lock:
+            if pair in self._budgets:
+                self._budgets[pair] = min(self.retries, self._budgets[pair] + 1)
+
+    def run(
+        self,
+        category: str,
+        genre: str,
+        listing: t.Callable[[], t.Iterator[t.Any]],
+    ) -> t.Generator[t.Any, None, None]:
+        """Pull the pages of a listing under the scheduler's control.
+
+        A failed listing is restarted, skipping the pages already yielded, as
+        listings can only be paginated from the start.
+
+        Args:
+            category (str): Category of the listing.
+            genre (str): Genre of the listing, the pair's retry budget being drawn from.
+            listing (t.Callable[[], t.Iterator[t.Any]]): Creates a fresh page iterator.
+
+        Yields:
+            t.Any: Pages of the listing.
+        """
+        pair = (category, genre)
+        yielded, attempt = 0, 0
+        while True:
+            pages = listing()
+            position = 0
+            try:
+                while True:
+                    with self.request():
+                        try:
+                            page = next(pages)
+                        except StopIteration:
+                            return
+                    position += 1
+                    if position > yielded:
+                        yielded += 1
+                        attempt = 0
+                        self._earn_retry(pair)
+                        yield page
+            except self.retry_on as e:
+                if isinstance(e, RetryBudgetExceeded):
+                    raise
+                self._spend_retry(pair, e, attempt)
+                attempt += 1
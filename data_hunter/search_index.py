@@ -0,0 +1,245 @@
+"""SQLite FTS5 full-text search over movie titles and descriptions"""
+
+import re
+import time
+import sqlite3
+import typing as t
+from pathlib import Path
+
+
+class SearchIndex:
+    """Full-text index kept inside the movies database.
+
+    Works with both the flat `Movies` table generated by `create_db` and the
+    relational `movie` table generated by `relate_tables`. The index is
+    contentless, holding a single entry per movie url, and is extended
+    incrementally with rows added after the last update. Triggers on the
+    movies table drop the entries of rows updated or deleted since, logging
+    them to be indexed again.
+    """
+
+    table = "movies_fts"
+    state_table = "movies_fts_state"
+    stale_table = "movies_fts_stale"
+    triggers = ("movies_fts_on_update", "movies_fts_on_delete")
+
+    def __init__(self, db_path: t.Union[Path, str]):
+        """
+
+        Args:
+            db_path (t.Union[Path, str]): Path to the movies database.
+        """
+        self.conn = sqlite3.connect(db_path)
+        tables = {
+            entry[0]
+            for entry in self.conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+        if "movie" in tables:
+            self.relational = True
+            self.source, self.key, self.stale_key = "movie", "id", "id"
+        elif "Movies" in tables:
+            self.relational = False
+            # The entry of a url is the first of its rows
+            self.source, self.key, self.stale_key = "Movies", "rowid", "url"
+        else:
+            raise ValueError(f"No movies table found in the database '{db_path}'")
+
+    def update(self, rebuild: bool = False) -> int:
+        """Index the movies added, updated or deleted since the last update
+
+        Args:
+            rebuild (bool, optional): Drop the index and build it afresh. Defaults to False.
+
+        Returns:
+            int: Movies indexed.
+        """
+        with self.conn:
+            existing = {
+                entry[0]
+                for entry in self.conn.execute("SELECT name FROM sqlite_master")
+            }
+            # Changes made while the triggers were missing can't be told apart
+            if self.table in existing and not existing.issuperset(self.triggers):
+                rebuild = True
+            if rebuild:
+                for trigger in self.triggers:
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                self.conn.execute(f"DROP TABLE IF EXISTS {self.table}")
+                self.conn.execute(f"DROP TABLE IF EXISTS {self.state_table}")
+                self.conn.execute(f"DROP TABLE IF EXISTS {self.stale_table}")
+            self.conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                "title, description, content='', "
+                "tokenize='porter unicode61 remove_diacritics 2')"
+            )
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.state_table} "
+                "(id INTEGER PRIMARY KEY CHECK (id = 0), last_indexed INTEGER NOT NULL)"
+            )
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.stale_table} "
+                "(key NOT NULL PRIMARY KEY)"
+            )
+            # Contentless entries are deleted by giving the values they were
+            # indexed with, only known to the triggers
+            for trigger, event in zip(
+                self.triggers, ("UPDATE OF title, description", "DELETE")
+            ):
+                self.conn.execute(
+                    f"CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event} "
+                    f"ON {self.source} WHEN EXISTS (SELECT 1 FROM {self.table} "
+                    f"WHERE rowid = old.{self.key}) BEGIN "
+                    f"INSERT INTO {self.table} ({self.table}, rowid, title, description) "
+                    f"VALUES ('delete', old.{self.key}, old.title, "
+                    "coalesce(old.description, '')); "
+                    f"INSERT OR IGNORE INTO {self.stale_table} (key) "
+                    f"VALUES (old.{self.stale_key}); END"
+                )
+            entry = self.conn.execute(
+                f"SELECT last_indexed FROM {self.state_table}"
+            ).fetchone()
+            last_indexed = entry[0] if entry else 0
+            if self.relational:
+                stale = self.conn.execute(
+                    f"INSERT INTO {self.table} (rowid, title, description) "
+                    "SELECT id, title, coalesce(description, '') FROM movie "
+                    f"WHERE id <= ? AND id IN (SELECT key FROM {self.stale_table})",
+                    (last_indexed,),
+                )
+                reindexed = stale.rowcount
+                cursor = self.conn.execute(
+                    f"INSERT INTO {self.table} (rowid, title, description) "
+                    "SELECT id, title, coalesce(description, '') FROM movie "
+                    "WHERE id > ?",
+                    (last_indexed,),
+                )
+            else:
+                self.conn.execute(
+                    'CREATE INDEX IF NOT EXISTS "ix_Movies_url" ON "Movies" ("url")'
+                )
+                # Movies listed under several genres are indexed once, by
+                # their first row
+                stale = self.conn.execute(
+                    f"INSERT INTO {self.table} (rowid, title, description) "
+                    "SELECT m.rowid, m.title, coalesce(m.description, '') FROM Movies m "
+                    f"WHERE m.rowid <= ? AND m.url IN (SELECT key FROM {self.stale_table}) "
+                    "AND NOT EXISTS (SELECT 1 FROM Movies p "
+                    "WHERE p.url = m.url AND p.rowid < m.rowid)",
+                    (last_indexed,),
+                )
+                reindexed = stale.rowcount
+                cursor = self.conn.execute(
+                    f"INSERT INTO {self.table} (rowid, title, description) "
+                    "SELECT m.rowid, m.title, coalesce(m.description, '') FROM Movies m "
+                    "WHERE m.rowid > ? AND NOT EXISTS (SELECT 1 FROM Movies p "
+                    "WHERE p.url = m.url AND p.rowid < m.rowid)",
+                    (last_indexed,),
+                )
+            indexed = reindexed + cursor.rowcount
+            self.conn.execute(f"DELETE FROM {self.stale_table}")
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {self.state_table} (id, last_indexed) "
+                f"SELECT 0, max(?, coalesce(max({self.key}), 0)) FROM {self.source}",
+                (last_indexed,),
+            )
+        return indexed
+
+    @staticmethod
+    def to_match_expression(query: str) -> str:
+        """Quote every term of a plain query so that FTS5 syntax is not required"""
+        terms = re.findall(r"\w+", query)
+        assert terms, f"Search query '{query}' has no searchable terms"
+        return " ".join(f'"{term}"' for term in terms)
+
+    def search(
+        self,
+        query: str,
+        genres: t.Optional[t.Iterable[str]] = None,
+        categories: t.Optional[t.Iterable[str]] = None,
+        years: t.Optional[t.Tuple[int, int]] = None,
+        limit: int = 10,
+        raw: bool = False,
+    ) -> t.Tuple[t.List[t.Dict[str, t.Any]], float]:
+        """Find the movies best matching the query
+
+        Args:
+            query (str): Terms to look up in titles and descriptions.
+            genres (t.Iterable[str], optional): Restrict to movies in any of these genres. Defaults to None.
+            categories (t.Iterable[str], optional): Restrict to these categories. Defaults to None.
+            years (t.Tuple[int, int], optional): Inclusive range of release years. Defaults to None.
+            limit (int, optional): Maximum results. Defaults to 10.
+            raw (bool, optional): Treat the query as an FTS5 expression. Defaults to False.
+
+        Returns:
+            t.Tuple[t.List[t.Dict[str, t.Any]], float]: Ranked results and the query latency in seconds.
+        """
+        expression = query if raw else self.to_match_expression(query)
+        genres, categories = list(genres or []), list(categories or [])
+        conditions, params = [f"{self.table} MATCH ?"], [expression]
+        if self.relational:
+            select = (
+                "SELECT m.title, m.year, c.name, "
+                "(SELECT group_concat(g.name, ', ') FROM movie_genre mg "
+                "JOIN genre g ON g.id = mg.genre_id WHERE mg.movie_id = m.id), "
+                f"m.url, bm25({self.table}) AS score FROM {self.table} f "
+                "JOIN movie m ON m.id = f.rowid "
+                "LEFT JOIN category c ON c.id = m.category_id"
+            )
+            if genres:
+                conditions.append(
+                    "EXISTS (SELECT 1 FROM movie_genre mg JOIN genre g "
+                    "ON g.id = mg.genre_id WHERE mg.movie_id = m.id "
+                    f"AND g.name IN ({','.join('?' * len(genres))}))"
+                )
+                params.extend(genres)
+            if categories:
+                conditions.append(f"c.name IN ({','.join('?' * len(categories))})")
+                params.extend(categories)
+        else:
+            select = (
+                "SELECT m.title, m.year, m.category, "
+                "(SELECT group_concat(genre, ', ') FROM (SELECT DISTINCT genre "
+                "FROM Movies g WHERE g.url = m.url)), "
+                f"m.url, bm25({self.table}) AS score FROM {self.table} f "
+                "JOIN Movies m ON m.rowid = f.rowid"
+            )
+            if genres:
+                conditions.append(
+                    "EXISTS (SELECT 1 FROM Movies g WHERE g.url = m.url "
+                    f"AND g.genre IN ({','.join('?' * len(genres))}))"
+                )
+                params.extend(genres)
+            if categories:
+                conditions.append(f"m.category IN ({','.join('?' * len(categories))})")
+                params.extend(categories)
+        if years is not None:
+            conditions.append("m.year BETWEEN ? AND ?")
+            params.extend(years)
+        start = time.perf_counter()
+        rows = self.conn.execute(
+            f"{select} WHERE {' AND '.join(conditions)} ORDER BY score LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        latency = time.perf_counter() - start
+        return [
+            dict(
+                title=title,
+                year=year,
+                category=category,
+                genres=genres,
+                url=url,
+                score=-score,
+            )
+            for title, year, category, genres, url, score in rows
+        ], latency
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
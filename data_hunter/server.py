@@ -0,0 +1,427 @@
+"""Read-only HTTP JSON API over the relational movies database"""
+
+import json
+import queue
+import logging
+import asyncio
+import sqlite3
+import contextlib
+import typing as t
+from pathlib import Path
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+movie_projection = (
+    "m.id, m.title, m.year, m.distribution, m.description, m.url, m.cover_photo, "
+    "c.name, (SELECT group_concat(g.name, ',') FROM movie_genre mg "
+    "JOIN genre g ON g.id = mg.genre_id WHERE mg.movie_id = m.id)"
+)
+"""Relational columns of a movie selected by the API, its category & genres joined"""
+movie_source = "FROM movie m LEFT JOIN category c ON c.id = m.category_id"
+
+queries = dict(
+    by_id=f"SELECT {movie_projection} {movie_source} WHERE m.id = ?",
+    by_url=f"SELECT {movie_projection} {movie_source} WHERE m.url = ?",
+    genres="SELECT name FROM genre ORDER BY name",
+    categories="SELECT name FROM category ORDER BY name",
+    search_fts=(
+        f"SELECT {movie_projection} FROM movies_fts f JOIN movie m ON m.id = f.rowid "
+        "LEFT JOIN category c ON c.id = m.category_id WHERE movies_fts MATCH ? "
+        "ORDER BY bm25(movies_fts, 10.0, 1.0) LIMIT ?"
+    ),
+    search_like=(
+        f"SELECT {movie_projection} {movie_source} WHERE m.title LIKE ? ESCAPE '\\' "
+        "ORDER BY m.id LIMIT ?"
+    ),
+)
+"""Statements reused verbatim so that every pooled connection prepares them once"""
+
+filters = dict(
+    genre=(
+        "EXISTS (SELECT 1 FROM movie_genre mg JOIN genre g ON g.id = mg.genre_id "
+        "WHERE mg.movie_id = m.id AND g.name = ? COLLATE NOCASE)"
+    ),
+    category="c.name = ? COLLATE NOCASE",
+    year_from="m.year >= ?",
+    year_to="m.year <= ?",
+)
+"""Conditions of the movies listing, combined in this order"""
+
+
+class HTTPError(Exception):
+    """Raised to answer a request with an error status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(status, message)
+        self.status = status
+        self.message = message
+
+
+class ConnectionPool:
+    """Read-only SQLite connections shared by the request handlers.
+
+    Queries run on a thread pool of the same size, off the event loop.
+    """
+
+    def __init__(self, db_path: t.Union[Path, str], size: int = 4):
+        """
+
+        Args:
+            db_path (t.Union[Path, str]): Path to the relational database.
+            size (int, optional): Number of connections. Defaults to 4.
+        """
+        assert size > 0, f"Pool size must be greater than 0 not {size}"
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        for _ in range(size):
+            conn = sqlite3.connect(
+                f"{Path(db_path).resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+                cached_statements=256,
+            )
+            conn.execute("PRAGMA query_only = ON")
+            self._connections.put(conn)
+        self.size = size
+        self.executor = ThreadPoolExecutor(
+            max_workers=size, thread_name_prefix="data-hunter-db"
+        )
+
+    @contextlib.contextmanager
+    def connection(self) -> t.Generator[sqlite3.Connection, None, None]:
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    async def run(self, function: t.Callable[[sqlite3.Connection], t.Any]) -> t.Any:
+        """Call `function` with a pooled connection on the pool's threads"""
+
+        def call():
+            with self.connection() as conn:
+                return function(conn)
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        for _ in range(self.size):
+            self._connections.get().close()
+
+
+class ResponseCache:
+    """LRU cache of response bodies, cleared whenever the database file changes"""
+
+    def __init__(self, db_path: t.Union[Path, str], max_entries: int = 1024):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._version = self.version()
+
+    def version(self) -> t.Tuple:
+        """Modification time & size of the database and its write-ahead log"""
+        version = []
+        for path in (self.db_path, self.db_path.with_name(self.db_path.name + "-wal")):
+            try:
+                stat = path.stat()
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                version.append(None)
+        return tuple(version)
+
+    def get(self, key: str) -> t.Optional[bytes]:
+        version = self.version()
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return body
+
+    def put(self, key: str, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = body
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class MovieServer:
+    """Serves the movies of a `relate_tables` database.
+
+    Routes:
+        - `GET /movies/<id>` and `GET /movies?url=<url>` look a movie up.
+        - `GET /movies?genre=&category=&year_from=&year_to=&limit=&after=`
+          lists movies ordered by id, `after` being the `next` cursor of the
+          previous page.
+        - `GET /search?q=&limit=` ranks movies by title (and description when
+          the database has an FTS5 index, see `SearchIndex`).
+        - `GET /genres`, `GET /categories` and `GET /health`.
+    """
+
+    max_limit = 500
+
+    def __init__(
+        self,
+        db_path: t.Union[Path, str],
+        pool_size: int = 4,
+        cache_size: int = 1024,
+    ):
+        """
+
+        Args:
+            db_path (t.Union[Path, str]): Path to the relational database.
+            pool_size (int, optional): Number of read-only connections. Defaults to 4.
+            cache_size (int, optional): Responses kept in the LRU cache. Defaults to 1024.
+        """
+        conn = sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            tables = {
+                entry[0]
+                for entry in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+            indexed = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'movie_genre' AND sql LIKE '%(movie_id%'"
+            ).fetchone()
+        finally:
+            conn.close()
+        if "movie" not in tables:
+            raise ValueError(f"No relational movie table found in '{db_path}'")
+        if not indexed:
+            logging.warning(
+                "movie_genre has no index on movie_id, genres will be slow to look up "
+                "- relate the tables again to add it"
+            )
+        self.fts = "movies_fts" in tables
+        self.pool = ConnectionPool(db_path, pool_size)
+        self.cache = ResponseCache(db_path, cache_size)
+        self.server: t.Optional[asyncio.AbstractServer] = None
+
+    @staticmethod
+    def to_movie(row: tuple) -> t.Dict[str, t.Any]:
+        id, title, year, distribution, description, url, cover_photo = row[:7]
+        category, genres = row[7:]
+        return dict(
+            id=id,
+            title=title,
+            year=year,
+            distribution=distribution,
+            description=description,
+            url=url,
+            cover_photo=cover_photo,
+            category=category,
+            genres=sorted(genres.split(",")) if genres else [],
+        )
+
+    @staticmethod
+    def _integer(params: t.Dict[str, str], name: str) -> t.Optional[int]:
+        if name not in params:
+            return None
+        try:
+            return int(params[name])
+        except ValueError:
+            raise HTTPError(400, f"Parameter '{name}' must be an integer")
+
+    def _limit(self, params: t.Dict[str, str], default: int = 20) -> int:
+        limit = self._integer(params, "limit")
+        if limit is None:
+            return default
+        if not 0 < limit <= self.max_limit:
+            raise HTTPError(400, f"Parameter 'limit' must be within 1-{self.max_limit}")
+        return limit
+
+    async def route(self, path: str, params: t.Dict[str, str]) -> t.Any:
+        """Resolve a request to the JSON-serialisable payload of its response"""
+        parts = [part for part in path.split("/") if part]
+        if parts == ["health"]:
+            return dict(status="ok")
+        if parts in (["genres"], ["categories"]):
+            rows = await self.pool.run(
+                lambda conn: conn.execute(queries[parts[0]]).fetchall()
+            )
+            return [name for (name,) in rows]
+        if parts and parts[0] == "movies" and len(parts) == 2:
+            if not parts[1].isdigit():
+                raise HTTPError(404, f"No movie with id '{parts[1]}'")
+            row = await self.pool.run(
+                lambda conn: conn.execute(queries["by_id"], (int(parts[1]),)).fetchone()
+            )
+            if row is None:
+                raise HTTPError(404, f"No movie with id '{parts[1]}'")
+            return self.to_movie(row)
+        if parts == ["movies"] and "url" in params:
+            row = await self.pool.run(
+                lambda conn: conn.execute(
+                    queries["by_url"], (params["url"],)
+                ).fetchone()
+            )
+            if row is None:
+                raise HTTPError(404, f"No movie with url '{params['url']}'")
+            return self.to_movie(row)
+        if parts == ["movies"]:
+            return await self.list_movies(params)
+        if parts == ["search"]:
+            return await self.search(params)
+        raise HTTPError(404, f"No route for '{path}'")
+
+    async def list_movies(self, params: t.Dict[str, str]) -> t.Dict[str, t.Any]:
+        limit = self._limit(params)
+        after = self._integer(params, "after") or 0
+        conditions, values = ["m.id > ?"], [after]
+        for name, condition in filters.items():
+            if name in params:
+                conditions.append(condition)
+                values.append(
+                    self._integer(params, name)
+                    if name.startswith("year")
+                    else params[name]
+                )
+        # Keyset pagination, a page past the millionth costs the same as the first
+        statement = (
+            f"SELECT {movie_projection} {movie_source} "
+            f"WHERE {' AND '.join(conditions)} ORDER BY m.id LIMIT ?"
+        )
+        rows = await self.pool.run(
+            lambda conn: conn.execute(statement, (*values, limit + 1)).fetchall()
+        )
+        movies = [self.to_movie(row) for row in rows[:limit]]
+        return dict(
+            movies=movies,
+            next=movies[-1]["id"] if len(rows) > limit else None,
+        )
+
+    async def search(self, params: t.Dict[str, str]) -> t.Dict[str, t.Any]:
+        query = params.get("q", "").strip()
+        if not query:
+            raise HTTPError(400, "Parameter 'q' is required")
+        limit = self._limit(params, 10)
+        if self.fts:
+            from data_hunter.search_index import SearchIndex
+
+            try:
+                expression = SearchIndex.to_match_expression(query)
+            except AssertionError as e:
+                raise HTTPError(400, str(e))
+            statement, value = queries["search_fts"], expression
+        else:
+            escaped = (
+                query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            )
+            statement, value = queries["search_like"], f"%{escaped}%"
+        rows = await self.pool.run(
+            lambda conn: conn.execute(statement, (value, limit)).fetchall()
+        )
+        return dict(movies=[self.to_movie(row) for row in rows])
+
+    async def respond(self, method: str, target: str) -> t.Tuple[int, bytes]:
+        """Answer a request, through the response cache
+
+        Returns:
+            t.Tuple[int, bytes]: Status & JSON body.
+        """
+        if method not in ("GET", "HEAD"):
+            return 405, json.dumps(dict(error=f"Method {method} not allowed")).encode()
+        body = self.cache.get(target)
+        if body is not None:
+            return 200, body
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            payload = await self.route(url.path, params)
+        except HTTPError as e:
+            return e.status, json.dumps(dict(error=e.message)).encode()
+        body = json.dumps(payload).encode()
+        self.cache.put(target, body)
+        return 200, body
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve the requests of a connection, keeping it alive as HTTP/1.1 does"""
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found"}
+        reasons.update({405: "Method Not Allowed", 500: "Internal Server Error"})
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+                keep_alive = (
+                    headers.get("connection") != "close"
+                    if version == "HTTP/1.1"
+                    else headers.get("connection") == "keep-alive"
+                )
+                length = headers.get("content-length", "0")
+                if "transfer-encoding" in headers or not length.isdigit():
+                    # The end of the body, and so the next request, can't be found
+                    status, keep_alive = 400, False
+                    body = json.dumps(
+                        dict(error="Request body without a valid Content-Length")
+                    ).encode()
+                else:
+                    # Bodies are ignored, but read past for the next request
+                    remaining = int(length)
+                    while remaining:
+                        remaining -= len(
+                            await reader.readexactly(min(remaining, 1 << 16))
+                        )
+                    try:
+                        status, body = await self.respond(method, target)
+                    except Exception as e:
+                        status, body = 500, json.dumps(dict(error=str(e))).encode()
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {reasons.get(status, '')}\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(body)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                        "\r\n"
+                    ).encode()
+                    + (body if method != "HEAD" else b"")
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        self.server = await asyncio.start_server(self.handle, host, port)
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        await self.start(host, port)
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.pool.close()
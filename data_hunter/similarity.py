@@ -0,0 +1,306 @@
+"""TF-IDF similarity of movies over their titles and descriptions
+
+Requires scipy.
+"""
+
+import os
+import re
+import json
+import secrets
+import typing as t
+from pathlib import Path
+import numpy
+import scipy.sparse
+from data_hunter.dataset import MovieDataset
+
+stop_words = frozenset(
+    (
+        "a an and are as at be by for from has he her his in is it its of on or "
+        "she that the their them they this to was were who will with more tags"
+    ).split()
+)
+"""Terms too common to tell movies apart, `more` ending truncated descriptions"""
+
+
+def tokenize(text: t.Optional[str]) -> t.List[str]:
+    return [
+        term
+        for term in re.findall(r"[a-z0-9]+", (text or "").lower())
+        if len(term) > 1 and term not in stop_words
+    ]
+
+
+class SimilarityIndex:
+    """Sparse matrix of the term counts of every movie, weighted into
+    L2-normalised TF-IDF vectors when queried.
+
+    Counts rather than weights are persisted, so that movies can be added
+    without tokenizing the others again, the weights being recomputed from
+    the updated document frequencies in a single vectorized pass.
+    """
+
+    version = 2
+    title_weight = 2
+    """Times the title terms are counted relative to the description's"""
+
+    def __init__(self, index_dir: t.Union[Path, str]):
+        """
+
+        Args:
+            index_dir (t.Union[Path, str]): Directory the index is kept in.
+        """
+        self.index_dir = Path(index_dir)
+        self.urls: t.List[str] = []
+        self.titles: t.List[str] = []
+        self.terms: t.Dict[str, int] = {}
+        self.categories: t.List[str] = []
+        self.genre_masks = numpy.zeros(0, dtype=numpy.uint32)
+        self.category_codes = numpy.zeros(0, dtype=numpy.uint8)
+        self.counts = scipy.sparse.csr_matrix((0, 0), dtype=numpy.float32)
+        self._matrix: t.Optional[scipy.sparse.csr_matrix] = None
+        self._positions: t.Optional[t.Dict[str, int]] = None
+        metadata_path = self.index_dir / "index.json"
+        if metadata_path.exists():
+            with open(metadata_path) as fh:
+                metadata = json.load(fh)
+            if metadata.get("version") == self.version:
+                self.urls = metadata["urls"]
+                self.titles = metadata["titles"]
+                self.terms = {
+                    term: column for column, term in enumerate(metadata["terms"])
+                }
+                self.categories = metadata["categories"]
+                generation = metadata["generation"]
+                self.counts = scipy.sparse.load_npz(
+                    self.index_dir / f"{generation}.counts.npz"
+                )
+                with numpy.load(
+                    self.index_dir / f"{generation}.columns.npz"
+                ) as columns:
+                    self.genre_masks = columns["genre_masks"]
+                    self.category_codes = columns["category_codes"]
+
+    @classmethod
+    def in_dir(
+        cls, directory: t.Union[Path, str], pattern: str = "*"
+    ) -> "SimilarityIndex":
+        """Index kept alongside the .csv files of a directory"""
+        import hashlib
+
+        return cls(
+            Path(
+                directory,
+                ".movies-cache",
+                "similarity-" + hashlib.sha1(pattern.encode()).hexdigest()[:12],
+            )
+        )
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    @property
+    def positions(self) -> t.Dict[str, int]:
+        """Movie url mapped to its row"""
+        if self._positions is None:
+            self._positions = {url: position for position, url in enumerate(self.urls)}
+        return self._positions
+
+    def add(self, dataset: MovieDataset) -> int:
+        """Index the movies of a dataset that aren't indexed yet, the text of
+        those already indexed being left as is
+
+        Args:
+            dataset (MovieDataset): Movies to index.
+
+        Returns:
+            int: Movies added.
+        """
+        positions, indexed, rows = [], [], []
+        for position, url in enumerate(dataset.urls):
+            row = self.positions.get(url)
+            if row is None:
+                positions.append(position)
+            else:
+                indexed.append(position)
+                rows.append(row)
+        # Movies already indexed may have been listed under other genres since
+        self.genre_masks[rows] |= numpy.asarray(dataset.genre_masks)[indexed]
+        if not positions:
+            return 0
+        indptr, indices, data = [0], [], []
+        for position in positions:
+            counts: t.Dict[int, int] = {}
+            for weight, text in (
+                (self.title_weight, dataset.titles[position]),
+                (1, dataset.descriptions[position]),
+            ):
+                for term in tokenize(text):
+                    column = self.terms.setdefault(term, len(self.terms))
+                    counts[column] = counts.get(column, 0) + weight
+            indices.extend(counts)
+            data.extend(counts.values())
+            indptr.append(len(indices))
+        added = scipy.sparse.csr_matrix(
+            (
+                numpy.array(data, dtype=numpy.float32),
+                numpy.array(indices, dtype=numpy.int32),
+                numpy.array(indptr, dtype=numpy.int64),
+            ),
+            shape=(len(positions), len(self.terms)),
+        )
+        self.counts.resize((self.counts.shape[0], len(self.terms)))
+        self.counts = scipy.sparse.vstack([self.counts, added], format="csr")
+        codes = {category: code for code, category in enumerate(self.categories)}
+        for category in dataset.categories:
+            codes.setdefault(category, len(codes))
+        self.categories = list(codes)
+        self.category_codes = numpy.concatenate(
+            [
+                self.category_codes,
+                numpy.array(
+                    [
+                        codes[dataset.categories[dataset.category_codes[position]]]
+                        for position in positions
+                    ],
+                    dtype=numpy.uint8,
+                ),
+            ]
+        )
+        self.genre_masks = numpy.concatenate(
+            [self.genre_masks, numpy.asarray(dataset.genre_masks)[positions]]
+        )
+        self.urls.extend(dataset.urls[position] for position in positions)
+        self.titles.extend(dataset.titles[position] for position in positions)
+        self._matrix = self._positions = None
+        return len(positions)
+
+    def save(self) -> None:
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        # Files of a generation are never modified and index.json, replaced
+        # last, points at the new one: an interrupted save leaves the previous
+        # index whole
+        generation = secrets.token_hex(4)
+        scipy.sparse.save_npz(self.index_dir / f"{generation}.counts.npz", self.counts)
+        numpy.savez(
+            self.index_dir / f"{generation}.columns.npz",
+            genre_masks=self.genre_masks,
+            category_codes=self.category_codes,
+        )
+        temporary = self.index_dir / f"index.{os.getpid()}.tmp"
+        with open(temporary, "w") as fh:
+            json.dump(
+                dict(
+                    version=self.version,
+                    generation=generation,
+                    urls=self.urls,
+                    titles=self.titles,
+                    terms=list(self.terms),
+                    categories=self.categories,
+                ),
+                fh,
+            )
+        os.replace(temporary, self.index_dir / "index.json")
+        for path in self.index_dir.glob("*.npz"):
+            if not path.name.startswith(f"{generation}."):
+                path.unlink()
+
+    @property
+    def matrix(self) -> scipy.sparse.csr_matrix:
+        """Rows of L2-normalised TF-IDF weights, with sublinear term frequencies"""
+        if self._matrix is None:
+            matrix = self.counts.copy()
+            matrix.data = 1 + numpy.log(matrix.data)
+            frequencies = numpy.bincount(matrix.indices, minlength=matrix.shape[1])
+            idf = numpy.log((1 + len(self)) / (1 + frequencies)) + 1
+            matrix = matrix @ scipy.sparse.diags(idf.astype(numpy.float32))
+            norms = numpy.sqrt(numpy.asarray(matrix.multiply(matrix).sum(axis=1)))
+            norms[norms == 0] = 1
+            self._matrix = scipy.sparse.csr_matrix(
+                matrix.multiply(1 / norms), dtype=numpy.float32
+            )
+        return self._matrix
+
+    def mask(
+        self,
+        genres: t.Optional[t.Iterable[str]] = None,
+        categories: t.Optional[t.Iterable[str]] = None,
+    ) -> numpy.ndarray:
+        """Movies that may be returned as neighbours
+
+        Args:
+            genres (t.Iterable[str], optional): Any of these genres. Defaults to None (all).
+            categories (t.Iterable[str], optional): Any of these categories. Defaults to None (all).
+
+        Returns:
+            numpy.ndarray: Boolean per movie.
+        """
+        allowed = numpy.ones(len(self), dtype=bool)
+        if genres:
+            bits = numpy.uint32(
+                sum(1 << MovieDataset.genres.index(genre) for genre in set(genres))
+            )
+            allowed &= (self.genre_masks & bits) != 0
+        if categories:
+            allowed &= numpy.isin(
+                self.category_codes,
+                [
+                    code
+                    for code, category in enumerate(self.categories)
+                    if category in categories
+                ],
+            )
+        return allowed
+
+    def neighbours(
+        self,
+        positions: t.Optional[t.Iterable[int]] = None,
+        k: int = 10,
+        genres: t.Optional[t.Iterable[str]] = None,
+        categories: t.Optional[t.Iterable[str]] = None,
+        block_size: int = 512,
+    ) -> t.Tuple[numpy.ndarray, numpy.ndarray]:
+        """Most similar movies to each of the movies given, by cosine similarity
+
+        Args:
+            positions (t.Iterable[int], optional): Rows of the movies to query. Defaults to None (all).
+            k (int, optional): Neighbours per movie. Defaults to 10.
+            genres (t.Iterable[str], optional): Neighbours' genres. Defaults to None (all).
+            categories (t.Iterable[str], optional): Neighbours' categories. Defaults to None (all).
+            block_size (int, optional): Movies scored per sparse product,
+                bounding the dense block of scores in memory. Defaults to 512.
+
+        Returns:
+            t.Tuple[numpy.ndarray, numpy.ndarray]: Rows of the neighbours and their
+            scores, best first, shaped (movies, k). Missing neighbours are -1.
+        """
+        assert k > 0, f"k must be greater than 0 not {k}"
+        positions = (
+            numpy.arange(len(self))
+            if positions is None
+            else numpy.asarray(positions, dtype=numpy.int64)
+        )
+        matrix = self.matrix
+        # Only the allowed movies are scored
+        candidates = numpy.flatnonzero(self.mask(genres, categories))
+        transposed = matrix[candidates].T.tocsr()
+        columns = numpy.full(len(self), -1, dtype=numpy.int64)
+        columns[candidates] = numpy.arange(len(candidates))
+        k = min(k, len(candidates))
+        indices = numpy.full((len(positions), k), -1, dtype=numpy.int64)
+        scores = numpy.zeros((len(positions), k), dtype=numpy.float32)
+        if not k:
+            return indices, scores
+        for start in range(0, len(positions), block_size):
+            block = positions[start : start + block_size]
+            similarity = (matrix[block] @ transposed).toarray()
+            itself = columns[block]
+            similarity[numpy.flatnonzero(itself >= 0), itself[itself >= 0]] = 0
+            top = numpy.argpartition(-similarity, k - 1, axis=1)[:, :k]
+            top_scores = numpy.take_along_axis(similarity, top, axis=1)
+            order = numpy.argsort(-top_scores, axis=1)
+            top = candidates[numpy.take_along_axis(top, order, axis=1)]
+            top_scores = numpy.take_along_axis(top_scores, order, axis=1)
+            top[top_scores <= 0] = -1
+            indices[start : start + len(block)] = top
+            scores[start : start + len(block)] = numpy.maximum(top_scores, 0)
+        return indices, scores
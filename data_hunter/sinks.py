@@ -0,0 +1,581 @@
+"""Destinations the hunted movies are written to"""
+
+import os
+import csv
+import sqlite3
+import typing as t
+from pathlib import Path
+from data_hunter.compression import codecs, open_text
+from data_hunter.constants import available_categories, available_genres
+
+field_names = (
+    "genre",
+    "category",
+    "title",
+    "year",
+    "distribution",
+    "description",
+    "url",
+    "cover_photo",
+)
+"""Fields of every movie hunted"""
+
+
+class Sink:
+    """Receives pages of movies as they are hunted.
+
+    Sinks are only ever written to from the thread consuming the hunt.
+    """
+
+    appendable = True
+    """Whether datasets already saved are added to, allowing to resume a hunt"""
+
+    def __init__(self, dir: t.Union[Path, str], prefix: str = ""):
+        """
+
+        Args:
+            dir (t.Union[Path, str]): Parent directory to save the datasets to.
+            prefix (str, optional): Datasets filename prefix. Defaults to ''.
+        """
+        self.dir = dir
+        self.prefix = prefix
+
+    def write(
+        self, category: str, genre: str, rows: t.List[t.Dict[str, t.Any]]
+    ) -> Path:
+        """Save a page of movies
+
+        Args:
+            category (str): Movie category.
+            genre (str): Movie genre.
+            rows (t.List[t.Dict[str, t.Any]]): Movies in the page.
+
+        Returns:
+            Path: Where the movies are saved to.
+        """
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        """Persist everything written so far"""
+
+    def saved(self, category: str, genre: str, urls: t.List[str]) -> t.Set[str]:
+        """Urls among `urls` of the (category, genre) rows saved, telling a
+        resumed hunt which rows of the page it stopped writing were saved
+
+        Args:
+            category (str): Movie category.
+            genre (str): Movie genre.
+            urls (t.List[str]): Urls of the rows of the page.
+
+        Returns:
+            t.Set[str]: Urls of the rows saved.
+        """
+        raise NotImplementedError
+
+    def abandon(self, category: str, genre: str) -> None:
+        """The hunt of a (category, genre) was given up on after the pages
+        written for it so far"""
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class CSVSink(Sink):
+    """Appends to a `<prefix><genre>.csv` file per genre, or to a gzip or
+    zstd compressed `.csv.gz` or `.csv.zst` shard"""
+
+    def __init__(
+        self,
+        dir: t.Union[Path, str],
+        prefix: str = "",
+        compression: t.Optional[t.Literal["gzip", "zstd"]] = None,
+        compression_level: t.Optional[int] = None,
+    ):
+        """
+
+        Args:
+            dir (t.Union[Path, str]): Parent directory to save the datasets to.
+            prefix (str, optional): Datasets filename prefix. Defaults to ''.
+            compression (t.Literal["gzip", "zstd"], optional): Codec of the shards. Defaults to None.
+            compression_level (int, optional): Level of the codec. Defaults to None (codec's default).
+        """
+        assert (
+            compression is None or compression in codecs
+        ), f"Unsupported compression '{compression}'"
+        super().__init__(dir, prefix)
+        self.compression = compression
+        self.compression_level = compression_level
+        self.suffix = ".csv" + codecs.get(compression, "")
+        self._handles: t.Dict[Path, t.Tuple[t.IO, csv.DictWriter]] = {}
+
+    def path(self, genre: str) -> Path:
+        return Path(
+            os.path.join(self.dir, self.prefix + genre.casefold() + self.suffix)
+        )
+
+    def write(self, category, genre, rows):
+        path = self.path(genre)
+        if path not in self._handles:
+            write_mode = "a" if path.exists() else "w"
+            fh = open_text(path, write_mode, self.compression_level)
+            writer = csv.DictWriter(fh, fieldnames=field_names)
+            if write_mode == "w":
+                writer.writeheader()
+            self._handles[path] = (fh, writer)
+        fh, writer = self._handles[path]
+        writer.writerows(rows)
+        if self.compression is None:
+            fh.flush()
+        return path
+
+    def saved(self, category, genre, urls):
+        return _saved_in_csv([self.path(genre)], category, urls)
+
+    def flush(self):
+        # Compressed shards are only flushed when asked to, as every flush
+        # ends a compressed block
+        for fh, _ in self._handles.values():
+            fh.flush()
+
+    def close(self):
+        for fh, _ in self._handles.values():
+            fh.close()
+        self._handles.clear()
+
+
+class RefreshSink(CSVSink):
+    """Rewrites the `<prefix><genre>.csv` file of a genre only when its content
+    changed since the last hunt, saving the rows added, removed and modified
+    to `<prefix>delta.json`.
+
+    Pages are held until the hunt completes, to be merged with the saved
+    pages of the listings found unchanged. Nothing is written if it fails.
+    """
+
+    delta_filename = "delta.json"
+
+    def __init__(
+        self,
+        dir: t.Union[Path, str],
+        prefix: str = "",
+        compression: t.Optional[t.Literal["gzip", "zstd"]] = None,
+        compression_level: t.Optional[int] = None,
+    ):
+        from data_hunter.delta import PageManifest
+
+        super().__init__(dir, prefix, compression, compression_level)
+        self.manifest = PageManifest(dir, prefix)
+        self.delta_path = Path(os.path.join(dir, prefix + self.delta_filename))
+        self.changed: t.List[Path] = []
+        self._pairs: t.List[t.Tuple[str, str]] = []
+        self._datasets: t.Dict[str, t.List[t.Dict[str, str]]] = {}
+        self._pages: t.Dict[t.Tuple[str, str], t.List[t.List[t.Dict[str, str]]]] = {}
+
+    def prepare(self, pairs: t.List[t.Tuple[str, str]]) -> None:
+        """Read the datasets of the (category, genre) pairs about to be hunted,
+        forgetting the page hashes of those modified since they were saved"""
+        from data_hunter.delta import read_dataset
+
+        self._pairs.extend(pairs)
+        for category, genre in pairs:
+            if genre not in self._datasets:
+                self._datasets[genre] = read_dataset(self.path(genre))
+            saved = sum(
+                1 for row in self._datasets[genre] if row["category"] == category
+            )
+            if saved != sum(count for _, count in self.manifest.get(category, genre)):
+                self.manifest.discard(category, genre)
+
+    def write(self, category, genre, rows):
+        from data_hunter.delta import normalize
+
+        self._pages.setdefault((category, genre), []).append(
+            [normalize(row) for row in rows]
+        )
+        return self.path(genre)
+
+    def flush(self):
+        """Datasets are only written once the hunt completes"""
+
+    def abandon(self, category, genre):
+        # A partial listing isn't diffed, its rows stay as saved
+        self._pages.pop((category, genre), None)
+        self.manifest.stopped_at.pop((category, genre), None)
+
+    def close(self):
+        import json
+        from data_hunter.delta import diff, page_hash, write_dataset
+
+        delta = dict(added=[], removed=[], modified=[])
+        hunted = set(self._pages) | set(self.manifest.stopped_at)
+        for genre, before in self._datasets.items():
+            saved: t.Dict[str, t.List[t.Dict[str, str]]] = {}
+            for row in before:
+                saved.setdefault(row["category"], []).append(row)
+            after = []
+            for category in dict.fromkeys(
+                [*saved, *(pair[0] for pair in self._pairs if pair[1] == genre)]
+            ):
+                rows = saved.get(category, [])
+                if (category, genre) not in hunted:
+                    after.extend(rows)
+                    continue
+                pages = self._pages.get((category, genre), [])
+                hashes = [(page_hash(page), len(page)) for page in pages]
+                after.extend(row for page in pages for row in page)
+                stopped_at = self.manifest.stopped_at.get((category, genre))
+                if stopped_at is not None:
+                    # The rest of the listing is as saved by the last hunt
+                    known = self.manifest.get(category, genre)
+                    after.extend(rows[sum(count for _, count in known[:stopped_at]) :])
+                    hashes.extend(known[stopped_at:])
+                self.manifest.pages[self.manifest.key(category, genre)] = hashes
+            if after != before:
+                write_dataset(self.path(genre), after, self.compression_level)
+                self.changed.append(self.path(genre))
+                for change, rows in diff(before, after).items():
+                    delta[change].extend(rows)
+        self.manifest.save()
+        with open(self.delta_path, "w") as fh:
+            json.dump(
+                dict(changed=[path.name for path in self.changed], **delta),
+                fh,
+                indent=2,
+            )
+        self._pages.clear()
+
+    def __exit__(self, exc_type, *args):
+        # A failed or interrupted hunt leaves the datasets as they were
+        if exc_type is None:
+            self.close()
+
+
+class BatchedSink(Sink):
+    """Buffers rows, handing them over in batches"""
+
+    def __init__(
+        self, dir: t.Union[Path, str], prefix: str = "", batch_size: int = 1000
+    ):
+        super().__init__(dir, prefix)
+        self.batch_size = batch_size
+        self._pending: t.List[t.Dict[str, t.Any]] = []
+
+    def write(self, category, genre, rows):
+        self._pending.extend(rows)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        return self.path(genre)
+
+    def flush(self):
+        if self._pending:
+            self.write_batch(self._pending)
+            self._pending = []
+
+    def path(self, genre: str) -> Path:
+        raise NotImplementedError
+
+    def write_batch(self, rows: t.List[t.Dict[str, t.Any]]) -> None:
+        raise NotImplementedError
+
+
+class SQLiteSink(BatchedSink):
+    """Inserts into the flat `Movies` table of `<prefix>movies-data.db`,
+    laid out as by `create_db`"""
+
+    filename = "movies-data.db"
+
+    def __init__(
+        self, dir: t.Union[Path, str], prefix: str = "", batch_size: int = 1000
+    ):
+        super().__init__(dir, prefix, batch_size)
+        self.db_path = Path(os.path.join(dir, prefix + self.filename))
+        self.conn = sqlite3.connect(self.db_path)
+        with self.conn:
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS "Movies" ("index" INTEGER, genre TEXT, '
+                "category TEXT, title TEXT, year INTEGER, distribution TEXT, "
+                "description TEXT, url TEXT, cover_photo TEXT)"
+            )
+        self._counts: t.Dict[str, int] = dict(
+            self.conn.execute('SELECT genre, count(*) FROM "Movies" GROUP BY genre')
+        )
+
+    def path(self, genre):
+        return self.db_path
+
+    def saved(self, category, genre, urls):
+        return {
+            entry[0]
+            for entry in self.conn.execute(
+                'SELECT url FROM "Movies" WHERE category = ? AND genre = ? '
+                f"AND url IN ({','.join('?' * len(urls))})",
+                (category, genre, *urls),
+            )
+        }
+
+    def write_batch(self, rows):
+        values = []
+        for row in rows:
+            index = self._counts.get(row["genre"], 0)
+            self._counts[row["genre"]] = index + 1
+            values.append(
+                (index, *(_to_sql(row[name]) for name in field_names)),
+            )
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO "Movies" VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', values
+            )
+
+    def close(self):
+        self.flush()
+        with self.conn:
+            for column in ("index", "title", "url", "genre", "category"):
+                self.conn.execute(
+                    f'CREATE INDEX IF NOT EXISTS "ix_Movies_{column}" '
+                    f'ON "Movies" ("{column}")'
+                )
+        self.conn.close()
+
+
+class RelationalSink(BatchedSink):
+    """Upserts into the movie, genre, category & movie_genre tables of
+    `<prefix>movies-data-relational.db`, laid out as by `relate_tables`.
+
+    As in `relate_tables` a movie is identified by its title, the first
+    occurrence hunted being kept.
+    """
+
+    filename = "movies-data-relational.db"
+
+    def __init__(
+        self, dir: t.Union[Path, str], prefix: str = "", batch_size: int = 1000
+    ):
+        from sqlmodel import SQLModel, create_engine
+        from data_hunter.models import relational_tables
+
+        super().__init__(dir, prefix, batch_size)
+        self.db_path = Path(os.path.join(dir, prefix + self.filename))
+        engine = create_engine(f"sqlite:///{self.db_path}")
+        SQLModel.metadata.create_all(engine, tables=relational_tables)
+        engine.dispose()
+        self.conn = sqlite3.connect(self.db_path)
+        with self.conn:
+            self.conn.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS ix_movie_genre_pair "
+                "ON movie_genre (movie_id, genre_id)"
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO genre (name) VALUES (?)",
+                [(genre,) for genre in available_genres],
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO category (name) VALUES (?)",
+                [(category,) for category in sorted(available_categories)],
+            )
+        self.genre_ids = dict(self.conn.execute("SELECT name, id FROM genre"))
+        self.category_ids = dict(self.conn.execute("SELECT name, id FROM category"))
+
+    def path(self, genre):
+        return self.db_path
+
+    def saved(self, category, genre, urls):
+        # Movies & their genres are inserted or ignored, rows written again
+        # are not duplicated
+        return set()
+
+    def write_batch(self, rows):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO movie (title, year, distribution, description, "
+                "url, cover_photo, category_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        _to_sql(row["title"]),
+                        _to_sql(row["year"]),
+                        _to_sql(row["distribution"]),
+                        _to_sql(row["description"]),
+                        _to_sql(row["url"]),
+                        _to_sql(row["cover_photo"]),
+                        self.category_ids.get(row["category"]),
+                    )
+                    for row in rows
+                ],
+            )
+            titles = list({_to_sql(row["title"]) for row in rows})
+            movie_ids = dict(
+                self.conn.execute(
+                    "SELECT title, id FROM movie "
+                    f"WHERE title IN ({','.join('?' * len(titles))})",
+                    titles,
+                )
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO movie_genre (movie_id, genre_id) VALUES (?, ?)",
+                [
+                    (movie_ids[_to_sql(row["title"])], self.genre_ids[row["genre"]])
+                    for row in rows
+                    if _to_sql(row["title"]) in movie_ids
+                    and row["genre"] in self.genre_ids
+                ],
+            )
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+class ParquetSink(BatchedSink):
+    """Writes a `<prefix><genre>.parquet` file per genre, a row group per batch.
+
+    Requires pyarrow. Parquet files can't be appended to, existing files are
+    replaced.
+    """
+
+    appendable = False
+
+    def __init__(
+        self,
+        dir: t.Union[Path, str],
+        prefix: str = "",
+        batch_size: int = 1000,
+        compression: str = "snappy",
+    ):
+        import pyarrow
+
+        super().__init__(dir, prefix, batch_size)
+        self.compression = compression
+        self.schema = pyarrow.schema(
+            [
+                (name, pyarrow.int64() if name == "year" else pyarrow.string())
+                for name in field_names
+            ]
+        )
+        self._writers = {}
+        self._pending_by_genre: t.Dict[str, t.List[t.Dict[str, t.Any]]] = {}
+
+    def path(self, genre):
+        return Path(os.path.join(self.dir, self.prefix + genre.casefold() + ".parquet"))
+
+    def write(self, category, genre, rows):
+        pending = self._pending_by_genre.setdefault(genre, [])
+        pending.extend(rows)
+        if len(pending) >= self.batch_size:
+            self._write_genre(genre)
+        return self.path(genre)
+
+    def _write_genre(self, genre: str) -> None:
+        import pyarrow
+        import pyarrow.parquet
+
+        rows = self._pending_by_genre.pop(genre, None)
+        if not rows:
+            return
+        if genre not in self._writers:
+            self._writers[genre] = pyarrow.parquet.ParquetWriter(
+                self.path(genre), self.schema, compression=self.compression
+            )
+        table = pyarrow.Table.from_pydict(
+            {
+                name: [
+                    _to_year(row[name]) if name == "year" else _to_sql(row[name])
+                    for row in rows
+                ]
+                for name in field_names
+            },
+            schema=self.schema,
+        )
+        self._writers[genre].write_table(table)
+
+    def flush(self):
+        for genre in list(self._pending_by_genre):
+            self._write_genre(genre)
+
+    def close(self):
+        self.flush()
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+
+class PartitionedSink(BatchedSink):
+    """Appends to `category=<category>/year=<year>/<prefix><genre>.csv`
+    partitions, keeping their `<prefix>manifest.json` up to date"""
+
+    def __init__(
+        self, dir: t.Union[Path, str], prefix: str = "", batch_size: int = 1000
+    ):
+        from data_hunter.partitions import PartitionManifest
+
+        super().__init__(dir, prefix, batch_size)
+        self.manifest = PartitionManifest(dir, prefix)
+
+    def path(self, genre):
+        return self.manifest.path
+
+    def saved(self, category, genre, urls):
+        import glob
+
+        return _saved_in_csv(
+            glob.glob(
+                os.path.join(
+                    self.dir,
+                    f"category={category}",
+                    "year=*",
+                    self.prefix + genre.casefold() + ".csv",
+                )
+            ),
+            category,
+            urls,
+        )
+
+    def write_batch(self, rows):
+        from data_hunter.partitions import append_rows
+
+        append_rows(self.manifest, rows)
+        self.manifest.save()
+
+
+def _saved_in_csv(
+    paths: t.List[t.Union[Path, str]], category: str, urls: t.List[str]
+) -> t.Set[str]:
+    urls = set(urls)
+    saved = set()
+    for path in paths:
+        if os.path.exists(path):
+            with open_text(path) as fh:
+                saved.update(
+                    row["url"]
+                    for row in csv.DictReader(fh)
+                    if row["category"] == category and row["url"] in urls
+                )
+    return saved
+
+
+def _to_sql(value: t.Any) -> t.Any:
+    """Coerce values such as urls to types sqlite3 and pyarrow understand"""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return str(value)
+
+
+def _to_year(value: t.Any) -> t.Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+sinks: t.Dict[str, t.Type[Sink]] = {
+    "csv": CSVSink,
+    "sqlite": SQLiteSink,
+    "relational": RelationalSink,
+    "parquet": ParquetSink,
+    "partitioned": PartitionedSink,
+}
+"""Sinks selectable by name"""
@@ -0,0 +1,222 @@
+"""Dataset statistics computed in one streaming pass, cached per source file"""
+
+import os
+import csv
+import json
+import hashlib
+import typing as t
+from pathlib import Path
+from data_hunter.compression import hash_file, open_text
+
+dimensions = ("genre", "category", "year", "distribution")
+"""Columns whose values are counted"""
+
+description_buckets = (0, 50, 100, 150, 200, 300, 500, 1000)
+"""Lower bounds of the description length histogram, in characters"""
+
+
+def url_hash(url: str) -> int:
+    """64-bit digest standing for a url in the cached partial aggregates"""
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), "big")
+
+
+def file_stats(csv_file: str) -> t.Dict[str, t.Any]:
+    """Aggregate a .csv file in a single pass over its rows
+
+    Returns:
+        t.Dict[str, t.Any]: Partial aggregates, mergeable with those of other files.
+    """
+    counts = {dimension: {} for dimension in dimensions}
+    histogram = [0] * len(description_buckets)
+    lengths = dict(total=0, max=0, missing=0)
+    urls: t.Dict[str, t.List[int]] = {}
+    rows = 0
+    with open_text(csv_file) as fh:
+        for row in csv.DictReader(fh):
+            rows += 1
+            for dimension in dimensions:
+                value = row.get(dimension) or "unknown"
+                counts[dimension][value] = counts[dimension].get(value, 0) + 1
+            description = row.get("description")
+            if description:
+                length = len(description)
+                lengths["total"] += length
+                lengths["max"] = max(lengths["max"], length)
+                for position in range(len(description_buckets) - 1, -1, -1):
+                    if length >= description_buckets[position]:
+                        histogram[position] += 1
+                        break
+            else:
+                lengths["missing"] += 1
+            if row.get("url"):
+                urls.setdefault(row.get("genre") or "unknown", []).append(
+                    url_hash(row["url"])
+                )
+    return dict(
+        rows=rows, counts=counts, histogram=histogram, lengths=lengths, urls=urls
+    )
+
+
+def merge(partials: t.Iterable[t.Dict[str, t.Any]]) -> t.Dict[str, t.Any]:
+    """Combine the partial aggregates of files into the dataset's statistics"""
+    rows = 0
+    counts = {dimension: {} for dimension in dimensions}
+    histogram = [0] * len(description_buckets)
+    lengths = dict(total=0, max=0, missing=0)
+    genre_urls: t.Dict[str, t.List[int]] = {}
+    for partial in partials:
+        rows += partial["rows"]
+        for dimension in dimensions:
+            for value, count in partial["counts"][dimension].items():
+                counts[dimension][value] = counts[dimension].get(value, 0) + count
+        histogram = [sum(pair) for pair in zip(histogram, partial["histogram"])]
+        lengths["total"] += partial["lengths"]["total"]
+        lengths["missing"] += partial["lengths"]["missing"]
+        lengths["max"] = max(lengths["max"], partial["lengths"]["max"])
+        for genre, hashes in partial["urls"].items():
+            genre_urls.setdefault(genre, []).extend(hashes)
+    url_genres: t.Dict[int, t.Set[str]] = {}
+    within_genre = 0
+    for genre, hashes in genre_urls.items():
+        unique = set(hashes)
+        within_genre += len(hashes) - len(unique)
+        for hash in unique:
+            url_genres.setdefault(hash, set()).add(genre)
+    genres = sorted(genre_urls)
+    overlap = {genre: dict.fromkeys(genres, 0) for genre in genres}
+    for movie_genres in url_genres.values():
+        for genre in movie_genres:
+            for other in movie_genres:
+                overlap[genre][other] += 1
+    described = rows - lengths["missing"]
+    with_url = sum(len(hashes) for hashes in genre_urls.values())
+    return dict(
+        rows=rows,
+        counts={
+            dimension: dict(
+                sorted(values.items(), key=lambda entry: (-entry[1], entry[0]))
+            )
+            for dimension, values in counts.items()
+        },
+        genre_overlap=overlap,
+        description_length=dict(
+            count=described,
+            missing=lengths["missing"],
+            mean=round(lengths["total"] / described, 2) if described else None,
+            max=lengths["max"],
+            histogram={
+                (
+                    f"{lower}-{description_buckets[position + 1] - 1}"
+                    if position + 1 < len(description_buckets)
+                    else f"{lower}+"
+                ): count
+                for position, (lower, count) in enumerate(
+                    zip(description_buckets, histogram)
+                )
+            },
+        ),
+        urls=dict(
+            rows=with_url,
+            unique=len(url_genres),
+            duplicate_rate=(
+                round(1 - len(url_genres) / with_url, 4) if with_url else 0.0
+            ),
+            within_genre_duplicates=within_genre,
+        ),
+    )
+
+
+class DatasetStats:
+    """Counts per genre, category, year & distribution, cross-genre overlap,
+    description lengths and duplicate urls of .csv datasets.
+
+    Partial aggregates are cached per source file along with its size, mtime
+    and sha256, so that only the files changed since are read again.
+    """
+
+    version = 1
+
+    def __init__(
+        self,
+        csv_filenames: t.List[str],
+        cache_path: t.Optional[t.Union[Path, str]] = None,
+    ):
+        """
+
+        Args:
+            csv_filenames (t.List[str]): Paths to the .csv files, per genre or partitions.
+            cache_path (t.Union[Path, str], optional): Where to keep the partial aggregates.
+                Defaults to `.movies-cache/stats.json` in the directory common to the files.
+        """
+        assert csv_filenames, "No .csv files to compute the statistics of"
+        self.csv_filenames = sorted(os.path.abspath(path) for path in csv_filenames)
+        self.cache_path = Path(
+            cache_path
+            or os.path.join(
+                os.path.commonpath(
+                    [os.path.dirname(path) for path in self.csv_filenames]
+                ),
+                ".movies-cache",
+                "stats.json",
+            )
+        )
+        self.recomputed: t.List[str] = []
+
+    def read_cache(self) -> t.Dict[str, t.Dict[str, t.Any]]:
+        try:
+            with open(self.cache_path) as fh:
+                cache = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return cache["sources"] if cache.get("version") == self.version else {}
+
+    def write_cache(self, sources: t.Dict[str, t.Dict[str, t.Any]]) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary, "w") as fh:
+            json.dump(dict(version=self.version, sources=sources), fh)
+        os.replace(temporary, self.cache_path)
+
+    def compute(self, force: bool = False) -> t.Dict[str, t.Any]:
+        """Statistics of the files, reading only those missing from the cache or changed
+
+        Args:
+            force (bool, optional): Read every file regardless of the cache. Defaults to False.
+
+        Returns:
+            t.Dict[str, t.Any]: rows, counts, genre_overlap, description_length & urls.
+        """
+        sources = {} if force else self.read_cache()
+        changed = False
+        self.recomputed = []
+        for path in list(sources):
+            if not os.path.exists(path):
+                del sources[path]
+                changed = True
+        for path in self.csv_filenames:
+            stat = os.stat(path)
+            entry = sources.get(path)
+            if entry and (entry["size"], entry["mtime_ns"]) == (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                continue
+            sha256 = hash_file(path)
+            if entry and entry["sha256"] == sha256:
+                # Touched but not modified
+                entry["mtime_ns"] = stat.st_mtime_ns
+            else:
+                sources[path] = dict(
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                    sha256=sha256,
+                    stats=file_stats(path),
+                )
+                self.recomputed.append(path)
+            changed = True
+        if changed:
+            self.write_cache(sources)
+        return dict(
+            files=len(self.csv_filenames),
+            **merge(sources[path]["stats"] for path in self.csv_filenames),
+        )
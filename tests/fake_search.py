@@ -0,0 +1,59 @@
+"""Offline stand-in for `fzmovies_api.Search`"""
+
+import time
+import typing as t
+from types import SimpleNamespace
+
+
+def listed_movie(query, page: int, number: int) -> SimpleNamespace:
+    """Movie titled after its (category, genre) listing and position"""
+    title = f"{query.category} {query.name} {page}-{number}"
+    return SimpleNamespace(
+        title=title,
+        year=2000 + page,
+        distribution="BluRay",
+        about=f"About {title}",
+        url="https://fzmovies.net/movie-" + title.replace(" ", "%20") + ".htm",
+        cover_photo="https://fzmovies.net/imdb_images/"
+        + title.replace(" ", ".")
+        + ".jpg",
+    )
+
+
+def make_fake_search(
+    pages: int = 3,
+    per_page: int = 20,
+    latency: float = 0.0,
+    movie: t.Callable[[t.Any, int, int], SimpleNamespace] = listed_movie,
+) -> t.Type:
+    """Build a `Search` replacement serving synthetic listing pages.
+
+    Args:
+        pages (int, optional): Pages available per (category, genre). Defaults to 3.
+        per_page (int, optional): Movies per page. Defaults to 20.
+        latency (float, optional): Seconds slept before serving each page. Defaults to 0.0.
+        movie (t.Callable[[t.Any, int, int], SimpleNamespace], optional): Builds the
+            movie listed at (query, page, number). Defaults to `listed_movie`.
+
+    Returns:
+        t.Type: Class with the same interface as `fzmovies_api.Search`.
+    """
+
+    class FakeSearch:
+        calls: t.List[t.Tuple[str, str]] = []
+
+        def __init__(self, query):
+            self.query = query
+            FakeSearch.calls.append((query.category, query.name))
+
+        def get_all_results(self, stream: bool = False, limit: int = 1_000_000):
+            served = 0
+            for page in range(pages):
+                if served >= limit:
+                    break
+                time.sleep(latency)
+                movies = [movie(self.query, page, number) for number in range(per_page)]
+                served += len(movies)
+                yield SimpleNamespace(movies=movies)
+
+    return FakeSearch
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from data_hunter.binary_cache import DatasetCache
+from data_hunter.dataset import MovieDataset
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestDatasetCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        for path in DATA_DIR.glob("w*.csv"):
+            shutil.copy(path, self.dir.name)
+        self.cache = DatasetCache(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_matches_csv(self):
+        expected = MovieDataset.from_csv(self.dir.name)
+        dataset = self.cache.load()
+        self.assertEqual(list(dataset.urls), expected.urls)
+        self.assertEqual(list(dataset.descriptions), expected.descriptions)
+        self.assertEqual(list(dataset.genre_masks), list(expected.genre_masks))
+        self.assertEqual(
+            len(dataset.filter(genres=["War"], years=(1990, 2000))),
+            len(expected.filter(genres=["War"], years=(1990, 2000))),
+        )
+
+    def test_warm_load_skips_parsing(self):
+        self.cache.load()
+        with mock.patch.object(MovieDataset, "from_csv") as from_csv:
+            self.cache.load()
+            # Touched but unchanged sources are not recompiled either
+            os.utime(Path(self.dir.name, "war.csv"))
+            self.cache.load()
+        from_csv.assert_not_called()
+        self.assertTrue(self.cache.is_fresh())
+
+    def test_rebuilds_on_change(self):
+        before = len(self.cache.load())
+        os.remove(Path(self.dir.name, "western.csv"))
+        self.assertFalse(self.cache.is_fresh())
+        self.assertLess(len(self.cache.load()), before)
+        self.assertTrue(self.cache.is_fresh())
+
+
+if __name__ == "__main__":
+    unittest.main()
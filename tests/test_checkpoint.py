@@ -0,0 +1,98 @@
+import csv
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from data_hunter.main import MovieDataHunter
+from data_hunter.checkpoint import Checkpoint
+from fake_search import make_fake_search
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.data_hunter = MovieDataHunter(
+            categories=["Hollywood", "Bollywood"], genres=["Action", "Drama"]
+        )
+        self.search = make_fake_search(pages=3)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def hunt(self, stop_after: int = None, dir: str = None, **kwargs):
+        with mock.patch("data_hunter.main.Search", self.search):
+            hunt = self.data_hunter.hunt(
+                dir=dir or self.dir.name, stream=True, resume=True, **kwargs
+            )
+            for count, entry in enumerate(hunt, start=1):
+                if count == stop_after:
+                    hunt.close()
+                    break
+
+    def read_urls(self, dir: str = None, pattern: str = "*.csv"):
+        urls = []
+        for path in Path(dir or self.dir.name).glob(pattern):
+            with open(path) as fh:
+                urls.extend(row["url"] for row in csv.DictReader(fh))
+        return urls
+
+    def test_resume_after_interruption(self):
+        self.hunt(stop_after=4)
+        self.assertEqual(len(self.read_urls()), 4 * 20)
+        self.search.calls.clear()
+        self.hunt()
+        urls = self.read_urls()
+        self.assertEqual(len(urls), 4 * 3 * 20)
+        self.assertEqual(len(urls), len(set(urls)))
+        # Completed pairs are not hunted again
+        self.assertNotIn(("Hollywood", "Action"), self.search.calls)
+
+    def test_rerun_is_noop(self):
+        self.hunt()
+        self.search.calls.clear()
+        self.hunt()
+        self.assertEqual(self.search.calls, [])
+        self.assertEqual(len(self.read_urls()), 4 * 3 * 20)
+
+    def test_seeds_index_from_existing_datasets(self):
+        with mock.patch("data_hunter.main.Search", self.search):
+            list(self.data_hunter.hunt(dir=self.dir.name, stream=True))
+        self.hunt()
+        urls = self.read_urls()
+        self.assertEqual(len(urls), len(set(urls)))
+        with Checkpoint.in_dir(self.dir.name) as checkpoint:
+            self.assertEqual(checkpoint.progress("Bollywood", "Drama"), (3, 60, True))
+
+    def test_resume_after_crash_between_write_and_save(self):
+        save_page = Checkpoint.save_page
+
+        def crashing_save_page(checkpoint, *args):
+            # The fifth page is written but never saved
+            if crashing_save_page.calls == 4:
+                raise KeyboardInterrupt
+            crashing_save_page.calls += 1
+            save_page(checkpoint, *args)
+
+        for sink in ("csv", "sqlite", "partitioned"):
+            with self.subTest(sink=sink), tempfile.TemporaryDirectory() as dir:
+                crashing_save_page.calls = 0
+                with mock.patch.object(Checkpoint, "save_page", crashing_save_page):
+                    with self.assertRaises(KeyboardInterrupt):
+                        self.hunt(dir=dir, sink=sink)
+                self.hunt(dir=dir, sink=sink)
+                if sink == "sqlite":
+                    conn = sqlite3.connect(Path(dir, "movies-data.db"))
+                    urls = [url for url, in conn.execute('SELECT url FROM "Movies"')]
+                    conn.close()
+                else:
+                    urls = self.read_urls(
+                        dir, "*.csv" if sink == "csv" else "category=*/year=*/*.csv"
+                    )
+                self.assertEqual(len(urls), 4 * 3 * 20)
+                self.assertEqual(len(urls), len(set(urls)))
+
+
+if __name__ == "__main__":
+    unittest.main()
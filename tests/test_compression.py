@@ -0,0 +1,118 @@
+import csv
+import sqlite3
+import tempfile
+import importlib.util
+import unittest
+from pathlib import Path
+from unittest import mock
+from click.testing import CliRunner
+from data_hunter.main import MovieDataHunter
+from data_hunter.compression import codecs, find_csv_files, open_text
+from fake_search import make_fake_search
+from cli import Utils
+
+codecs_available = [
+    codec
+    for codec in codecs
+    if codec != "zstd" or importlib.util.find_spec("zstandard")
+]
+
+
+class TestCompression(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.data_hunter = MovieDataHunter(
+            categories=["Hollywood", "Bollywood"], genres=["Action", "Drama"]
+        )
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def hunt(self, dir: str, compression=None, resume=False):
+        with mock.patch("data_hunter.main.Search", make_fake_search(pages=2)):
+            return list(
+                self.data_hunter.hunt(
+                    dir=dir, stream=True, compression=compression, resume=resume
+                )
+            )
+
+    def rows(self, path: str) -> list:
+        with open_text(path) as fh:
+            return list(csv.reader(fh))
+
+    def test_appended_frames_read_through(self):
+        for codec in codecs_available:
+            with self.subTest(codec=codec):
+                path = Path(self.dir.name, "movies.csv" + codecs[codec])
+                for mode, values in (("w", ["a", "multi\nline"]), ("a", ["b", "c"])):
+                    with open_text(path, mode, level=1) as fh:
+                        csv.writer(fh).writerow(values)
+                self.assertEqual(self.rows(path), [["a", "multi\nline"], ["b", "c"]])
+
+    def test_hunted_shards_match_plain(self):
+        plain = Path(self.dir.name, "plain")
+        plain.mkdir()
+        self.hunt(str(plain))
+        for codec in codecs_available:
+            with self.subTest(codec=codec):
+                shards = Path(self.dir.name, codec)
+                shards.mkdir()
+                entries = self.hunt(str(shards), compression=codec)
+                self.assertTrue(
+                    all(str(entry[4]).endswith(codecs[codec]) for entry in entries)
+                )
+                found = find_csv_files(shards)
+                self.assertEqual(len(found), 2)
+                for path in found:
+                    self.assertEqual(
+                        self.rows(path),
+                        self.rows(plain / Path(path).name.replace(codecs[codec], "")),
+                    )
+                # Resuming seeds the checkpoint from the shards, saving nothing twice
+                entries = self.hunt(str(shards), compression=codec, resume=True)
+                self.assertEqual(sum(entry[3] for entry in entries), 0)
+                self.assertEqual(len(self.rows(found[0])), 1 + 2 * 2 * 20)
+
+    def test_create_db_and_to_format_read_shards(self):
+        plain = Path(self.dir.name, "plain")
+        plain.mkdir()
+        self.hunt(str(plain))
+        for codec in codecs_available:
+            with self.subTest(codec=codec):
+                shards = Path(self.dir.name, codec)
+                shards.mkdir()
+                self.hunt(str(shards), compression=codec)
+                for jobs in ("1", "2"):
+                    databases = []
+                    for directory in (plain, shards):
+                        output = str(Path(self.dir.name, f"{codec}-{jobs}.db"))
+                        result = CliRunner().invoke(
+                            Utils.create_db,
+                            [str(directory), "-o", output, "--stream", "-j", jobs],
+                        )
+                        self.assertEqual(result.exit_code, 0, result.output)
+                        conn = sqlite3.connect(output)
+                        databases.append(
+                            sorted(
+                                conn.execute(
+                                    'SELECT genre, title, url FROM "Movies"'
+                                ).fetchall()
+                            )
+                        )
+                        conn.close()
+                        Path(output).unlink()
+                    self.assertEqual(len(databases[0]), 2 * 2 * 2 * 20)
+                    self.assertEqual(databases[0], databases[1])
+                output = str(Path(self.dir.name, f"{codec}-export"))
+                result = CliRunner().invoke(
+                    Utils.to_format,
+                    [str(shards), "-o", output, "-f", "jsonl", "--stream"],
+                )
+                self.assertEqual(result.exit_code, 0, result.output)
+                with open(output + ".jsonl") as fh:
+                    self.assertEqual(len(fh.readlines()), 2 * 2 * 2 * 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
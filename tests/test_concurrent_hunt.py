@@ -0,0 +1,136 @@
+import csv
+import time
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from data_hunter.main import MovieDataHunter, prefetched
+from fake_search import make_fake_search
+
+
+class TestConcurrentHunt(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.data_hunter = MovieDataHunter(
+            categories=["Hollywood", "Bollywood"],
+            genres=["Action", "Drama", "Comedy", "Horror"],
+        )
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def hunt(self, workers: int, latency: float = 0.0, prefetch: int = 0):
+        with mock.patch(
+            "data_hunter.main.Search", make_fake_search(pages=2, latency=latency)
+        ):
+            return list(
+                self.data_hunter.hunt(
+                    dir=self.dir.name, stream=True, workers=workers, prefetch=prefetch
+                )
+            )
+
+    def test_yields_same_tuples_as_sequential(self):
+        sequential = self.hunt(workers=1)
+        for path in Path(self.dir.name).glob("*.csv"):
+            path.unlink()
+        concurrent = self.hunt(workers=4)
+        self.assertCountEqual(sequential, concurrent)
+        self.assertEqual(len(concurrent), 8 * 2)
+
+    def test_single_header_per_dataset(self):
+        self.hunt(workers=8)
+        for path in Path(self.dir.name).glob("*.csv"):
+            with open(path) as fh:
+                rows = list(csv.reader(fh))
+            self.assertEqual(rows[0], list(MovieDataHunter.field_names))
+            self.assertEqual(len(rows), 1 + 2 * 2 * 20)
+            self.assertNotIn(rows[0], rows[1:])
+
+    def test_summary(self):
+        with mock.patch("data_hunter.main.Search", make_fake_search(pages=2)):
+            summary = self.data_hunter.hunt(dir=self.dir.name, workers=4)
+        self.assertEqual(summary["movies_count"], 8 * 2 * 20)
+        self.assertEqual(summary["total_movies"], 8 * 2 * 20)
+        self.assertEqual(summary["genre_count"], dict.fromkeys(summary["genres"], 80))
+        self.assertCountEqual(summary["category"], ["Hollywood", "Bollywood"])
+        self.assertEqual(len(summary["saved_to"]), 4)
+
+    def test_speedup(self):
+        start = time.perf_counter()
+        self.hunt(workers=1, latency=0.02)
+        sequential = time.perf_counter() - start
+        start = time.perf_counter()
+        self.hunt(workers=8, latency=0.02)
+        concurrent = time.perf_counter() - start
+        self.assertLess(concurrent, sequential / 3)
+
+
+class TestPrefetch(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.data_hunter = MovieDataHunter(categories=["Hollywood"], genres=["Drama"])
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def hunt(self, prefetch: int, latency: float = 0.0, work: float = 0.0):
+        """Single pair hunt whose consumer spends `work` seconds per page"""
+        with mock.patch(
+            "data_hunter.main.Search", make_fake_search(pages=8, latency=latency)
+        ):
+            hunted = []
+            for entry in self.data_hunter.hunt(
+                dir=self.dir.name, stream=True, prefetch=prefetch
+            ):
+                time.sleep(work)
+                hunted.append(entry)
+        for path in Path(self.dir.name).glob("*.csv"):
+            with open(path) as fh:
+                rows = list(csv.reader(fh))
+            path.unlink()
+        return hunted, rows
+
+    def test_same_output_as_sequential(self):
+        self.assertEqual(self.hunt(prefetch=0), self.hunt(prefetch=2))
+        self.assertEqual(self.hunt(prefetch=1), self.hunt(prefetch=8))
+
+    def test_overlaps_fetching_with_writing(self):
+        start = time.perf_counter()
+        self.hunt(prefetch=0, latency=0.03, work=0.03)
+        sequential = time.perf_counter() - start
+        start = time.perf_counter()
+        self.hunt(prefetch=2, latency=0.03, work=0.03)
+        pipelined = time.perf_counter() - start
+        self.assertLess(pipelined, sequential * 0.75)
+
+    def test_bounded_and_stopped_early(self):
+        pulled = []
+
+        def pages():
+            for number in range(100):
+                pulled.append(number)
+                yield number
+
+        items = prefetched(pages(), 3)
+        self.assertEqual([next(items) for _ in range(2)], [0, 1])
+        time.sleep(0.2)
+        # Two handed over, three queued and one waiting for room
+        self.assertLessEqual(len(pulled), 2 + 3 + 1)
+        items.close()
+        self.assertLessEqual(len(pulled), 2 + 3 + 1)
+
+    def test_errors_reach_consumer(self):
+        def pages():
+            yield 1
+            raise ValueError("listing failed")
+
+        items = prefetched(pages(), 2)
+        self.assertEqual(next(items), 1)
+        with self.assertRaises(ValueError):
+            next(items)
+
+
+if __name__ == "__main__":
+    unittest.main()
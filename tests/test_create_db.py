@@ -0,0 +1,46 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from click.testing import CliRunner
+from cli import Utils
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestCreateDb(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def create_db(self, *args) -> sqlite3.Connection:
+        output = Path(self.dir.name, f"movies-{len(args)}.db")
+        result = CliRunner().invoke(
+            Utils.create_db,
+            [str(DATA_DIR), "-p", "w*", "-o", str(output), *args],
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        return sqlite3.connect(output)
+
+    def test_stream_matches_pandas(self):
+        query = 'SELECT * FROM Movies ORDER BY genre, "index"'
+        expected = self.create_db().execute(query).fetchall()
+        for args in (["--stream"], ["--stream", "-c", "7", "-j", "2"]):
+            conn = self.create_db(*args)
+            self.assertEqual(conn.execute(query).fetchall(), expected)
+            indexes = {
+                entry[0]
+                for entry in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+            }
+            self.assertTrue(
+                {"ix_Movies_title", "ix_Movies_url", "ix_Movies_genre"} <= indexes
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
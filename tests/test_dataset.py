@@ -0,0 +1,49 @@
+import unittest
+from pathlib import Path
+import pandas
+from data_hunter.dataset import MovieDataset
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestMovieDataset(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dataset = MovieDataset.from_csv(DATA_DIR, "w*")
+        cls.df = pandas.concat(
+            [pandas.read_csv(path) for path in sorted(DATA_DIR.glob("w*.csv"))]
+        )
+
+    def test_one_record_per_url(self):
+        self.assertEqual(len(self.dataset), self.df["url"].nunique())
+
+    def test_genres_merged(self):
+        url = self.df[self.df.duplicated("url")]["url"].iloc[0]
+        expected = set(self.df[self.df["url"] == url]["genre"])
+        self.assertEqual(set(self.dataset.get(url).genres), expected)
+
+    def test_filter_matches_pandas(self):
+        positions = self.dataset.filter(
+            years=(2000, 2010), genres=["War"], categories=["Hollywood"]
+        )
+        df = self.df
+        expected = df[
+            (df["year"] >= 2000)
+            & (df["year"] <= 2010)
+            & (df["genre"] == "War")
+            & (df["category"] == "Hollywood")
+        ]["url"]
+        self.assertEqual(
+            {self.dataset.urls[position] for position in positions}, set(expected)
+        )
+
+    def test_filter_match_all(self):
+        both = self.dataset.filter(genres=["War", "Western"], match_all=True)
+        for record in self.dataset.select(both):
+            self.assertTrue({"War", "Western"} <= set(record.genres))
+        self.assertLess(len(both), len(self.dataset.filter(genres=["War"])))
+
+
+if __name__ == "__main__":
+    unittest.main()
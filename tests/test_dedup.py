@@ -0,0 +1,155 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+import numpy
+from click.testing import CliRunner
+from data_hunter.dedup import MinHashLSH, find_duplicates, shingles
+from cli import Deduplication, DatabaseRelater
+
+PLOT = (
+    "A retired safecracker is pulled back into one last job by his old crew, "
+    "only to find that the vault they are after belongs to the man who framed him"
+)
+ROWS = [
+    ("Crime", "Hollywood", "The Last Vault", 2012, "BluRay", PLOT, "u/vault", "c/1"),
+    ("Drama", "Hollywood", "The Last Vault", 2012, "BluRay", PLOT, "u/vault", "c/1"),
+    (
+        "Crime",
+        "Hollywood",
+        "The Last Vault [Hindi]",
+        2012,
+        "WEBRip",
+        PLOT,
+        "u/v-hi",
+        "c/2",
+    ),
+    (
+        "Action",
+        "Hollywood",
+        "The Last Vault",
+        1971,
+        "DVDRip",
+        PLOT,
+        "u/vault-71",
+        "c/3",
+    ),
+    (
+        "Drama",
+        "Hollywood",
+        "Solo",
+        2010,
+        "WebRip",
+        "Alone at sea for a year",
+        "u/solo",
+        "c/4",
+    ),
+    (
+        "Drama",
+        "Hollywood",
+        "Duo",
+        2010,
+        "WebRip",
+        "Two friends open a bakery",
+        "u/duo",
+        "c/5",
+    ),
+    (
+        "Comedy",
+        "Bollywood",
+        "Solo",
+        2010,
+        "DVDRip",
+        "A stand-up comic sets out on his first tour",
+        "u/solo-in",
+        "c/6",
+    ),
+]
+
+
+class TestDedup(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.flat = Path(self.dir.name, "flat.db")
+        conn = sqlite3.connect(self.flat)
+        conn.execute(
+            'CREATE TABLE Movies ("index" INTEGER, genre TEXT, category TEXT, '
+            "title TEXT, year INTEGER, distribution TEXT, description TEXT, "
+            "url TEXT, cover_photo TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO Movies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(index, *row) for index, row in enumerate(ROWS)],
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_signature_estimates_jaccard(self):
+        lsh = MinHashLSH(num_perm=256, bands=64)
+        first = {f"s{index}" for index in range(200)}
+        for shared in (0, 50, 100, 150, 200):
+            second = {f"s{index}" for index in range(200 - shared, 400 - shared)}
+            signatures = lsh.signatures([first, second])
+            estimate = lsh.similarity(signatures, numpy.array([[0, 1]]))[0]
+            self.assertAlmostEqual(
+                estimate, len(first & second) / len(first | second), delta=0.1
+            )
+
+    def test_clusters_duplicates_not_remakes(self):
+        clusters = find_duplicates(self.flat)
+        self.assertEqual(len(clusters), 1)
+        [cluster] = clusters
+        self.assertEqual(
+            {member["url"] for member in cluster["members"]}, {"u/vault", "u/v-hi"}
+        )
+        # Listed under the most genres
+        self.assertEqual(cluster["canonical"], "u/vault")
+        self.assertGreaterEqual(cluster["score"], 0.6)
+
+    def test_relate_with_clusters(self):
+        report = Path(self.dir.name, "duplicates.json")
+        result = CliRunner().invoke(
+            Deduplication.dedup, [str(self.flat), "-o", str(report)]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(json.loads(report.read_text())), 1)
+        output = Path(self.dir.name, "relational.db")
+        result = CliRunner().invoke(
+            DatabaseRelater.relate_tables,
+            [str(self.flat), str(output), "--clusters", str(report)],
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        conn = sqlite3.connect(output)
+        movies = sorted(conn.execute("SELECT title, url FROM movie"))
+        genres = conn.execute(
+            "SELECT group_concat(g.name) FROM movie_genre mg "
+            "JOIN genre g ON g.id = mg.genre_id JOIN movie m ON m.id = mg.movie_id "
+            "WHERE m.url = 'u/vault'"
+        ).fetchone()[0]
+        conn.close()
+        # Remakes and movies of the same title and year keep their title
+        self.assertEqual(
+            movies,
+            [
+                ("Duo", "u/duo"),
+                ("Solo", "u/solo"),
+                ("Solo", "u/solo-in"),
+                ("The Last Vault", "u/vault"),
+                ("The Last Vault", "u/vault-71"),
+            ],
+        )
+        self.assertEqual(sorted(genres.split(",")), ["Crime", "Drama"])
+        with self.assertRaises(AssertionError):
+            DatabaseRelater.incremental_relate(str(self.flat), str(output))
+
+    def test_shingles(self):
+        self.assertEqual(shingles("Heat 1995", 1995, None), {"t:heat", "y:1995"})
+
+
+if __name__ == "__main__":
+    unittest.main()
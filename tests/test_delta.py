@@ -0,0 +1,183 @@
+import os
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+from click.testing import CliRunner
+from data_hunter.main import MovieDataHunter
+from data_hunter.delta import PageManifest, read_dataset
+from data_hunter.sinks import RefreshSink
+from cli import Utils
+
+
+def make_search(listings: dict, requested: list):
+    """`Search` replacement serving `listings[(category, genre)]`, a list of
+    pages of (title, description), recording every page requested"""
+
+    class Search:
+        def __init__(self, query):
+            self.query = query
+
+        def get_all_results(self, stream: bool = False, limit: int = 1_000_000):
+            key = (self.query.category, self.query.name)
+            for number, page in enumerate(listings[key]):
+                requested.append((*key, number))
+                yield SimpleNamespace(
+                    movies=[
+                        SimpleNamespace(
+                            title=title,
+                            year=2001,
+                            distribution="BluRay",
+                            about=description,
+                            url=f"https://fzmovies.net/{title.replace(' ', '-')}.htm",
+                            cover_photo=None,
+                        )
+                        for title, description in page
+                    ]
+                )
+
+    return Search
+
+
+class TestRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.data_hunter = MovieDataHunter(
+            categories=["Hollywood", "Bollywood"], genres=["Action", "Drama"]
+        )
+        self.listings = {
+            (category, genre): [
+                [
+                    (f"{category} {genre} {page}-{number}", "About")
+                    for number in range(5)
+                ]
+                for page in range(3)
+            ]
+            for category in ("Hollywood", "Bollywood")
+            for genre in ("Action", "Drama")
+        }
+        self.requested = []
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def hunt(self, dir=None, refresh=True, workers=1):
+        self.requested.clear()
+        with mock.patch(
+            "data_hunter.main.Search", make_search(self.listings, self.requested)
+        ):
+            return list(
+                self.data_hunter.hunt(
+                    dir=dir or self.dir.name,
+                    stream=True,
+                    refresh=refresh,
+                    workers=workers,
+                )
+            )
+
+    def delta(self) -> dict:
+        with open(Path(self.dir.name, RefreshSink.delta_filename)) as fh:
+            return json.load(fh)
+
+    def test_unchanged_listings_stop_at_first_page(self):
+        self.hunt()
+        self.assertEqual(len(self.requested), 4 * 3)
+        self.assertEqual(len(self.delta()["added"]), 4 * 3 * 5)
+        modified = {
+            path: os.stat(path).st_mtime_ns
+            for path in Path(self.dir.name).glob("*.csv")
+        }
+        self.assertEqual(self.hunt(workers=2), [])
+        self.assertEqual(len(self.requested), 4)
+        self.assertEqual(
+            self.delta(), dict(changed=[], added=[], removed=[], modified=[])
+        )
+        for path, mtime_ns in modified.items():
+            self.assertEqual(os.stat(path).st_mtime_ns, mtime_ns)
+
+    def test_changed_pages_are_merged_and_diffed(self):
+        self.hunt()
+        first_page = self.listings[("Bollywood", "Drama")][0]
+        first_page[0] = (first_page[0][0], "Updated")
+        first_page[1] = ("Bollywood Drama new", "About")
+        self.hunt()
+        # Page 0 changed, page 1 unchanged
+        self.assertIn(("Bollywood", "Drama", 1), self.requested)
+        self.assertNotIn(("Bollywood", "Drama", 2), self.requested)
+        delta = self.delta()
+        self.assertEqual(delta["changed"], ["drama.csv"])
+        self.assertEqual(
+            [row["title"] for row in delta["added"]], ["Bollywood Drama new"]
+        )
+        self.assertEqual(
+            [row["title"] for row in delta["removed"]], ["Bollywood Drama 0-1"]
+        )
+        self.assertEqual(
+            [(row["title"], row["description"]) for row in delta["modified"]],
+            [("Bollywood Drama 0-0", "Updated")],
+        )
+        fresh = Path(self.dir.name, "fresh")
+        fresh.mkdir()
+        self.hunt(dir=str(fresh), refresh=False)
+        for genre in ("action", "drama"):
+            self.assertEqual(
+                read_dataset(Path(self.dir.name, genre + ".csv")),
+                read_dataset(fresh / (genre + ".csv")),
+            )
+        manifest = PageManifest(self.dir.name)
+        self.assertEqual(len(manifest.get("Bollywood", "Drama")), 3)
+
+    def test_failed_hunt_leaves_datasets(self):
+        self.hunt()
+        before = read_dataset(Path(self.dir.name, "action.csv"))
+        self.listings[("Hollywood", "Action")][0][0] = ("Changed", "About")
+        del self.listings[("Bollywood", "Drama")]
+        with self.assertRaises(KeyError):
+            self.hunt()
+        self.assertEqual(read_dataset(Path(self.dir.name, "action.csv")), before)
+
+    def test_create_db_applies_delta(self):
+        self.hunt()
+        database = str(Path(self.dir.name, "movies-data.db"))
+        expected = str(Path(self.dir.name, "expected.db"))
+        Utils.stream_to_db(
+            sorted(str(path) for path in Path(self.dir.name).glob("*.csv")), database
+        )
+        first_page = self.listings[("Hollywood", "Action")][0]
+        first_page[0] = (first_page[0][0], "Updated")
+        first_page[1] = ("Hollywood Action new", "About")
+        self.hunt()
+        result = CliRunner().invoke(
+            Utils.create_db,
+            [
+                self.dir.name,
+                "-o",
+                database,
+                "--delta",
+                str(Path(self.dir.name, RefreshSink.delta_filename)),
+            ],
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        Utils.stream_to_db(
+            sorted(str(path) for path in Path(self.dir.name).glob("*.csv")), expected
+        )
+        movies = []
+        for path in (database, expected):
+            conn = sqlite3.connect(path)
+            movies.append(
+                sorted(
+                    conn.execute(
+                        'SELECT genre, category, title, description, url FROM "Movies"'
+                    )
+                )
+            )
+            conn.close()
+        self.assertEqual(movies[0], movies[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
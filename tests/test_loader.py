@@ -0,0 +1,37 @@
+import unittest
+from pathlib import Path
+from unittest import mock
+import pandas
+from data_hunter import loader
+from cli import iter_csv_chunks
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.csv_filenames = sorted(str(path) for path in DATA_DIR.glob("*.csv"))
+
+    def test_frames_match_pandas(self):
+        loaded = list(loader.load_frames(self.csv_filenames, jobs=3))
+        self.assertEqual([entry[0] for entry in loaded], self.csv_filenames)
+        for csv_file, df in loaded:
+            pandas.testing.assert_frame_equal(df, pandas.read_csv(csv_file))
+
+    def test_rows_match_iter_csv_chunks(self):
+        for csv_file, rows in loader.load_rows(self.csv_filenames[:4], jobs=2):
+            (expected,) = iter_csv_chunks(csv_file, 1_000_000)
+            self.assertEqual(rows, expected)
+
+    def test_fallback_without_arrow(self):
+        csv_filenames = self.csv_filenames[:3]
+        with mock.patch("data_hunter.loader.arrow_available", return_value=False):
+            frames = list(loader.load_frames(csv_filenames, jobs=2))
+            rows = list(loader.load_rows(csv_filenames, jobs=2))
+        self.assertEqual([entry[0] for entry in frames], csv_filenames)
+        self.assertEqual(rows, list(loader.load_rows(csv_filenames, jobs=2)))
+
+
+if __name__ == "__main__":
+    unittest.main()
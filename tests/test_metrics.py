@@ -0,0 +1,96 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from click.testing import CliRunner
+from data_hunter.main import MovieDataHunter
+from data_hunter.metrics import Metrics, metrics
+from fake_search import make_fake_search
+import cli
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        metrics.reset()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+        self.dir.cleanup()
+
+    def test_disabled_records_nothing(self):
+        run_metrics = Metrics()
+        with run_metrics.timer("fetch", ("Hollywood", "Action")):
+            pass
+        run_metrics.count("pages")
+        self.assertEqual(
+            run_metrics.to_dict(), dict(stages={}, counters={}, histograms={})
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        run_metrics = Metrics()
+        run_metrics.enable()
+        for seconds in (0.001, 0.02, 0.02, 100):
+            run_metrics.observe("fetch", seconds, ("Hollywood", "Action"))
+        (histogram,) = run_metrics.to_dict()["histograms"]["fetch"]
+        self.assertEqual(histogram["count"], 4)
+        self.assertEqual(histogram["buckets"]["0.005"], 1)
+        self.assertEqual(histogram["buckets"]["0.025"], 3)
+        self.assertEqual(histogram["buckets"]["30.0"], 3)
+        self.assertEqual(histogram["buckets"]["+Inf"], 4)
+        text = run_metrics.to_prometheus()
+        self.assertIn(
+            'data_hunter_fetch_latency_seconds_bucket{category="Hollywood",'
+            'genre="Action",le="+Inf"} 4',
+            text,
+        )
+        self.assertIn('data_hunter_stage_calls_total{stage="fetch"} 4', text)
+
+    def test_hunt_stages(self):
+        metrics.enable()
+        with mock.patch("data_hunter.main.Search", make_fake_search(pages=2)):
+            hunter = MovieDataHunter(
+                categories=["Hollywood"], genres=["Action", "Drama"]
+            )
+            list(hunter.hunt(dir=self.dir.name, stream=True))
+        recorded = metrics.to_dict()
+        self.assertEqual(recorded["counters"]["pages"], 4)
+        self.assertEqual(recorded["counters"]["rows"], 80)
+        self.assertGreater(recorded["counters"]["bytes"], 0)
+        for stage in ("fetch", "transform", "write", "commit"):
+            self.assertIn(stage, recorded["stages"])
+        self.assertCountEqual(
+            [entry["labels"] for entry in recorded["histograms"]["fetch"]],
+            [["Hollywood", "Action"], ["Hollywood", "Drama"]],
+        )
+
+    def test_cli_metrics_file(self):
+        metrics_file = Path(self.dir.name, "metrics.json")
+        result = CliRunner().invoke(
+            cli.data_hunter,
+            [
+                "--metrics-file",
+                str(metrics_file),
+                "create-db",
+                str(DATA_DIR),
+                "-p",
+                "w*",
+                "--stream",
+                "-o",
+                str(Path(self.dir.name, "movies.db")),
+            ],
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        recorded = json.loads(metrics_file.read_text())
+        for stage in ("create-db", "read", "write", "commit"):
+            self.assertIn(stage, recorded["stages"])
+        self.assertGreater(recorded["counters"]["rows"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from data_hunter.main import MovieDataHunter
+from data_hunter.cache import PageCache
+from fake_search import make_fake_search
+
+
+class OfflineSearch:
+    def __init__(self, query):
+        pass
+
+    def get_all_results(self, stream=False, limit=1_000_000):
+        raise ConnectionError("Offline")
+
+
+class TestPageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.cache = PageCache(Path(self.dir.name, "pages.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.dir.cleanup()
+
+    def hunt(self, search, limit=1_000_000, cache=None):
+        data_hunter = MovieDataHunter(
+            categories=["Hollywood"],
+            genres=["Action", "Drama"],
+            cache=cache or self.cache,
+        )
+        with mock.patch("data_hunter.main.Search", search):
+            return list(
+                data_hunter.hunt(
+                    dir=self.dir.name, prefix="run-", limit=limit, stream=True
+                )
+            )
+
+    def test_rerun_served_from_cache(self):
+        first = self.hunt(make_fake_search(pages=3))
+        second = self.hunt(OfflineSearch)
+        self.assertEqual(first, second)
+        self.assertEqual(self.cache.hits, 2 * 3)
+
+    def test_cache_only(self):
+        self.hunt(make_fake_search(pages=3), limit=40)
+        self.cache.cache_only = True
+        self.assertEqual(len(self.hunt(OfflineSearch)), 2 * 2)
+
+    def test_fetches_pages_missing(self):
+        self.hunt(make_fake_search(pages=3), limit=20)
+        search = make_fake_search(pages=3)
+        entries = self.hunt(search)
+        self.assertEqual([entry[3] for entry in entries], [20] * 6)
+        self.assertEqual(len(search.calls), 2)
+
+    def test_expiry(self):
+        self.hunt(make_fake_search(pages=1))
+        self.cache.ttl = 0
+        with self.assertRaises(ConnectionError):
+            self.hunt(OfflineSearch)
+
+    def test_lru_eviction(self):
+        self.cache.max_bytes = 1
+        self.hunt(make_fake_search(pages=3))
+        self.assertLessEqual(self.cache.size, 1)
+        self.cache.max_bytes = 2_500
+        self.hunt(make_fake_search(pages=3))
+        self.assertLessEqual(self.cache.size, 2_500)
+        self.assertGreater(self.cache.size, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+import csv
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import pandas
+from click.testing import CliRunner
+from data_hunter.main import MovieDataHunter
+from data_hunter.partitions import PartitionManifest, partition
+from fake_search import make_fake_search
+from cli import Utils
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestPartitions(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.partitioned = Path(self.dir.name, "partitioned")
+        self.partitioned.mkdir()
+        self.csv_filenames = sorted(str(path) for path in DATA_DIR.glob("w*.csv"))
+        self.manifest = partition(self.csv_filenames, self.partitioned)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def flat(self) -> pandas.DataFrame:
+        return pandas.concat(
+            [pandas.read_csv(csv_file) for csv_file in self.csv_filenames],
+            ignore_index=True,
+        )
+
+    def test_manifest(self):
+        partitions = json.loads(self.manifest.path.read_text())["partitions"]
+        self.assertEqual(sum(entry["rows"] for entry in partitions), len(self.flat()))
+        for entry in partitions:
+            path = self.partitioned / entry["path"]
+            self.assertEqual(entry["bytes"], path.stat().st_size)
+            # Terminated as the flat .csv files the partitions are made from
+            self.assertTrue(path.read_bytes().endswith(b"\r\n"))
+            with open(path, newline="") as fh:
+                rows = list(csv.DictReader(fh))
+            self.assertEqual(len(rows), entry["rows"])
+            self.assertEqual({row["category"] for row in rows}, {entry["category"]})
+            if entry["min_year"] is not None:
+                self.assertEqual(
+                    {int(row["year"]) for row in rows},
+                    {entry["min_year"]},
+                )
+                self.assertIn(f"year={entry['min_year']}", entry["path"])
+
+    def test_select_prunes(self):
+        manifest = PartitionManifest(self.partitioned)
+        selected = manifest.select(
+            categories=["Bollywood"], genres=["War"], years=(2000, 2009)
+        )
+        self.assertTrue(selected)
+        self.assertLess(len(selected), len(manifest.partitions))
+        for entry in selected:
+            self.assertEqual((entry["category"], entry["genre"]), ("Bollywood", "War"))
+            self.assertTrue(2000 <= entry["min_year"] <= entry["max_year"] <= 2009)
+        flat = self.flat()
+        expected = flat[
+            (flat["category"] == "Bollywood")
+            & (flat["genre"] == "War")
+            & flat["year"].between(2000, 2009)
+        ]
+        self.assertEqual(sum(entry["rows"] for entry in selected), len(expected))
+
+    def test_create_db_prunes_partitions(self):
+        output = Path(self.dir.name, "movies.db")
+        for args in ([], ["--stream", "-j", "2"]):
+            with self.subTest(args=args):
+                output.unlink(missing_ok=True)
+                result = CliRunner().invoke(
+                    Utils.create_db,
+                    [str(self.partitioned), "-o", str(output), "-j", "2"]
+                    + ["--category", "Hollywood", "-y", "1990", "1999", *args],
+                )
+                self.assertEqual(result.exit_code, 0, result.output)
+                conn = sqlite3.connect(output)
+                (count,) = conn.execute("SELECT count(*) FROM Movies").fetchone()
+                categories = conn.execute("SELECT DISTINCT category FROM Movies")
+                self.assertEqual(list(categories), [("Hollywood",)])
+                conn.close()
+                flat = self.flat()
+                self.assertEqual(
+                    count,
+                    len(
+                        flat[
+                            (flat["category"] == "Hollywood")
+                            & flat["year"].between(1990, 1999)
+                        ]
+                    ),
+                )
+
+    def test_to_format_parallel_matches_sequential(self):
+        outputs = []
+        for jobs in ("1", "3"):
+            output = Path(self.dir.name, f"movies-{jobs}")
+            result = CliRunner().invoke(
+                Utils.to_format,
+                [str(self.partitioned), "-o", str(output), "-f", "csv", "-j", jobs],
+            )
+            self.assertEqual(result.exit_code, 0, result.output)
+            outputs.append(output.with_suffix(".csv").read_text())
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_filters_require_partitions(self):
+        result = CliRunner().invoke(
+            Utils.to_format, [str(DATA_DIR), "-o", self.dir.name, "-g", "War"]
+        )
+        self.assertNotEqual(result.exit_code, 0)
+
+    def test_partition_command_replaces_partitions(self):
+        args = [str(DATA_DIR), "-o", str(self.partitioned), "-p", "w*"]
+        result = CliRunner().invoke(Utils.partition, args)
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIsInstance(result.exception, AssertionError)
+        for _ in range(2):
+            result = CliRunner().invoke(Utils.partition, args + ["--overwrite"])
+            self.assertEqual(result.exit_code, 0, result.output)
+            manifest = PartitionManifest(self.partitioned)
+            self.assertEqual(
+                sum(entry["rows"] for entry in manifest.partitions.values()),
+                len(self.flat()),
+            )
+            self.assertEqual(manifest.partitions, self.manifest.partitions)
+
+    def test_partitioned_sink(self):
+        hunted = Path(self.dir.name, "hunted")
+        hunted.mkdir()
+        with mock.patch("data_hunter.main.Search", make_fake_search(pages=2)):
+            list(
+                MovieDataHunter(
+                    categories=["Hollywood", "Bollywood"], genres=["Action"]
+                ).hunt(dir=hunted, stream=True, sink="partitioned")
+            )
+        manifest = PartitionManifest(hunted)
+        self.assertEqual(
+            sum(entry["rows"] for entry in manifest.partitions.values()), 2 * 2 * 20
+        )
+        self.assertEqual(
+            {entry["category"] for entry in manifest.partitions.values()},
+            {"Hollywood", "Bollywood"},
+        )
+
+    def test_prefixed_partitioned_hunt(self):
+        hunted = Path(self.dir.name, "hunted")
+        hunted.mkdir()
+        with mock.patch("data_hunter.main.Search", make_fake_search(pages=2)):
+            list(
+                MovieDataHunter(
+                    categories=["Hollywood", "Bollywood"], genres=["Action"]
+                ).hunt(dir=hunted, prefix="run-", stream=True, sink="partitioned")
+            )
+        self.assertTrue(PartitionManifest.exists(hunted, "run-"))
+        output = Path(self.dir.name, "movies.db")
+        for args in ([], ["-p", "run-*", "--category", "Bollywood"]):
+            with self.subTest(args=args):
+                result = CliRunner().invoke(
+                    Utils.create_db, [str(hunted), "-o", str(output), *args]
+                )
+                self.assertEqual(result.exit_code, 0, result.output)
+                conn = sqlite3.connect(output)
+                self.assertEqual(
+                    conn.execute('SELECT count(*) FROM "Movies"').fetchone()[0],
+                    2 * 20 * (1 if args else 2),
+                )
+                conn.close()
+                output.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
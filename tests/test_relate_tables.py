@@ -0,0 +1,243 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from click.testing import CliRunner
+from cli import DatabaseRelater, Utils
+
+ROWS = [
+    ("Action", "Hollywood", "Heat", 1995, "BluRay", "Crime saga", "u/heat", "c/heat"),
+    ("Crime", "Hollywood", "Heat", 1995, "BluRay", "Crime saga", "u/heat", "c/heat"),
+    ("Drama", "Bollywood", 'The "Quoted" One', 2001, "DVDRip", None, "u/q", "c/q"),
+    ("Action", "Bollywood", 'The "Quoted" One', 2001, "DVDRip", None, "u/q", "c/q"),
+    ("Drama", "Hollywood", "Solo", 2010, "WebRip", "Alone", "u/solo", "c/solo"),
+    ("Drama", "Hollywood", "Solo", 2010, "WebRip", "Alone", "u/solo", "c/solo"),
+]
+
+
+class TestRelateTables(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.flat = Path(self.dir.name, "flat.db")
+        conn = sqlite3.connect(self.flat)
+        conn.execute(
+            'CREATE TABLE Movies ("index" INTEGER, genre TEXT, category TEXT, '
+            "title TEXT, year INTEGER, distribution TEXT, description TEXT, "
+            "url TEXT, cover_photo TEXT)"
+        )
+        conn.executemany(
+            "INSERT INTO Movies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(index, *row) for index, row in enumerate(ROWS)],
+        )
+        conn.commit()
+        conn.close()
+
+    def append(self, rows, rebuild: bool = False):
+        conn = sqlite3.connect(self.flat)
+        with conn:
+            if rebuild:
+                conn.execute("DELETE FROM Movies")
+            conn.executemany(
+                "INSERT INTO Movies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(index, *row) for index, row in enumerate(rows)],
+            )
+        conn.close()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def dump(self, path: Path):
+        conn = sqlite3.connect(path)
+        movies = set(
+            conn.execute(
+                "SELECT m.title, m.year, m.distribution, m.description, m.url, "
+                "m.cover_photo, c.name FROM movie m JOIN category c "
+                "ON c.id = m.category_id"
+            )
+        )
+        links = sorted(
+            conn.execute(
+                "SELECT m.title, g.name FROM movie_genre mg "
+                "JOIN movie m ON m.id = mg.movie_id JOIN genre g ON g.id = mg.genre_id"
+            )
+        )
+        genres = sorted(conn.execute("SELECT name FROM genre"))
+        conn.close()
+        return movies, links, genres
+
+    def test_bulk_matches_orm(self):
+        bulk, orm = Path(self.dir.name, "bulk.db"), Path(self.dir.name, "orm.db")
+        counts = DatabaseRelater.bulk_relate(str(self.flat), str(bulk))
+        self.assertEqual(counts, DatabaseRelater.orm_relate(str(self.flat), str(orm)))
+        self.assertEqual(counts["movie"], 3)
+        self.assertEqual(counts["movie_genre"], 5)
+        self.assertEqual(self.dump(bulk), self.dump(orm))
+
+    def test_incremental_matches_bulk(self):
+        bulk = Path(self.dir.name, "bulk.db")
+        incremental = Path(self.dir.name, "incremental.db")
+        DatabaseRelater.bulk_relate(str(self.flat), str(bulk))
+        counts = DatabaseRelater.incremental_relate(str(self.flat), str(incremental))
+        self.assertEqual(counts, {"scanned": 6, "movie": 3, "movie_genre": 5})
+        self.assertEqual(self.dump(incremental), self.dump(bulk))
+
+    def test_incremental_applies_delta_only(self):
+        output = str(Path(self.dir.name, "relational.db"))
+        DatabaseRelater.incremental_relate(str(self.flat), output)
+        self.append(
+            [
+                (
+                    "War",
+                    "Hollywood",
+                    "Heat",
+                    1995,
+                    "BluRay",
+                    "Crime saga",
+                    "u/heat",
+                    "c/heat",
+                ),
+                (
+                    "Drama",
+                    "Hollywood",
+                    "Solo",
+                    2010,
+                    "WebRip",
+                    "Not alone",
+                    "u/solo",
+                    "c/solo",
+                ),
+                (
+                    "Sport",
+                    "Hollywood",
+                    "Rush",
+                    2013,
+                    "BluRay",
+                    "F1",
+                    "u/rush",
+                    "c/rush",
+                ),
+            ]
+        )
+        counts = DatabaseRelater.incremental_relate(str(self.flat), output)
+        self.assertEqual(counts, {"scanned": 3, "movie": 2, "movie_genre": 2})
+        movies, links, _ = self.dump(output)
+        self.assertIn(
+            ("Solo", 2010, "WebRip", "Not alone", "u/solo", "c/solo", "Hollywood"),
+            movies,
+        )
+        self.assertIn(("Heat", "War"), links)
+        self.assertEqual(len(movies), 4)
+        # Rerunning without new rows is a no-op
+        self.assertEqual(
+            DatabaseRelater.incremental_relate(str(self.flat), output),
+            {"scanned": 0, "movie": 0, "movie_genre": 0},
+        )
+
+    def test_incremental_rebuilt_source(self):
+        output = str(Path(self.dir.name, "relational.db"))
+        DatabaseRelater.incremental_relate(str(self.flat), output)
+        before = self.dump(Path(output))
+        self.append(ROWS[::-1], rebuild=True)
+        counts = DatabaseRelater.incremental_relate(str(self.flat), output)
+        self.assertEqual(counts, {"scanned": 6, "movie": 0, "movie_genre": 0})
+        self.assertEqual(self.dump(Path(output)), before)
+
+    def test_incremental_rebuilt_source_same_first_row(self):
+        output = str(Path(self.dir.name, "relational.db"))
+        DatabaseRelater.incremental_relate(str(self.flat), output)
+        rush = ("War", "Hollywood", "Rush", 2013, "BluRay", "F1", "u/rush", "c/rush")
+        self.append(ROWS[:1] + [rush] + ROWS[1:], rebuild=True)
+        counts = DatabaseRelater.incremental_relate(str(self.flat), output)
+        self.assertEqual(counts, {"scanned": 7, "movie": 1, "movie_genre": 1})
+        self.assertIn(("Rush", "War"), self.dump(Path(output))[1])
+        self.assertEqual(
+            DatabaseRelater.incremental_relate(str(self.flat), output),
+            {"scanned": 0, "movie": 0, "movie_genre": 0},
+        )
+
+    def test_incremental_reads_changed_rows_only(self):
+        output = str(Path(self.dir.name, "relational.db"))
+        self.append(
+            [
+                ("Drama", "Hollywood", f"Movie {number}", 2000, "BluRay", "About")
+                + (f"u/{number}", None)
+                for number in range(20_000)
+            ]
+        )
+        counts = DatabaseRelater.incremental_relate(str(self.flat), output)
+        self.assertEqual(counts["scanned"], len(ROWS) + 20_000)
+        conn = sqlite3.connect(self.flat)
+        with conn:
+            conn.execute(
+                "UPDATE Movies SET description = 'Updated' WHERE url = 'u/123'"
+            )
+        conn.close()
+        self.assertEqual(
+            DatabaseRelater.incremental_relate(str(self.flat), output),
+            {"scanned": 1, "movie": 1, "movie_genre": 0},
+        )
+        movies, _, _ = self.dump(Path(output))
+        self.assertIn(
+            ("Movie 123", 2000, "BluRay", "Updated", "u/123", None, "Hollywood"),
+            movies,
+        )
+        # Consumed changes are trimmed from the log
+        conn = sqlite3.connect(self.flat)
+        self.assertEqual(
+            conn.execute(
+                f"SELECT count(*) FROM {DatabaseRelater.changelog}"
+            ).fetchone()[0],
+            0,
+        )
+        # A table recreated without the triggers is scanned in full
+        with conn:
+            conn.execute("ALTER TABLE Movies RENAME TO Flat")
+            conn.execute("CREATE TABLE Movies AS SELECT * FROM Flat")
+        conn.close()
+        counts = DatabaseRelater.incremental_relate(str(self.flat), output)
+        self.assertEqual(counts["scanned"], len(ROWS) + 20_000)
+        self.assertEqual(counts["movie"], 0)
+
+    def test_incremental_after_delta(self):
+        output = str(Path(self.dir.name, "relational.db"))
+        DatabaseRelater.incremental_relate(str(self.flat), output)
+        columns = ("genre", "category", "title", "year", "distribution")
+        columns += ("description", "url", "cover_photo")
+        # Rows as read back from the hunted .csv files
+        solo = dict(zip(columns, map(str, ROWS[-1])), description="Not alone")
+        rush = dict(zip(columns, ("War", "Hollywood", "Rush", "2013", "BluRay")))
+        rush.update(description="F1", url="u/rush", cover_photo="c/rush")
+        # The modified row is the last one, its rowid reused without care
+        Utils.apply_delta(
+            dict(added=[rush], removed=[], modified=[solo]), str(self.flat)
+        )
+        conn = sqlite3.connect(self.flat)
+        rowids = dict(
+            conn.execute("SELECT title, rowid FROM Movies WHERE genre = 'Drama'")
+        )
+        conn.close()
+        self.assertGreater(rowids["Solo"], len(ROWS))
+        DatabaseRelater.incremental_relate(str(self.flat), output)
+        movies, links, _ = self.dump(Path(output))
+        self.assertIn(
+            ("Solo", 2010, "WebRip", "Not alone", "u/solo", "c/solo", "Hollywood"),
+            movies,
+        )
+        self.assertIn(("Rush", "War"), links)
+        self.assertEqual(
+            DatabaseRelater.incremental_relate(str(self.flat), output),
+            {"scanned": 0, "movie": 0, "movie_genre": 0},
+        )
+
+    def test_command(self):
+        output = Path(self.dir.name, "relational.db")
+        result = CliRunner().invoke(
+            DatabaseRelater.relate_tables, [str(self.flat), str(output)]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn(('The "Quoted" One', "Drama"), self.dump(output)[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
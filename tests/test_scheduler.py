@@ -0,0 +1,180 @@
+import time
+import threading
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from data_hunter.main import MovieDataHunter
+from data_hunter.checkpoint import Checkpoint
+from data_hunter.scheduler import FetchScheduler, RetryBudgetExceeded
+from fake_search import make_fake_search
+
+
+def make_flaky_search(
+    failures: int,
+    pages: int = 3,
+    latency: float = 0.0,
+    at: tuple = (1,),
+    genres: tuple = None,
+    error: type = ConnectionError,
+):
+    """Fake `Search` whose listings (of `genres`, all by default) fail
+    `failures` times before each of the pages numbered `at`"""
+    search = make_fake_search(pages=pages, latency=latency)
+    state = {number: failures for number in at}
+    lock = threading.Lock()
+
+    class FlakySearch(search):
+        def get_all_results(self, stream=False, limit=1_000_000):
+            for number, result in enumerate(super().get_all_results(stream, limit)):
+                with lock:
+                    if state.get(number) and (
+                        genres is None or self.query.name in genres
+                    ):
+                        state[number] -= 1
+                        raise error("Too many requests")
+                yield result
+
+    return FlakySearch
+
+
+class TestFetchScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def hunt(
+        self, search, scheduler, workers=1, genres=["Action"], dir=None, resume=False
+    ):
+        data_hunter = MovieDataHunter(
+            categories=["Hollywood"], genres=genres, scheduler=scheduler
+        )
+        with mock.patch("data_hunter.main.Search", search):
+            return list(
+                data_hunter.hunt(
+                    dir=dir or self.dir.name,
+                    stream=True,
+                    workers=workers,
+                    resume=resume,
+                )
+            )
+
+    def test_retries_transient_failures(self):
+        scheduler = FetchScheduler(retries=2, sleep=lambda seconds: None)
+        entries = self.hunt(make_flaky_search(failures=2), scheduler)
+        self.assertEqual([entry[2] for entry in entries], [20, 40, 60])
+        self.assertEqual(scheduler.stats["retries"], 2)
+        self.assertEqual(scheduler.stats["failures"], 2)
+        # Earned back by the pages fetched since
+        self.assertEqual(scheduler.stats["retry_budgets"], {("Hollywood", "Action"): 2})
+
+    def test_retry_budget(self):
+        scheduler = FetchScheduler(retries=1, sleep=lambda seconds: None)
+        search = make_flaky_search(failures=2)
+        query = SimpleNamespace(category="Hollywood", name="Action")
+        with self.assertRaises(RetryBudgetExceeded):
+            list(
+                scheduler.run(
+                    "Hollywood", "Action", lambda: search(query).get_all_results()
+                )
+            )
+        self.assertEqual(scheduler.stats["abandoned"], 1)
+
+    def test_budget_per_category_genre_pair(self):
+        scheduler = FetchScheduler(retries=1, sleep=lambda seconds: None)
+        failures = {"Hollywood": 2, "Bollywood": 1}
+
+        def listing(category):
+            if failures[category]:
+                failures[category] -= 1
+                raise ConnectionError("Too many requests")
+            yield from range(3)
+
+        with self.assertRaises(RetryBudgetExceeded):
+            list(scheduler.run("Hollywood", "Action", lambda: listing("Hollywood")))
+        pages = scheduler.run("Bollywood", "Action", lambda: listing("Bollywood"))
+        self.assertEqual(list(pages), [0, 1, 2])
+        self.assertEqual(
+            scheduler.stats["retry_budgets"],
+            {("Hollywood", "Action"): 0, ("Bollywood", "Action"): 1},
+        )
+
+    def test_budget_earned_back(self):
+        scheduler = FetchScheduler(retries=1, sleep=lambda seconds: None)
+        search = make_flaky_search(failures=1, pages=5, at=(1, 3))
+        entries = self.hunt(search, scheduler)
+        self.assertEqual(entries[-1][2], 5 * 20)
+        self.assertEqual(scheduler.stats["retries"], 2)
+        self.assertEqual(scheduler.stats["abandoned"], 0)
+
+    def test_exhausted_pair_is_given_up_on(self):
+        for workers in (1, 2):
+            with self.subTest(workers=workers), tempfile.TemporaryDirectory() as dir:
+                scheduler = FetchScheduler(retries=1, sleep=lambda seconds: None)
+                search = make_flaky_search(failures=2, genres=("Action",))
+                with self.assertLogs(level="WARNING"):
+                    entries = self.hunt(
+                        search, scheduler, workers, ["Action", "Drama"], dir, True
+                    )
+                movies = {entry[1]: entry[2] for entry in entries}
+                self.assertEqual(movies, {"Action": 20, "Drama": 60})
+                self.assertEqual(scheduler.stats["abandoned"], 1)
+                with Checkpoint.in_dir(dir) as checkpoint:
+                    self.assertEqual(
+                        list(checkpoint.abandoned()), [("Hollywood", "Action")]
+                    )
+                    self.assertEqual(
+                        checkpoint.progress("Hollywood", "Action"), (1, 20, False)
+                    )
+                    self.assertTrue(checkpoint.progress("Hollywood", "Drama")[2])
+                # Resumed from the page the pair was given up on after
+                entries = self.hunt(
+                    make_fake_search(pages=3), scheduler, workers, ["Action"], dir, True
+                )
+                self.assertEqual(entries[-1][2:4], (60, 20))
+                with Checkpoint.in_dir(dir) as checkpoint:
+                    self.assertEqual(checkpoint.abandoned(), {})
+
+    def test_non_transient_errors_are_raised(self):
+        scheduler = FetchScheduler(retries=3, sleep=lambda seconds: None)
+        with self.assertRaises(KeyError):
+            self.hunt(make_flaky_search(failures=1, error=KeyError), scheduler)
+        self.assertEqual(scheduler.stats["retries"], 0)
+
+    def test_backoff_grows_exponentially(self):
+        delays = []
+        scheduler = FetchScheduler(retries=3, backoff=1, sleep=delays.append)
+        with mock.patch("random.uniform", lambda low, high: high):
+            self.hunt(make_flaky_search(failures=3), scheduler)
+        self.assertEqual(delays, [1, 2, 4])
+
+    def test_rate_limit(self):
+        scheduler = FetchScheduler(rate=50)
+        start = time.perf_counter()
+        self.hunt(make_fake_search(pages=10), scheduler)
+        # 11 requests, the first one served by the initial token
+        self.assertGreaterEqual(time.perf_counter() - start, 10 / 50 * 0.9)
+
+    def test_aimd_concurrency(self):
+        scheduler = FetchScheduler(max_concurrency=4, sleep=lambda seconds: None)
+        genres = ["Action", "Drama", "Comedy", "Horror"]
+        self.hunt(make_flaky_search(failures=1, latency=0.01), scheduler, 4, genres)
+        self.assertGreater(scheduler.stats["max_in_flight"], 1)
+        self.assertLessEqual(scheduler.stats["max_in_flight"], 4)
+        with scheduler._lock:
+            scheduler.concurrency = 4
+        with self.assertRaises(ValueError):
+            with scheduler.request():
+                raise ValueError()
+        self.assertEqual(scheduler.stats["concurrency"], 2)
+        for _ in range(10):
+            with scheduler.request():
+                pass
+        self.assertGreater(scheduler.stats["concurrency"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import glob
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from cli import DatabaseRelater, Utils
+from data_hunter.search_index import SearchIndex
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.TemporaryDirectory()
+        cls.flat = str(Path(cls.dir.name, "flat.db"))
+        cls.relational = str(Path(cls.dir.name, "relational.db"))
+        Utils.stream_to_db(sorted(glob.glob(str(DATA_DIR / "w*.csv"))), cls.flat)
+        DatabaseRelater.bulk_relate(cls.flat, cls.relational)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.dir.cleanup()
+
+    def test_flat_and_relational_agree(self):
+        results = []
+        for db_path in (self.flat, self.relational):
+            with SearchIndex(db_path) as search_index:
+                search_index.update(rebuild=True)
+                movies, latency = search_index.search(
+                    "soldier", genres=["War"], years=(1990, 2020), limit=1000
+                )
+            self.assertTrue(movies)
+            for movie in movies:
+                self.assertIn("War", movie["genres"])
+                self.assertTrue(1990 <= movie["year"] <= 2020)
+            results.append({movie["url"] for movie in movies})
+        self.assertEqual(*results)
+
+    def test_incremental_update(self):
+        with SearchIndex(self.flat) as search_index:
+            search_index.update(rebuild=True)
+            self.assertEqual(search_index.update(), 0)
+            conn = sqlite3.connect(self.flat)
+            with conn:
+                conn.execute(
+                    "INSERT INTO Movies (genre, category, title, year, description, url) "
+                    "VALUES ('War', 'Hollywood', 'Zyxwv', 2024, 'A \"quoted\" plot', 'u/z')"
+                )
+            conn.close()
+            self.assertEqual(search_index.update(), 1)
+            movies, _ = search_index.search('zyxwv "quoted')
+            self.assertEqual([movie["title"] for movie in movies], ["Zyxwv"])
+
+    def test_changed_movies_reindexed(self):
+        flat = shutil.copy(self.flat, Path(self.dir.name, "changed-flat.db"))
+        relational = shutil.copy(
+            self.relational, Path(self.dir.name, "changed-relational.db")
+        )
+        DatabaseRelater.incremental_relate(flat, relational)
+        url = "https://fzmovies.net/movie-300%20Rise%20of%20an%20Empire--hmp4.htm"
+        for db_path in (flat, relational):
+            with SearchIndex(db_path) as search_index:
+                search_index.update(rebuild=True)
+        conn = sqlite3.connect(flat)
+        with conn:
+            conn.execute(
+                "UPDATE Movies SET description = 'A zyxwv plot' WHERE url = ?", (url,)
+            )
+        conn.close()
+        DatabaseRelater.incremental_relate(flat, relational)
+        for db_path in (flat, relational):
+            with SearchIndex(db_path) as search_index:
+                self.assertEqual(search_index.update(), 1)
+                movies, _ = search_index.search("zyxwv")
+                self.assertEqual([movie["url"] for movie in movies], [url])
+                movies, _ = search_index.search("themistokles", limit=100)
+                self.assertNotIn(url, [movie["url"] for movie in movies])
+        conn = sqlite3.connect(flat)
+        with conn:
+            conn.execute("DELETE FROM Movies WHERE url = ?", (url,))
+        conn.close()
+        with SearchIndex(flat) as search_index:
+            self.assertEqual(search_index.update(), 0)
+            self.assertEqual(search_index.search("zyxwv")[0], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
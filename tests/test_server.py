@@ -0,0 +1,169 @@
+import glob
+import json
+import shutil
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from urllib.parse import quote
+from cli import DatabaseRelater, Utils
+from data_hunter.search_index import SearchIndex
+from data_hunter.server import MovieServer
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestMovieServer(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.TemporaryDirectory()
+        flat = str(Path(cls.dir.name, "flat.db"))
+        cls.relational = str(Path(cls.dir.name, "relational.db"))
+        Utils.stream_to_db(sorted(glob.glob(str(DATA_DIR / "w*.csv"))), flat)
+        DatabaseRelater.bulk_relate(flat, cls.relational)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.dir.cleanup()
+
+    async def asyncSetUp(self):
+        self.db_path = str(Path(self.dir.name, f"{self.id()}.db"))
+        shutil.copy(self.relational, self.db_path)
+        self.server = MovieServer(self.db_path, pool_size=2)
+        await self.server.start("127.0.0.1", 0)
+        self.reader, self.writer = await asyncio.open_connection(
+            "127.0.0.1", self.server.port
+        )
+
+    async def asyncTearDown(self):
+        self.writer.close()
+        await self.server.close()
+
+    async def get(self, target: str):
+        """Request over the same kept-alive connection"""
+        self.writer.write(f"GET {target} HTTP/1.1\r\nHost: test\r\n\r\n".encode())
+        await self.writer.drain()
+        return await self.read_response()
+
+    async def read_response(self):
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while (line := await self.reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.lower()] = value.strip()
+        body = await self.reader.readexactly(int(headers["content-length"]))
+        return status, json.loads(body)
+
+    def query(self, statement: str, *parameters) -> list:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(statement, parameters).fetchall()
+        finally:
+            conn.close()
+
+    async def test_lookups(self):
+        [(id, url, title)] = self.query("SELECT id, url, title FROM movie LIMIT 1")
+        status, movie = await self.get(f"/movies/{id}")
+        self.assertEqual(status, 200)
+        self.assertEqual((movie["title"], movie["url"]), (title, url))
+        self.assertTrue(movie["genres"])
+        status, by_url = await self.get(f"/movies?url={quote(url, safe='')}")
+        self.assertEqual((status, by_url), (200, movie))
+        status, error = await self.get("/movies/999999999")
+        self.assertEqual(status, 404)
+        self.assertIn("error", error)
+        status, _ = await self.get("/movies?limit=0")
+        self.assertEqual(status, 400)
+
+    async def test_keyset_pagination(self):
+        expected = [
+            id
+            for (id,) in self.query(
+                "SELECT m.id FROM movie m JOIN category c ON c.id = m.category_id "
+                "WHERE c.name = 'Hollywood' AND m.year BETWEEN 2000 AND 2010 "
+                "AND EXISTS (SELECT 1 FROM movie_genre mg JOIN genre g "
+                "ON g.id = mg.genre_id WHERE mg.movie_id = m.id AND g.name = 'War') "
+                "ORDER BY m.id"
+            )
+        ]
+        self.assertGreater(len(expected), 7)
+        ids, after = [], 0
+        while after is not None:
+            status, page = await self.get(
+                "/movies?genre=war&category=hollywood&year_from=2000&year_to=2010"
+                f"&limit=7&after={after}"
+            )
+            self.assertEqual(status, 200)
+            self.assertLessEqual(len(page["movies"]), 7)
+            for movie in page["movies"]:
+                self.assertIn("War", movie["genres"])
+            ids.extend(movie["id"] for movie in page["movies"])
+            after = page["next"]
+        self.assertEqual(ids, expected)
+
+    async def test_search(self):
+        status, like = await self.get("/search?q=love&limit=500")
+        self.assertEqual(status, 200)
+        self.assertTrue(like["movies"])
+        for movie in like["movies"]:
+            self.assertIn("love", movie["title"].lower())
+        with SearchIndex(self.db_path) as search_index:
+            search_index.update()
+        await self.server.close()
+        self.server = MovieServer(self.db_path)
+        await self.server.start("127.0.0.1", 0)
+        self.reader, self.writer = await asyncio.open_connection(
+            "127.0.0.1", self.server.port
+        )
+        status, ranked = await self.get("/search?q=love&limit=5")
+        self.assertEqual(status, 200)
+        self.assertEqual(len(ranked["movies"]), 5)
+        self.assertIn("love", ranked["movies"][0]["title"].lower())
+        status, _ = await self.get("/search?q=")
+        self.assertEqual(status, 400)
+
+    async def test_cache_invalidated_on_change(self):
+        [(id,)] = self.query("SELECT id FROM movie LIMIT 1")
+        _, movie = await self.get(f"/movies/{id}")
+        _, cached = await self.get(f"/movies/{id}")
+        self.assertEqual(cached, movie)
+        self.assertEqual(self.server.cache.hits, 1)
+        conn = sqlite3.connect(self.db_path)
+        with conn:
+            conn.execute("UPDATE movie SET title = 'Renamed' WHERE id = ?", (id,))
+        conn.close()
+        _, changed = await self.get(f"/movies/{id}")
+        self.assertEqual(changed["title"], "Renamed")
+        self.assertEqual(self.server.cache.hits, 1)
+
+    async def test_request_bodies(self):
+        body = b'{"title": "Renamed"}'
+        for method, expected in (("POST", 405), ("GET", 200)):
+            self.writer.write(
+                f"{method} /genres HTTP/1.1\r\nHost: test\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            status, _ = await self.read_response()
+            self.assertEqual(status, expected)
+        # The bodies were read past, the connection is still in step
+        status, genres = await self.get("/genres")
+        self.assertEqual(status, 200)
+        self.assertTrue(genres)
+        self.writer.write(
+            b"POST /genres HTTP/1.1\r\nHost: test\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n0\r\n\r\n"
+        )
+        status, _ = await self.read_response()
+        self.assertEqual(status, 400)
+        self.assertEqual(await self.reader.read(), b"")
+
+    def test_requires_relational_database(self):
+        flat = str(Path(self.dir.name, "flat.db"))
+        with self.assertRaises(ValueError):
+            MovieServer(flat)
+
+
+if __name__ == "__main__":
+    unittest.main()
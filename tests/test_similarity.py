@@ -0,0 +1,104 @@
+import csv
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import numpy
+from click.testing import CliRunner
+from data_hunter.dataset import MovieDataset
+from data_hunter.similarity import SimilarityIndex
+from cli import Similarity
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestSimilarityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        for path in DATA_DIR.glob("w*.csv"):
+            shutil.copy(path, self.dir.name)
+        self.dataset = MovieDataset.from_csv(self.dir.name)
+        self.index = SimilarityIndex(Path(self.dir.name, "index"))
+        self.index.add(self.dataset)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_matches_brute_force(self):
+        positions = numpy.arange(0, len(self.index), 97)
+        neighbours, scores = self.index.neighbours(positions, k=5, block_size=8)
+        dense = self.index.matrix.toarray()
+        for position, row, row_scores in zip(positions, neighbours, scores):
+            similarity = dense @ dense[position]
+            similarity[position] = 0
+            self.assertNotIn(position, row)
+            self.assertTrue(numpy.all(numpy.diff(row_scores) <= 1e-6))
+            numpy.testing.assert_allclose(
+                row_scores, numpy.sort(similarity)[::-1][:5], rtol=1e-4, atol=1e-6
+            )
+
+    def test_mask(self):
+        neighbours, _ = self.index.neighbours(
+            range(50), k=5, genres=["Western"], categories=["Hollywood"]
+        )
+        for neighbour in neighbours.ravel():
+            if neighbour >= 0:
+                record = self.dataset.get(self.index.urls[neighbour])
+                self.assertIn("Western", record.genres)
+                self.assertEqual(record.category, "Hollywood")
+
+    def test_incremental_matches_rebuild(self):
+        incremental = SimilarityIndex(Path(self.dir.name, "incremental"))
+        self.assertEqual(
+            incremental.add(MovieDataset.from_csv(self.dir.name, "war")),
+            len(MovieDataset.from_csv(self.dir.name, "war")),
+        )
+        incremental.save()
+        incremental = SimilarityIndex(incremental.index_dir)
+        incremental.add(self.dataset)
+        self.assertEqual(incremental.add(self.dataset), 0)
+        self.assertEqual(incremental.urls, self.index.urls)
+        self.assertEqual(incremental.terms, self.index.terms)
+        self.assertEqual((incremental.counts != self.index.counts).nnz, 0)
+        numpy.testing.assert_array_equal(
+            incremental.genre_masks, self.index.genre_masks
+        )
+        numpy.testing.assert_allclose(
+            incremental.matrix.toarray(), self.index.matrix.toarray()
+        )
+
+    def test_interrupted_save_keeps_previous_index(self):
+        index = SimilarityIndex(Path(self.dir.name, "interrupted"))
+        war = MovieDataset.from_csv(self.dir.name, "war")
+        index.add(war)
+        index.save()
+        index.add(self.dataset)
+        with mock.patch("json.dump", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                index.save()
+        reloaded = SimilarityIndex(index.index_dir)
+        self.assertEqual(len(reloaded), len(war))
+        self.assertEqual(reloaded.counts.shape[0], len(war))
+        self.assertEqual(len(reloaded.genre_masks), len(war))
+        # The next save removes the files of every other generation
+        index.save()
+        self.assertEqual(len(SimilarityIndex(index.index_dir)), len(self.index))
+        self.assertEqual(len(list(index.index_dir.glob("*.npz"))), 2)
+
+    def test_command(self):
+        output = Path(self.dir.name, "similar.csv")
+        result = CliRunner().invoke(
+            Similarity.similar, [self.dir.name, "-k", "3", "-o", str(output)]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        with open(output, newline="") as fh:
+            rows = list(csv.DictReader(fh))
+        self.assertGreater(len(rows), len(self.dataset))
+        self.assertLessEqual(len(rows), 3 * len(self.dataset))
+        self.assertEqual({row["rank"] for row in rows}, {"1", "2", "3"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import csv
+import glob
+import sqlite3
+import tempfile
+import importlib.util
+import unittest
+from pathlib import Path
+from unittest import mock
+from data_hunter.main import MovieDataHunter
+from data_hunter.sinks import SQLiteSink, RelationalSink
+from fake_search import make_fake_search
+from cli import DatabaseRelater, Utils
+
+
+class TestSinks(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.data_hunter = MovieDataHunter(
+            categories=["Hollywood", "Bollywood"], genres=["Action", "Drama"]
+        )
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def hunt(self, sink, prefix=""):
+        with mock.patch("data_hunter.main.Search", make_fake_search(pages=2)):
+            return list(
+                self.data_hunter.hunt(
+                    dir=self.dir.name, prefix=prefix, stream=True, sink=sink
+                )
+            )
+
+    def test_sqlite_matches_create_db(self):
+        entries = self.hunt("sqlite")
+        self.assertEqual({entry[4].name for entry in entries}, {SQLiteSink.filename})
+        self.hunt("csv", prefix="csv-")
+        expected = Path(self.dir.name, "expected.db")
+        Utils.stream_to_db(
+            sorted(glob.glob(str(Path(self.dir.name, "csv-*.csv")))), str(expected)
+        )
+        query = 'SELECT * FROM Movies ORDER BY genre, "index"'
+        self.assertEqual(
+            sqlite3.connect(Path(self.dir.name, SQLiteSink.filename))
+            .execute(query)
+            .fetchall(),
+            sqlite3.connect(expected).execute(query).fetchall(),
+        )
+
+    def test_relational_matches_relate_tables(self):
+        self.hunt("relational")
+        self.hunt("sqlite")
+        expected = Path(self.dir.name, "expected.db")
+        DatabaseRelater.bulk_relate(
+            str(Path(self.dir.name, SQLiteSink.filename)), str(expected)
+        )
+        query = (
+            "SELECT m.title, m.url, m.year, c.name, g.name FROM movie m "
+            "JOIN category c ON c.id = m.category_id "
+            "JOIN movie_genre mg ON mg.movie_id = m.id "
+            "JOIN genre g ON g.id = mg.genre_id ORDER BY m.url, g.name"
+        )
+        relational = sqlite3.connect(Path(self.dir.name, RelationalSink.filename))
+        self.assertEqual(
+            relational.execute(query).fetchall(),
+            sqlite3.connect(expected).execute(query).fetchall(),
+        )
+        # Upserting the same movies again changes nothing
+        self.hunt("relational")
+        self.assertEqual(
+            relational.execute("SELECT count(*) FROM movie_genre").fetchone(),
+            (2 * 2 * 2 * 20,),
+        )
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+    def test_parquet(self):
+        import pandas
+
+        self.hunt("parquet")
+        self.hunt("csv")
+        for genre in ("action", "drama"):
+            pandas.testing.assert_frame_equal(
+                pandas.read_parquet(Path(self.dir.name, genre + ".parquet")),
+                pandas.read_csv(Path(self.dir.name, genre + ".csv")),
+            )
+
+    def test_resume_requires_appendable_sink(self):
+        # Resuming skips the pages saved while the parquet sink replaces them
+        with self.assertRaises(AssertionError):
+            self.data_hunter.hunt(dir=self.dir.name, resume=True, sink="parquet")
+        self.assertEqual(list(Path(self.dir.name).iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import sys
+import subprocess
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).parents[1]
+
+
+class TestStartup(unittest.TestCase):
+
+    def imported(self, *args) -> set[str]:
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", *args],
+            capture_output=True,
+            text=True,
+            cwd=ROOT,
+            env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+        )
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        return {
+            line.split("|")[-1].strip().split(".")[0]
+            for line in completed.stderr.splitlines()
+            if line.startswith("import time:")
+        }
+
+    def test_help_and_version_skip_heavy_imports(self):
+        for args in (
+            ["cli.py", "--help"],
+            ["-m", "data_hunter", "--version"],
+            ["-m", "data_hunter", "--help"],
+        ):
+            with self.subTest(args=args):
+                imported = self.imported(*args)
+                for module in ("pandas", "numpy", "sqlmodel", "fzmovies_api"):
+                    self.assertNotIn(module, imported)
+
+    def test_lazy_command_is_resolved(self):
+        imported = self.imported("cli.py", "create-db", "--help")
+        self.assertNotIn("pandas", imported)
+        self.assertIn("click", imported)
+
+    def test_genres_mirror_fzmovies_api(self):
+        from fzmovies_api.filters import MovieGenreFilter
+        from data_hunter.constants import available_genres
+
+        self.assertEqual(
+            tuple(available_genres), tuple(MovieGenreFilter.available_genres)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+import pandas
+from click.testing import CliRunner
+from data_hunter.stats import DatasetStats
+from cli import Statistics
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestDatasetStats(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        for path in DATA_DIR.glob("w*.csv"):
+            shutil.copy(path, self.dir.name)
+        self.csv_filenames = sorted(
+            str(path) for path in Path(self.dir.name).glob("*.csv")
+        )
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_matches_pandas(self):
+        computed = DatasetStats(self.csv_filenames).compute()
+        df = pandas.concat(
+            [pandas.read_csv(path) for path in self.csv_filenames], ignore_index=True
+        )
+        self.assertEqual(computed["rows"], len(df))
+        self.assertEqual(
+            computed["counts"]["genre"], df["genre"].value_counts().to_dict()
+        )
+        self.assertEqual(
+            computed["counts"]["distribution"],
+            df["distribution"].fillna("unknown").value_counts().to_dict(),
+        )
+        described = df["description"].dropna().str.len()
+        self.assertEqual(computed["description_length"]["count"], len(described))
+        self.assertEqual(computed["description_length"]["max"], described.max())
+        self.assertAlmostEqual(
+            computed["description_length"]["mean"], described.mean(), places=1
+        )
+        self.assertEqual(computed["urls"]["unique"], df["url"].nunique())
+        genres = df.groupby("url")["genre"].agg(set)
+        self.assertEqual(
+            computed["genre_overlap"]["War"]["Western"],
+            sum({"War", "Western"} <= movie_genres for movie_genres in genres),
+        )
+        self.assertEqual(
+            computed["genre_overlap"]["War"]["War"],
+            df[df["genre"] == "War"]["url"].nunique(),
+        )
+
+    def test_recomputes_changed_files_only(self):
+        full = DatasetStats(self.csv_filenames).compute()
+        dataset_stats = DatasetStats(self.csv_filenames)
+        self.assertEqual(dataset_stats.compute(), full)
+        self.assertEqual(dataset_stats.recomputed, [])
+        # Touched without changes
+        os.utime(self.csv_filenames[0])
+        self.assertEqual(dataset_stats.compute(), full)
+        self.assertEqual(dataset_stats.recomputed, [])
+        with open(self.csv_filenames[-1], "a") as fh:
+            fh.write("Western,Hollywood,Appended,1901,,,https://appended,\n")
+        appended = dataset_stats.compute()
+        self.assertEqual(dataset_stats.recomputed, [self.csv_filenames[-1]])
+        self.assertEqual(appended["rows"], full["rows"] + 1)
+        self.assertEqual(appended["counts"]["year"]["1901"], 1)
+        self.assertEqual(appended, DatasetStats(self.csv_filenames).compute(force=True))
+
+    def test_command(self):
+        output = Path(self.dir.name, "stats.json")
+        result = CliRunner().invoke(
+            Statistics.stats, [self.dir.name, "-p", "w*", "-o", str(output)]
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue(output.exists())
+        self.assertTrue(Path(self.dir.name, ".movies-cache", "stats.json").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
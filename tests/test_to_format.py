@@ -0,0 +1,87 @@
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import pandas
+from click.testing import CliRunner
+from cli import Utils
+
+DATA_DIR = Path(__file__).parents[1] / "data"
+
+
+class TestToFormat(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.output = Path(self.dir.name, "movies-data")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def to_format(self, *args):
+        result = CliRunner().invoke(
+            Utils.to_format,
+            [str(DATA_DIR), "-p", "w*", "-o", str(self.output), *args],
+        )
+        self.assertEqual(result.exit_code, 0, result.output)
+
+    def test_dataset_read_once(self):
+        with mock.patch("pandas.read_csv", wraps=pandas.read_csv) as read_csv:
+            self.to_format("-f", "csv", "-f", "json", "-f", "pickle")
+        self.assertEqual(read_csv.call_count, 2)
+        df = pandas.read_pickle(self.output.with_suffix(".pkl"))
+        self.assertEqual(df["genre"].dtype, "category")
+        self.assertEqual(df["year"].dtype, "Int64")
+        self.assertEqual(
+            len(pandas.read_json(self.output.with_suffix(".json"))), len(df)
+        )
+
+    def test_stream_matches_in_memory(self):
+        self.to_format("-f", "csv", "-f", "jsonl", "-f", "html")
+        expected_html = self.output.with_suffix(".html").read_bytes()
+        expected_csv = pandas.read_csv(self.output.with_suffix(".csv"), index_col=0)
+        expected_jsonl = pandas.read_json(self.output.with_suffix(".jsonl"), lines=True)
+        with mock.patch("pandas.read_csv") as read_csv:
+            self.to_format(
+                "-f", "csv", "-f", "jsonl", "-f", "markdown", "-f", "html", "--stream"
+            )
+        read_csv.assert_not_called()
+        pandas.testing.assert_frame_equal(
+            pandas.read_csv(self.output.with_suffix(".csv"), index_col=0),
+            expected_csv,
+        )
+        pandas.testing.assert_frame_equal(
+            pandas.read_json(self.output.with_suffix(".jsonl"), lines=True),
+            expected_jsonl,
+        )
+        self.assertEqual(self.output.with_suffix(".html").read_bytes(), expected_html)
+        with open(self.output.with_suffix(".md")) as fh:
+            self.assertEqual(sum(1 for _ in fh), len(expected_csv) + 2)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+    def test_columnar_formats(self):
+        self.to_format("-f", "parquet", "-f", "feather", "-c", "zstd")
+        parquet = pandas.read_parquet(self.output.with_suffix(".parquet"))
+        feather = pandas.read_feather(self.output.with_suffix(".feather"))
+        pandas.testing.assert_frame_equal(parquet, feather)
+        self.assertEqual(parquet["category"].dtype, "category")
+        self.assertEqual(
+            len(parquet),
+            sum(len(pandas.read_csv(path)) for path in DATA_DIR.glob("w*.csv")),
+        )
+
+    def test_codec_checked_before_loading(self):
+        with mock.patch.object(Utils, "load_dataset") as load_dataset:
+            result = CliRunner().invoke(
+                Utils.to_format,
+                [str(DATA_DIR), "-o", str(self.output), "-f", "parquet"]
+                + ["-f", "feather", "-c", "snappy"],
+            )
+        load_dataset.assert_not_called()
+        self.assertEqual(result.exit_code, 2)
+        self.assertIn("not supported by the feather format", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()